@@ -1 +1,2 @@
 """__init__ for API."""
+default_app_config = 'api.apps.ApiConfig'
@@ -1,8 +1,41 @@
 """Apps for API."""
 from django.apps import AppConfig
+from django.db.backends.signals import connection_created
+from django.db.models.signals import m2m_changed, post_delete, post_save
 
 
 class ApiConfig(AppConfig):
     """API config for API."""
 
     name = 'api'
+
+    def ready(self):
+        """Сброс кэшей API при изменении моделей, настройка SQLite,
+        компиляция сериализаторов чтения.
+        """
+        from django.contrib.auth import get_user_model
+        from reviews.models import Categories, Comments, Genres, Review, Title
+        from .authentication import invalidate_user
+        from .cache import bump_m2m_version, bump_model_version
+        from .compiled import compiled_serializers
+        from .fields import slug_cache
+        from .serializers import (
+            CategorySerializer, CommentSerializer, GenreSerializer,
+            ReviewSerializer, TitlesReadSerializer, UserSerializer,
+        )
+        from .sqlite import apply_pragmas
+
+        for model in (Categories, Genres, Title, Review, Comments):
+            post_save.connect(bump_model_version, sender=model)
+            post_delete.connect(bump_model_version, sender=model)
+        m2m_changed.connect(bump_m2m_version, sender=Title.genre.through)
+        for model in (Categories, Genres):
+            post_save.connect(slug_cache.invalidate, sender=model)
+            post_delete.connect(slug_cache.invalidate, sender=model)
+        post_save.connect(invalidate_user, sender=get_user_model())
+        post_delete.connect(invalidate_user, sender=get_user_model())
+        connection_created.connect(apply_pragmas)
+        compiled_serializers.register(
+            UserSerializer, CategorySerializer, GenreSerializer,
+            TitlesReadSerializer, ReviewSerializer, CommentSerializer,
+        )
@@ -0,0 +1,129 @@
+"""ASGI handler for API."""
+import asyncio
+import sys
+from io import BytesIO
+
+from django.core.handlers.wsgi import WSGIHandler
+
+from .concurrency import ASGI_ENVIRON_KEY, query_pool, request_pool
+
+
+class ASGIHandler:
+    """ASGI-приложение поверх WSGI-обработчика Django.
+
+    Django 2.2 не умеет работать под ASGI, поэтому тело запроса
+    читается и ответ отправляется в цикле событий, а само представление
+    выполняется в ограниченном пуле потоков (настройка API_ASGI_THREADS).
+    Медленный клиент занимает только соединение, а не поток. Запросы
+    помечаются в окружении, и представления каталога выполняют
+    независимые запросы к БД параллельно (см. api.concurrency).
+    """
+
+    def __init__(self, wsgi_application=None):
+        """Init method for ASGIHandler."""
+        self.wsgi_application = wsgi_application or WSGIHandler()
+
+    async def __call__(self, scope, receive, send):
+        """Обработать соединение."""
+        if scope['type'] == 'lifespan':
+            await self.lifespan(receive, send)
+            return
+        if scope['type'] != 'http':
+            raise ValueError(
+                f'Неподдерживаемый тип соединения: {scope["type"]}'
+            )
+        body = await self.read_body(receive)
+        if body is None:
+            return
+        loop = asyncio.get_running_loop()
+        status, headers, content = await loop.run_in_executor(
+            request_pool.executor, self.run_wsgi,
+            self.get_environ(scope, body)
+        )
+        await send({
+            'type': 'http.response.start',
+            'status': status,
+            'headers': headers,
+        })
+        await send({'type': 'http.response.body', 'body': content})
+
+    async def lifespan(self, receive, send):
+        """Запуск и остановка приложения: пулы потоков."""
+        while True:
+            message = await receive()
+            if message['type'] == 'lifespan.startup':
+                await send({'type': 'lifespan.startup.complete'})
+            elif message['type'] == 'lifespan.shutdown':
+                request_pool.shutdown()
+                query_pool.shutdown()
+                await send({'type': 'lifespan.shutdown.complete'})
+                return
+
+    async def read_body(self, receive):
+        """Тело запроса или None, если клиент отключился."""
+        chunks = []
+        while True:
+            message = await receive()
+            if message['type'] == 'http.disconnect':
+                return None
+            chunks.append(message.get('body', b''))
+            if not message.get('more_body', False):
+                return b''.join(chunks)
+
+    def get_environ(self, scope, body):
+        """Окружение WSGI для соединения ASGI."""
+        server = scope.get('server') or ('localhost', 80)
+        environ = {
+            'REQUEST_METHOD': scope['method'],
+            'SCRIPT_NAME': scope.get('root_path', '').encode().decode(
+                'latin-1'
+            ),
+            'PATH_INFO': scope['path'].encode().decode('latin-1'),
+            'QUERY_STRING': scope.get('query_string', b'').decode('latin-1'),
+            'SERVER_NAME': str(server[0]),
+            'SERVER_PORT': str(server[1]),
+            'SERVER_PROTOCOL': f'HTTP/{scope.get("http_version", "1.1")}',
+            'wsgi.version': (1, 0),
+            'wsgi.url_scheme': scope.get('scheme', 'http'),
+            'wsgi.input': BytesIO(body),
+            'wsgi.errors': sys.stderr,
+            'wsgi.multithread': True,
+            'wsgi.multiprocess': True,
+            'wsgi.run_once': False,
+            ASGI_ENVIRON_KEY: True,
+        }
+        if scope.get('client'):
+            environ['REMOTE_ADDR'] = scope['client'][0]
+            environ['REMOTE_PORT'] = str(scope['client'][1])
+        for name, value in scope.get('headers', ()):
+            name = name.decode('latin-1').upper().replace('-', '_')
+            if name not in ('CONTENT_TYPE', 'CONTENT_LENGTH'):
+                name = f'HTTP_{name}'
+            value = value.decode('latin-1')
+            if name in environ:
+                value = f'{environ[name]},{value}'
+            environ[name] = value
+        # Тело уже прочитано целиком, в том числе без Content-Length.
+        environ['CONTENT_LENGTH'] = str(len(body))
+        return environ
+
+    def run_wsgi(self, environ):
+        """Выполнить запрос WSGI-обработчиком: статус, заголовки, тело."""
+        response = {}
+
+        def start_response(status, headers, exc_info=None):
+            response['status'] = int(status.split(' ', 1)[0])
+            response['headers'] = [
+                (name.lower().encode('latin-1'), value.encode('latin-1'))
+                for name, value in headers
+            ]
+            return chunks.append
+
+        chunks = []
+        result = self.wsgi_application(environ, start_response)
+        try:
+            chunks.extend(result)
+        finally:
+            if hasattr(result, 'close'):
+                result.close()
+        return response['status'], response['headers'], b''.join(chunks)
@@ -0,0 +1,95 @@
+"""Authentication for API."""
+from django.conf import settings
+from django.core.cache import caches
+from django.db import DEFAULT_DB_ALIAS
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.exceptions import (
+    AuthenticationFailed, InvalidToken
+)
+from rest_framework_simplejwt.settings import api_settings
+
+# Поля пользователя, которых достаточно для проверки прав.
+SNAPSHOT_FIELDS = (
+    'id', 'username', 'role', 'is_superuser', 'is_staff', 'is_active'
+)
+
+
+def get_auth_cache():
+    """Бэкенд кэша для снимков пользователей."""
+    return caches[getattr(settings, 'API_CACHE_ALIAS', 'default')]
+
+
+def user_cache_key(user_id):
+    """Ключ снимка пользователя."""
+    return f'api:auth:user:{user_id}'
+
+
+def invalidate_user(sender, instance, **kwargs):
+    """Обработчик сигналов: удалить снимок изменённого пользователя."""
+    get_auth_cache().delete(user_cache_key(instance.pk))
+
+
+class CachedJWTAuthentication(JWTAuthentication):
+    """JWTAuthentication с кэшем снимка пользователя по id.
+
+    Вместо выборки пользователя на каждый запрос из кэша берутся поля
+    SNAPSHOT_FIELDS. Остальные поля модели отложены и загружаются
+    из базы при первом обращении, а save() сохраняет только загруженные.
+    Снимок удаляется при сохранении и удалении пользователя
+    (см. ApiConfig.ready).
+    """
+
+    @property
+    def snapshot_fields(self):
+        """Поля снимка в порядке полей модели, как ожидает from_db."""
+        return [
+            field.attname for field in self.user_model._meta.concrete_fields
+            if field.attname in SNAPSHOT_FIELDS
+        ]
+
+    def load_user(self, user_id):
+        """Пользователь из основной базы, как JWTAuthentication.get_user.
+
+        Снимок не читается с реплики: после изменения прав или
+        блокировки реплика может ещё отдавать прежние значения.
+        """
+        try:
+            user = self.user_model.objects.using(DEFAULT_DB_ALIAS).get(
+                **{api_settings.USER_ID_FIELD: user_id}
+            )
+        except self.user_model.DoesNotExist:
+            raise AuthenticationFailed('User not found', code='user_not_found')
+        if not user.is_active:
+            raise AuthenticationFailed(
+                'User is inactive', code='user_inactive'
+            )
+        return user
+
+    def get_user(self, validated_token):
+        """Get_user method for CachedJWTAuthentication."""
+        try:
+            user_id = validated_token[api_settings.USER_ID_CLAIM]
+        except KeyError:
+            raise InvalidToken(
+                'Token contained no recognizable user identification'
+            )
+        cache = get_auth_cache()
+        key = user_cache_key(user_id)
+        snapshot = cache.get(key)
+        field_names = self.snapshot_fields
+        if snapshot is None:
+            user = self.load_user(user_id)
+            cache.set(
+                key,
+                [getattr(user, field) for field in field_names],
+                getattr(settings, 'AUTH_USER_CACHE_TIMEOUT', 60)
+            )
+            return user
+        user = self.user_model.from_db(
+            DEFAULT_DB_ALIAS, field_names, snapshot
+        )
+        if not user.is_active:
+            raise AuthenticationFailed(
+                'User is inactive', code='user_inactive'
+            )
+        return user
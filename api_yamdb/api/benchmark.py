@@ -0,0 +1,96 @@
+"""Benchmark statistics for API."""
+import math
+import os
+import platform
+import subprocess
+import tempfile
+from contextlib import contextmanager
+
+import django
+from django.db import connections
+
+PERCENTILES = (50, 95, 99)
+# Метрики отчёта, которые сравниваются между двумя запусками.
+COMPARED_METRICS = ('rps', 'p50', 'p95', 'p99', 'queries_per_request')
+
+
+def percentile(values, rank):
+    """Перцентиль отсортированного списка (метод ближайшего ранга)."""
+    if not values:
+        return 0.0
+    index = max(math.ceil(rank / 100 * len(values)) - 1, 0)
+    return values[index]
+
+
+def summarize(samples, elapsed):
+    """Сводка по замерам (латентность в секундах, статус, запросы к БД).
+
+    Латентность в отчёте указывается в миллисекундах.
+    """
+    latencies = sorted(latency for latency, _, _ in samples)
+    errors = sum(1 for _, ok, _ in samples if not ok)
+    queries = [count for _, _, count in samples if count is not None]
+    summary = {
+        'requests': len(samples),
+        'errors': errors,
+        'rps': len(samples) / elapsed if elapsed else 0.0,
+        'mean': (
+            sum(latencies) / len(latencies) * 1000 if latencies else 0.0
+        ),
+        'queries_per_request': (
+            sum(queries) / len(queries) if queries else None
+        ),
+    }
+    for rank in PERCENTILES:
+        summary[f'p{rank}'] = percentile(latencies, rank) * 1000
+    return summary
+
+
+def compare(baseline, current):
+    """Изменение метрик относительно базового отчёта, в процентах."""
+    deltas = {}
+    for name, metrics in current['scenarios'].items():
+        base = baseline.get('scenarios', {}).get(name)
+        if base is None:
+            continue
+        deltas[name] = {
+            metric: (metrics[metric] - base[metric]) / base[metric] * 100
+            for metric in COMPARED_METRICS
+            if metrics.get(metric) is not None and base.get(metric)
+        }
+    return deltas
+
+
+def environment():
+    """Описание окружения запуска для отчёта."""
+    try:
+        commit = subprocess.run(
+            ('git', 'rev-parse', 'HEAD'), capture_output=True,
+            text=True, check=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        commit = None
+    return {
+        'commit': commit,
+        'python': platform.python_version(),
+        'django': django.get_version(),
+        'platform': platform.platform(),
+    }
+
+
+@contextmanager
+def throwaway_database(connection, filename):
+    """Временная SQLite-база вместо базы соединения на время блока."""
+    with tempfile.TemporaryDirectory() as directory:
+        connection.settings_dict['TEST']['NAME'] = os.path.join(
+            directory, filename
+        )
+        old_name = connection.settings_dict['NAME']
+        connection.creation.create_test_db(
+            verbosity=0, autoclobber=True, serialize=False
+        )
+        try:
+            yield
+        finally:
+            connections.close_all()
+            connection.creation.destroy_test_db(old_name, verbosity=0)
@@ -0,0 +1,379 @@
+"""Bulk create and update for API."""
+from django.conf import settings
+from django.db import connections, router, transaction
+from django.db.models import Max
+from django.utils import timezone
+from rest_framework import serializers, status
+from rest_framework.exceptions import ValidationError
+from rest_framework.response import Response
+from rest_framework.validators import UniqueValidator
+
+from reviews.fields import casefold_fields
+from reviews.models import Title
+from .cache import response_cache
+from .concurrency import attach_related
+from .fields import BatchSlugRelatedField, slug_cache
+from .sqlite import immediate_atomic, write_queue
+
+# Значения параметра `atomic`, включающие атомарный режим.
+TRUE_VALUES = ('1', 'true', 'yes')
+
+
+def slug_fields(serializer):
+    """Поля сериализатора, которые ищут объекты по слагу из карты."""
+    for name, field in serializer.fields.items():
+        if isinstance(field, serializers.ManyRelatedField):
+            field = field.child_relation
+        if isinstance(field, BatchSlugRelatedField):
+            yield name, field
+
+
+def preload_slugs(serializer, items):
+    """Объекты по слагам всех элементов пакета: запрос на поле."""
+    slug_map = {}
+    for name, field in slug_fields(serializer):
+        values = set()
+        for item in items:
+            value = item.get(name) if isinstance(item, dict) else None
+            if not isinstance(value, list):
+                value = [value]
+            values.update(
+                slug for slug in value if isinstance(slug, (str, int))
+            )
+        slug_map.setdefault(field.get_queryset().model, {}).update(
+            field.resolve(values)
+        )
+    return slug_map
+
+
+def pop_unique_validators(serializer):
+    """Убрать UniqueValidator из полей: уникальность проверит пакет."""
+    unique = []
+    for name, field in serializer.fields.items():
+        validators = [
+            validator for validator in field.validators
+            if isinstance(validator, UniqueValidator)
+        ]
+        if validators:
+            field.validators = [
+                validator for validator in field.validators
+                if not isinstance(validator, UniqueValidator)
+            ]
+            unique.append((name, field.source, validators[0].message))
+    return unique
+
+
+def check_unique(model, unique, valid, errors):
+    """Проверить уникальность полей пакета одним запросом на поле.
+
+    Значения сравниваются с базой и с предыдущими элементами пакета.
+    """
+    for name, source, message in unique:
+        values = {
+            serializer.validated_data[source]
+            for index, serializer in valid.items()
+            if source in serializer.validated_data
+        }
+        taken = set(model._default_manager.filter(
+            **{f'{source}__in': values}
+        ).values_list(source, flat=True))
+        for index, serializer in list(valid.items()):
+            value = serializer.validated_data.get(source)
+            if value is None:
+                continue
+            if value in taken:
+                errors[index] = (
+                    status.HTTP_400_BAD_REQUEST, {name: [str(message)]}
+                )
+                del valid[index]
+            else:
+                taken.add(value)
+
+
+def many_to_many(model, validated_data):
+    """Вынуть значения ManyToMany-полей из данных."""
+    return {
+        field: validated_data.pop(field.name)
+        for field in model._meta.many_to_many
+        if field.name in validated_data
+    }
+
+
+def allocate_ids(model, objs, using):
+    """Назначить первичные ключи новым объектам.
+
+    SQLite в Django 2.2 не возвращает ключи из bulk_create. Ключи
+    выдаются после наибольшего из выданных AUTOINCREMENT
+    (sqlite_sequence) и существующих, поэтому ключи удалённых объектов
+    не переиспользуются; вставка с большим ключом сама сдвигает
+    sqlite_sequence. Вызывается в транзакции с BEGIN IMMEDIATE, иначе
+    два пакета прочитали бы одно значение. Возвращает False, если ключи
+    так выдать нельзя и объекты нужно вставлять по одному.
+    """
+    connection = connections[using]
+    if connection.features.can_return_ids_from_bulk_insert:
+        return True
+    if (
+        connection.vendor != 'sqlite'
+        or model._meta.pk.get_internal_type() != 'AutoField'
+    ):
+        return False
+    with connection.cursor() as cursor:
+        cursor.execute(
+            'SELECT seq FROM sqlite_sequence WHERE name = %s',
+            [model._meta.db_table]
+        )
+        row = cursor.fetchone()
+    top = model._default_manager.using(using).aggregate(
+        top=Max('pk')
+    )['top']
+    start = max(row[0] if row else 0, top or 0)
+    for number, obj in enumerate(objs, start=start + 1):
+        obj.pk = number
+    return True
+
+
+def save_relations(model, objs, relations, replace):
+    """Записать связи ManyToMany одной вставкой на поле."""
+    for field in {field for values in relations for field in values}:
+        through = field.remote_field.through
+        source = through._meta.get_field(field.m2m_field_name()).attname
+        target = through._meta.get_field(
+            field.m2m_reverse_field_name()
+        ).attname
+        pairs = [
+            (obj, list(dict.fromkeys(values[field])))
+            for obj, values in zip(objs, relations) if field in values
+        ]
+        if replace:
+            through._default_manager.filter(**{
+                f'{source}__in': [obj.pk for obj, _ in pairs]
+            }).delete()
+        through._default_manager.bulk_create([
+            through(**{source: obj.pk, target: related.pk})
+            for obj, related_objects in pairs
+            for related in related_objects
+        ])
+        attach_related(
+            [obj for obj, _ in pairs], field,
+            {obj.pk: related_objects for obj, related_objects in pairs}
+        )
+
+
+def insert(model, objs, relations):
+    """Вставить объекты и их связи в одной транзакции."""
+    using = router.db_for_write(model)
+    with immediate_atomic(using):
+        if allocate_ids(model, objs, using):
+            model._default_manager.using(using).bulk_create(objs)
+        else:
+            for obj in objs:
+                obj.save(force_insert=True, using=using)
+        save_relations(model, objs, relations, replace=False)
+
+
+def touch_titles(model, objs):
+    """Отметить изменение произведений, которые выводят объекты пакета.
+
+    bulk_update не отправляет сигналов, поэтому, как и при удалении
+    категорий и жанров (reviews.signals), `updated_at` произведений
+    обновляется здесь: иначе их ETag подтверждал бы ответы со старыми
+    названиями.
+    """
+    for relation in model._meta.related_objects:
+        if relation.related_model is Title:
+            Title.objects.filter(**{
+                f'{relation.field.name}__in': objs
+            }).update(updated_at=timezone.now())
+
+
+def update(model, objs, fields, relations):
+    """Обновить объекты и их связи в одной транзакции.
+
+    bulk_update не вызывает pre_save, поэтому auto_now и casefold-поля
+    вычисляются здесь.
+    """
+    casefold = casefold_fields(model)
+    computed = [
+        field for field in model._meta.concrete_fields
+        if getattr(field, 'auto_now', False) or field in casefold
+    ]
+    for obj in objs:
+        for field in computed:
+            field.pre_save(obj, False)
+    fields = set(fields) | {field.name for field in computed}
+    with transaction.atomic(using=router.db_for_write(model)):
+        model._default_manager.bulk_update(objs, fields)
+        save_relations(model, objs, relations, replace=True)
+        touch_titles(model, objs)
+
+
+class BulkMixin:
+    """Пакетное создание и частичное обновление.
+
+    POST со списком на адрес списка создаёт объекты, PATCH со списком
+    (маршрут добавляет BulkRouter) частично обновляет их; объект
+    задаётся полем `id` или `lookup_field` элемента. Слаги связей всего
+    пакета загружаются одним запросом на модель, строки вставляются
+    bulk_create, связи ManyToMany — одной вставкой на поле.
+
+    Ответ — список результатов по элементам (`status` и `data` или
+    `errors`): 201/200, если все элементы сохранены, иначе 207.
+    С параметром `?atomic=true` пакет сохраняется только целиком,
+    а при ошибках возвращается 400 и ничего не сохраняется.
+    """
+
+    def create(self, request, *args, **kwargs):
+        """Create method for BulkMixin."""
+        if isinstance(request.data, list):
+            return self.bulk_create(request)
+        return super().create(request, *args, **kwargs)
+
+    def is_atomic(self, request):
+        """Запрошен ли атомарный режим."""
+        return request.query_params.get('atomic', '').lower() in TRUE_VALUES
+
+    def get_bulk_items(self, request):
+        """Элементы пакета из тела запроса."""
+        items = request.data
+        limit = getattr(settings, 'API_BULK_MAX_ITEMS', 1000)
+        if not isinstance(items, list):
+            raise ValidationError({'non_field_errors': [
+                'Ожидается список объектов.'
+            ]})
+        if len(items) > limit:
+            raise ValidationError({'non_field_errors': [
+                f'Не больше {limit} объектов в одном запросе.'
+            ]})
+        return items
+
+    def get_bulk_lookup(self):
+        """Поле элемента, которым задаётся обновляемый объект."""
+        return 'id' if self.lookup_field == 'pk' else self.lookup_field
+
+    def get_bulk_context(self, items):
+        """Контекст сериализаторов пакета с загруженными слагами."""
+        context = self.get_serializer_context()
+        context['slug_map'] = preload_slugs(
+            self.get_serializer_class()(context=context), items
+        )
+        return context
+
+    def validate_items(self, items, instances, context, partial):
+        """Проверить элементы пакета.
+
+        Возвращает сериализаторы прошедших проверку элементов и ошибки
+        остальных: индекс → (код ответа, ошибки).
+        """
+        serializer_class = self.get_serializer_class()
+        valid, errors, unique = {}, {}, []
+        for index, item in enumerate(items):
+            instance = None
+            if partial:
+                instance = instances.get(index)
+                if instance is None:
+                    errors[index] = (
+                        status.HTTP_404_NOT_FOUND, {'detail': 'Не найдено.'}
+                    )
+                    continue
+            serializer = serializer_class(
+                instance, data=item, partial=partial, context=context
+            )
+            if not partial:
+                unique = pop_unique_validators(serializer)
+            if serializer.is_valid():
+                valid[index] = serializer
+            else:
+                errors[index] = (
+                    status.HTTP_400_BAD_REQUEST, serializer.errors
+                )
+        if not partial:
+            check_unique(
+                serializer_class.Meta.model, unique, valid, errors
+            )
+        return valid, errors
+
+    def bulk_response(self, items, valid, errors, success_status):
+        """Ответ со списком результатов по элементам."""
+        rejected = bool(errors) and self.is_atomic(self.request)
+        results = []
+        for index in range(len(items)):
+            if index in errors:
+                code, error = errors[index]
+                results.append({'status': code, 'errors': error})
+            elif rejected:
+                results.append({
+                    'status': status.HTTP_424_FAILED_DEPENDENCY,
+                    'errors': {'detail': 'Пакет не сохранён из-за ошибок.'},
+                })
+            else:
+                results.append({
+                    'status': success_status, 'data': valid[index].data
+                })
+        if rejected:
+            response_status = status.HTTP_400_BAD_REQUEST
+        elif errors:
+            response_status = status.HTTP_207_MULTI_STATUS
+        else:
+            response_status = success_status
+        return Response(results, status=response_status)
+
+    def bulk_create(self, request):
+        """Создать объекты из списка."""
+        items = self.get_bulk_items(request)
+        context = self.get_bulk_context(items)
+        valid, errors = self.validate_items(items, {}, context, False)
+        if valid and not (errors and self.is_atomic(request)):
+            model = self.get_serializer_class().Meta.model
+            objs, relations = [], []
+            for serializer in valid.values():
+                data = dict(serializer.validated_data)
+                relations.append(many_to_many(model, data))
+                serializer.instance = model(**data)
+                objs.append(serializer.instance)
+            write_queue.run(insert, model, objs, relations)
+            response_cache.bump_version(model)
+        return self.bulk_response(
+            items, valid, errors, status.HTTP_201_CREATED
+        )
+
+    def bulk_partial_update(self, request, *args, **kwargs):
+        """Частично обновить объекты из списка."""
+        items = self.get_bulk_items(request)
+        lookup = self.get_bulk_lookup()
+        keys = {
+            index: str(item[lookup]) for index, item in enumerate(items)
+            if isinstance(item, dict) and item.get(lookup) is not None
+        }
+        found = {
+            str(getattr(obj, lookup)): obj
+            for obj in self.get_queryset().filter(**{
+                f'{self.lookup_field}__in': set(keys.values())
+            })
+        }
+        for obj in found.values():
+            self.check_object_permissions(request, obj)
+        instances = {
+            index: found[key] for index, key in keys.items() if key in found
+        }
+        context = self.get_bulk_context(items)
+        valid, errors = self.validate_items(items, instances, context, True)
+        for index in range(len(items)):
+            if index not in keys:
+                errors[index] = (status.HTTP_400_BAD_REQUEST, {
+                    lookup: ['Обязательное поле.']
+                })
+        if valid and not (errors and self.is_atomic(request)):
+            model = self.get_serializer_class().Meta.model
+            objs, fields, relations = [], set(), []
+            for serializer in valid.values():
+                data = dict(serializer.validated_data)
+                relations.append(many_to_many(model, data))
+                for name, value in data.items():
+                    setattr(serializer.instance, name, value)
+                fields.update(data)
+                objs.append(serializer.instance)
+            write_queue.run(update, model, objs, fields, relations)
+            response_cache.bump_version(model)
+            slug_cache.invalidate(model)
+        return self.bulk_response(items, valid, errors, status.HTTP_200_OK)
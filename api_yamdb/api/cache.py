@@ -0,0 +1,122 @@
+"""Response cache for API."""
+import hashlib
+import threading
+from urllib.parse import urlencode
+
+from django.conf import settings
+from django.core.cache import caches
+
+
+class CacheStats:
+    """Счётчики попаданий и промахов кэша ответов в этом процессе."""
+
+    def __init__(self):
+        """Init method for CacheStats."""
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def hit(self):
+        """Учесть попадание."""
+        with self._lock:
+            self.hits += 1
+
+    def miss(self):
+        """Учесть промах."""
+        with self._lock:
+            self.misses += 1
+
+    def as_dict(self):
+        """Текущие значения счётчиков."""
+        with self._lock:
+            total = self.hits + self.misses
+            return {
+                'hits': self.hits,
+                'misses': self.misses,
+                'hit_ratio': self.hits / total if total else 0.0,
+            }
+
+    def reset(self):
+        """Обнулить счётчики."""
+        with self._lock:
+            self.hits = self.misses = 0
+
+
+class ResponseCache:
+    """Кэш данных ответов с версией на модель.
+
+    Версия модели входит в ключ, поэтому при изменении модели
+    достаточно увеличить версию: старые ключи больше не читаются
+    и вытесняются бэкендом по таймауту.
+    """
+
+    def __init__(self):
+        """Init method for ResponseCache."""
+        self.stats = CacheStats()
+
+    @property
+    def cache(self):
+        """Бэкенд кэша из настроек."""
+        return caches[getattr(settings, 'API_CACHE_ALIAS', 'default')]
+
+    @property
+    def timeout(self):
+        """Время жизни записей."""
+        return getattr(settings, 'API_CACHE_TIMEOUT', 300)
+
+    def version_key(self, model):
+        """Ключ версии модели."""
+        return f'api:version:{model._meta.label_lower}'
+
+    def get_version(self, model):
+        """Текущая версия модели."""
+        return self.cache.get_or_set(self.version_key(model), 1, None)
+
+    def bump_version(self, model):
+        """Увеличить версию модели, сбросив её закэшированные ответы."""
+        key = self.version_key(model)
+        try:
+            self.cache.incr(key)
+        except ValueError:
+            self.cache.add(key, 2, None)
+
+    def make_key(self, model, request):
+        """Ключ ответа: модель, её версия, адрес и параметры запроса.
+
+        Схема и хост входят в ключ, потому что ссылки `next`/`previous`
+        в данных ответа абсолютные.
+        """
+        query = urlencode(sorted(request.query_params.lists()), doseq=True)
+        origin = request.build_absolute_uri('/')
+        digest = hashlib.md5(
+            f'{origin}|{request.path}?{query}'.encode()
+        ).hexdigest()
+        version = self.get_version(model)
+        return f'api:response:{model._meta.label_lower}:{version}:{digest}'
+
+    def get(self, key):
+        """Данные ответа из кэша или None."""
+        data = self.cache.get(key)
+        if data is None:
+            self.stats.miss()
+        else:
+            self.stats.hit()
+        return data
+
+    def set(self, key, data):
+        """Сохранить данные ответа."""
+        self.cache.set(key, data, self.timeout)
+
+
+response_cache = ResponseCache()
+
+
+def bump_model_version(sender, **kwargs):
+    """Обработчик сигналов: сбросить кэш ответов по изменённой модели."""
+    response_cache.bump_version(sender)
+
+
+def bump_m2m_version(sender, instance, action, reverse, model, **kwargs):
+    """Обработчик m2m_changed: сбросить кэш по модели с полем связи."""
+    if action.startswith('post_'):
+        response_cache.bump_version(model if reverse else type(instance))
@@ -0,0 +1,247 @@
+"""Compiled read serializers for API."""
+from collections import OrderedDict
+from operator import attrgetter
+
+from django.conf import settings
+from django.core.exceptions import FieldDoesNotExist, ObjectDoesNotExist
+from django.db import models
+from django.utils.functional import cached_property
+from rest_framework import serializers
+from rest_framework.fields import SkipField
+from rest_framework.relations import PKOnlyObject
+
+from .timing import TimedSerializerMixin
+
+
+def choice_converter(field):
+    """Значение ChoiceField как в ChoiceField.to_representation."""
+    choices = field.choice_strings_to_values
+
+    def convert(value):
+        if value == '':
+            return value
+        return choices.get(str(value), value)
+    return convert
+
+
+def slug_converter(field):
+    """Слаг связанного объекта как в SlugRelatedField.to_representation."""
+    return attrgetter(field.slug_field)
+
+
+# to_representation полей DRF, которые сводятся к функции от значения
+# атрибута, и фабрики этих функций. Подклассы, переопределившие
+# to_representation, сюда не попадают и выводятся через DRF.
+CONVERTERS = {
+    serializers.CharField.to_representation: lambda field: str,
+    serializers.IntegerField.to_representation: lambda field: int,
+    serializers.FloatField.to_representation: lambda field: float,
+    serializers.ChoiceField.to_representation: choice_converter,
+    serializers.DateTimeField.to_representation: (
+        lambda field: field.to_representation
+    ),
+    serializers.SlugRelatedField.to_representation: slug_converter,
+}
+
+
+def model_field(serializer, field):
+    """Поле модели сериализатора, из которого читается поле, или None."""
+    meta = getattr(serializer, 'Meta', None)
+    if meta is None or len(field.source_attrs) != 1:
+        return None
+    try:
+        return meta.model._meta.get_field(field.source)
+    except FieldDoesNotExist:
+        return None
+
+
+def standard_representation(serializer_class):
+    """Не переопределён ли to_representation сериализатора.
+
+    Допускаются только миксины учёта времени и компиляции.
+    """
+    allowed = (
+        TimedSerializerMixin, CompiledSerializerMixin, serializers.Serializer
+    )
+    for klass in serializer_class.__mro__:
+        if klass is serializers.Serializer:
+            return True
+        if 'to_representation' in vars(klass) and klass not in allowed:
+            return False
+    return False
+
+
+def related_getter(name):
+    """Связанный объект по внешнему ключу, None если его нет."""
+    get = attrgetter(name)
+
+    def getter(instance):
+        try:
+            return get(instance)
+        except ObjectDoesNotExist:
+            return None
+    return getter
+
+
+def value_step(get, convert):
+    """Шаг: атрибут через get, None как есть, иначе convert."""
+    def step(instance, fields):
+        value = get(instance)
+        return None if value is None else convert(value)
+    return step
+
+
+def fallback_step(name):
+    """Шаг через поле DRF сериализатора, как в Serializer."""
+    def step(instance, fields):
+        field = fields[name]
+        attribute = field.get_attribute(instance)
+        if isinstance(attribute, PKOnlyObject):
+            if attribute.pk is None:
+                return None
+        elif attribute is None:
+            return None
+        return field.to_representation(attribute)
+    return step
+
+
+def nested_step(get, field):
+    """Шаг для вложенного сериализатора или списка сериализаторов."""
+    if isinstance(field, serializers.ListSerializer):
+        if type(field).to_representation is not (
+            serializers.ListSerializer.to_representation
+        ):
+            return None
+        child = compile_fields(field.child, nested=True)
+        if child is None:
+            return None
+
+        def step(instance, fields):
+            value = get(instance)
+            if value is None:
+                return None
+            if isinstance(value, models.Manager):
+                value = value.all()
+            return [child(item, None) for item in value]
+        return step
+    child = compile_fields(field, nested=True)
+    if child is None:
+        return None
+    return value_step(get, lambda value: child(value, None))
+
+
+def compile_step(serializer, field):
+    """Шаг вывода поля или None, если поле выводится через DRF."""
+    related = model_field(serializer, field)
+    if related is None:
+        return None
+    if related.many_to_many or related.many_to_one or related.one_to_one:
+        if related.auto_created and not related.concrete:
+            return None
+        get = related_getter(field.source)
+    elif related.concrete:
+        get = attrgetter(field.source)
+    else:
+        return None
+    if isinstance(field, serializers.BaseSerializer):
+        return nested_step(get, field)
+    if isinstance(field, serializers.PrimaryKeyRelatedField):
+        if (
+            related.many_to_many
+            or field.pk_field is not None
+            or type(field).to_representation is not (
+                serializers.PrimaryKeyRelatedField.to_representation
+            )
+        ):
+            return None
+        return value_step(attrgetter(related.attname), lambda value: value)
+    factory = CONVERTERS.get(type(field).to_representation)
+    if factory is None or related.many_to_many:
+        return None
+    return value_step(get, factory(field))
+
+
+def compile_fields(serializer, nested=False):
+    """Функция вывода экземпляра для полей сериализатора.
+
+    Функция принимает экземпляр и поля сериализатора, через которые
+    выводятся неподдерживаемые поля (их имена — в `fallback_fields`
+    функции). Вложенные сериализаторы компилируются, только если все
+    их поля поддерживаются (nested), иначе выводятся через DRF целиком.
+    None, если сериализатор переопределяет to_representation.
+    """
+    if not standard_representation(type(serializer)):
+        return None
+    steps, fallback_fields = [], []
+    for name, field in serializer.fields.items():
+        if field.write_only:
+            continue
+        step = compile_step(serializer, field)
+        if step is None:
+            if nested:
+                return None
+            step = fallback_step(name)
+            fallback_fields.append(name)
+        steps.append((name, step))
+
+    def represent(instance, fields):
+        ret = OrderedDict()
+        for name, step in steps:
+            try:
+                ret[name] = step(instance, fields)
+            except SkipField:
+                continue
+        return ret
+    represent.fallback_fields = tuple(fallback_fields)
+    return represent
+
+
+class CompiledSerializers:
+    """Скомпилированные функции вывода зарегистрированных сериализаторов.
+
+    Компилируются при запуске (см. ApiConfig.ready) по полям экземпляра
+    без контекста.
+    """
+
+    def __init__(self):
+        """Init method for CompiledSerializers."""
+        self.functions = {}
+
+    def register(self, *serializer_classes):
+        """Скомпилировать сериализаторы."""
+        for serializer_class in serializer_classes:
+            self.functions[serializer_class] = compile_fields(
+                serializer_class()
+            )
+
+    def get(self, serializer_class):
+        """Функция вывода сериализатора или None."""
+        return self.functions.get(serializer_class)
+
+
+compiled_serializers = CompiledSerializers()
+
+
+class CompiledSerializerMixin:
+    """to_representation скомпилированной функцией (API_COMPILED_SERIALIZERS).
+
+    С набором полей `?fields=` поля сериализатора отличаются
+    от скомпилированных, и вывод идёт через DRF.
+    """
+
+    @cached_property
+    def compiled_representation(self):
+        """Скомпилированная функция вывода или None."""
+        if (
+            not settings.API_COMPILED_SERIALIZERS
+            or self.context.get('fieldset') is not None
+        ):
+            return None
+        return compiled_serializers.get(type(self))
+
+    def to_representation(self, instance):
+        """To_representation method for CompiledSerializerMixin."""
+        represent = self.compiled_representation
+        if represent is None:
+            return super().to_representation(instance)
+        return represent(instance, self.fields)
@@ -0,0 +1,187 @@
+"""Concurrent ORM queries for API."""
+import threading
+from concurrent.futures import ThreadPoolExecutor, wait
+from contextvars import copy_context
+
+from django.conf import settings
+from django.core.exceptions import FieldDoesNotExist
+from django.db import close_old_connections
+from django.db.models.constants import LOOKUP_SEP
+from django.db.models.expressions import RawSQL
+from django.db.models.sql.where import ExtraWhere
+
+from .timing import instrument_connections
+
+# Ключ окружения запроса, которым ASGI-обработчик помечает свои запросы.
+ASGI_ENVIRON_KEY = 'api.asgi'
+
+
+class Pool:
+    """Ограниченный пул потоков, размер которого задан настройкой."""
+
+    def __init__(self, setting, default, prefix):
+        """Init method for Pool."""
+        self.setting = setting
+        self.default = default
+        self.prefix = prefix
+        self._lock = threading.Lock()
+        self._executor = None
+
+    @property
+    def executor(self):
+        """Пул потоков; создаётся при первом обращении."""
+        if self._executor is None:
+            with self._lock:
+                if self._executor is None:
+                    self._executor = ThreadPoolExecutor(
+                        getattr(settings, self.setting, self.default),
+                        thread_name_prefix=self.prefix,
+                    )
+        return self._executor
+
+    def shutdown(self):
+        """Остановить потоки пула."""
+        with self._lock:
+            executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown()
+
+
+# Потоки, в которых ASGI-обработчик выполняет представления.
+request_pool = Pool('API_ASGI_THREADS', 8, 'api-request')
+# Потоки для независимых запросов внутри одного представления.
+query_pool = Pool('API_ASGI_QUERY_THREADS', 8, 'api-query')
+
+
+def is_concurrent(request):
+    """Выполнять ли запросы к БД параллельно для этого запроса.
+
+    Параллельные запросы включаются только под ASGI-обработчиком:
+    в потоке WSGI-сервера они лишь заняли бы ещё потоки.
+    """
+    return bool(request.META.get(ASGI_ENVIRON_KEY))
+
+
+def run_job(func):
+    """Выполнить запрос к БД в потоке пула и закрыть соединения потока."""
+    try:
+        with instrument_connections():
+            return func()
+    finally:
+        close_old_connections()
+
+
+def gather(*funcs):
+    """Выполнить функции параллельно и вернуть их результаты по порядку.
+
+    Первая функция выполняется в текущем потоке, остальные в query_pool
+    с копией контекста, чтобы их SQL попал в замеры запроса. Функции
+    не должны зависеть друг от друга: каждая работает в своём
+    соединении с БД и в своей транзакции.
+    """
+    futures = [
+        query_pool.executor.submit(copy_context().run, run_job, func)
+        for func in funcs[1:]
+    ]
+    try:
+        first = funcs[0]()
+    finally:
+        wait(futures)
+    return [first] + [future.result() for future in futures]
+
+
+def uses_raw_sql(query):
+    """Есть ли в выборке SQL с именами таблиц (extra, RawSQL).
+
+    Такую выборку нельзя использовать как подзапрос: Django даёт
+    таблицам подзапроса другие псевдонимы.
+    """
+    return (
+        bool(query.extra or query.extra_tables or query.extra_order_by)
+        or any(isinstance(node, ExtraWhere) for node in query.where.children)
+        or any(
+            isinstance(annotation, RawSQL)
+            for annotation in query.annotations.values()
+        )
+    )
+
+
+def split_prefetches(queryset):
+    """Разделить prefetch_related на прямые ManyToMany-поля и остальное."""
+    fields, lookups = [], []
+    if uses_raw_sql(queryset.query):
+        return fields, list(queryset._prefetch_related_lookups)
+    for lookup in queryset._prefetch_related_lookups:
+        field = None
+        if isinstance(lookup, str) and LOOKUP_SEP not in lookup:
+            try:
+                field = queryset.model._meta.get_field(lookup)
+            except FieldDoesNotExist:
+                pass
+        if field is not None and field.many_to_many and field.concrete:
+            fields.append(field)
+        else:
+            lookups.append(lookup)
+    return fields, lookups
+
+
+def fetch_related(queryset, field):
+    """Связанные объекты ManyToMany-поля для строк выборки.
+
+    Строки задаются подзапросом по той же выборке (с тем же срезом),
+    поэтому запрос не ждёт выборки самих строк.
+    """
+    through = field.remote_field.through
+    source = field.m2m_field_name()
+    target = field.m2m_reverse_field_name()
+    ordering = [
+        f'-{target}__{name[1:]}' if name.startswith('-')
+        else f'{target}__{name}'
+        for name in field.related_model._meta.ordering
+    ]
+    links = through.objects.filter(**{
+        f'{source}__in': queryset.values('pk')
+    }).select_related(target).order_by(*ordering)
+    attname = through._meta.get_field(source).attname
+    related = {}
+    for link in links:
+        related.setdefault(getattr(link, attname), []).append(
+            getattr(link, target)
+        )
+    return related
+
+
+def attach_related(rows, field, related):
+    """Сохранить связанные объекты так, как это делает prefetch_related."""
+    for obj in rows:
+        objects = getattr(obj, field.name).get_queryset()
+        objects._result_cache = related.get(obj.pk, [])
+        objects._prefetch_done = True
+        if not hasattr(obj, '_prefetched_objects_cache'):
+            obj._prefetched_objects_cache = {}
+        obj._prefetched_objects_cache[field.name] = objects
+
+
+def fetch_concurrently(queryset, *funcs):
+    """Строки выборки и результаты funcs, запрошенные параллельно.
+
+    Прямые ManyToMany из prefetch_related выбираются отдельными
+    запросами одновременно со строками; остальные prefetch_related
+    выполняются как обычно после выборки строк.
+    """
+    fields, lookups = split_prefetches(queryset)
+    rows_queryset = queryset.prefetch_related(None).prefetch_related(
+        *lookups
+    )
+    results = gather(
+        lambda: list(rows_queryset),
+        *funcs,
+        *[
+            (lambda field=field: fetch_related(queryset, field))
+            for field in fields
+        ],
+    )
+    rows = results[0]
+    for field, related in zip(fields, results[len(funcs) + 1:]):
+        attach_related(rows, field, related)
+    return [rows] + results[1:len(funcs) + 1]
@@ -0,0 +1,158 @@
+"""Serializer fields for API."""
+import threading
+
+from django.conf import settings
+from django.db import router
+from rest_framework import serializers
+from rest_framework.relations import MANY_RELATION_KWARGS
+
+
+class SlugCache:
+    """Процессный кэш слаг → первичный ключ по моделям.
+
+    Хранит только найденные слаги и сбрасывается сигналами при
+    изменении модели (см. ApiConfig.ready). Поколение модели не даёт
+    записать в кэш результат запроса, начатого до сброса.
+    """
+
+    def __init__(self):
+        """Init method for SlugCache."""
+        self._lock = threading.Lock()
+        self._maps = {}
+        self._generations = {}
+
+    @property
+    def enabled(self):
+        """Включён ли кэш."""
+        return getattr(settings, 'API_SLUG_CACHE', False)
+
+    def generation(self, model):
+        """Поколение кэша модели."""
+        with self._lock:
+            return self._generations.get(model, 0)
+
+    def get(self, model, slug_field, slugs):
+        """Известные ключи слагов: {слаг: ключ}."""
+        with self._lock:
+            known = self._maps.get((model, slug_field), {})
+            return {slug: known[slug] for slug in slugs if slug in known}
+
+    def update(self, model, slug_field, generation, pairs):
+        """Запомнить ключи, если модель не менялась с `generation`."""
+        with self._lock:
+            if self._generations.get(model, 0) == generation:
+                self._maps.setdefault((model, slug_field), {}).update(pairs)
+
+    def invalidate(self, sender, **kwargs):
+        """Обработчик сигналов: сбросить кэш изменённой модели."""
+        with self._lock:
+            self._generations[sender] = self._generations.get(sender, 0) + 1
+            for key in [key for key in self._maps if key[0] is sender]:
+                del self._maps[key]
+
+    def clear(self):
+        """Сбросить кэш всех моделей."""
+        with self._lock:
+            self._maps.clear()
+
+
+slug_cache = SlugCache()
+
+
+class BatchSlugRelatedField(serializers.SlugRelatedField):
+    """SlugRelatedField, который ищет слаги пачкой.
+
+    Объекты берутся из карты в контексте сериализатора (`slug_map`:
+    модель → {слаг: объект}, её заранее загружают пакетные операции,
+    см. api.bulk), иначе — из кэша слагов (API_SLUG_CACHE) и одним
+    запросом `slug__in` по остальным слагам. С `many=True` все слаги
+    списка ищутся сразу, а неизвестные перечисляются в одной ошибке.
+    """
+
+    @classmethod
+    def many_init(cls, *args, **kwargs):
+        """Many_init method for BatchSlugRelatedField."""
+        list_kwargs = {'child_relation': cls(*args, **kwargs)}
+        for key in kwargs:
+            if key in MANY_RELATION_KWARGS:
+                list_kwargs[key] = kwargs[key]
+        return ManySlugRelatedField(**list_kwargs)
+
+    def from_cache(self, model, slug, pk):
+        """Объект по ключу из кэша; остальные поля загрузятся по запросу."""
+        return model.from_db(
+            router.db_for_read(model),
+            [model._meta.pk.attname, self.slug_field],
+            [pk, slug]
+        )
+
+    def resolve(self, slugs):
+        """Объекты по слагам: {слаг: объект}, без неизвестных слагов."""
+        queryset = self.get_queryset()
+        model = queryset.model
+        slugs = {str(slug) for slug in slugs}
+        preloaded = self.context.get('slug_map', {}).get(model)
+        if preloaded is not None:
+            return {
+                slug: preloaded[slug] for slug in slugs if slug in preloaded
+            }
+        cached = slug_cache.enabled and not queryset.query.has_filters()
+        found = {}
+        if cached:
+            found = {
+                slug: self.from_cache(model, slug, pk)
+                for slug, pk in slug_cache.get(
+                    model, self.slug_field, slugs
+                ).items()
+            }
+        missing = slugs - found.keys()
+        if missing:
+            generation = slug_cache.generation(model)
+            loaded = {
+                str(getattr(obj, self.slug_field)): obj
+                for obj in queryset.filter(
+                    **{f'{self.slug_field}__in': missing}
+                )
+            }
+            found.update(loaded)
+            if cached:
+                slug_cache.update(model, self.slug_field, generation, {
+                    slug: obj.pk for slug, obj in loaded.items()
+                })
+        return found
+
+    def to_internal_value(self, data):
+        """To_internal_value method for BatchSlugRelatedField."""
+        if not isinstance(data, (str, int)):
+            self.fail('invalid')
+        try:
+            return self.resolve([data])[str(data)]
+        except KeyError:
+            self.fail(
+                'does_not_exist', slug_name=self.slug_field, value=data
+            )
+
+
+class ManySlugRelatedField(serializers.ManyRelatedField):
+    """Список слагов BatchSlugRelatedField: один поиск на весь список."""
+
+    def to_internal_value(self, data):
+        """To_internal_value method for ManySlugRelatedField."""
+        if isinstance(data, str) or not hasattr(data, '__iter__'):
+            self.fail('not_a_list', input_type=type(data).__name__)
+        if not self.allow_empty and len(data) == 0:
+            self.fail('empty')
+        child = self.child_relation
+        if not all(isinstance(slug, (str, int)) for slug in data):
+            child.fail('invalid')
+        found = child.resolve(data)
+        unknown = dict.fromkeys(
+            slug for slug in map(str, data) if slug not in found
+        )
+        if unknown:
+            message = child.error_messages['does_not_exist']
+            raise serializers.ValidationError([
+                message.format(slug_name=child.slug_field, value=slug)
+                for slug in unknown
+            ])
+        return [found[str(slug)] for slug in data]
@@ -1,16 +1,58 @@
 """Filters for API."""
+from django.db.models import Q
 from django_filters import rest_framework as filters
+from rest_framework.filters import SearchFilter
 
 from reviews.models import Title
+from reviews.search import search_titles
+
+# Верхняя граница для поиска по префиксу через диапазон индекса.
+PREFIX_UPPER_BOUND = '\U0010ffff'
+
+
+def casefold_lookup(field_name, value):
+    """Условие по casefold-колонке: префикс, точное совпадение или вхождение.
+
+    Префикс ищется диапазоном `>= value AND < value + max`, а не через LIKE,
+    чтобы запрос шёл по индексу колонки.
+    """
+    if field_name.startswith('^'):
+        field_name = field_name[1:]
+        return Q(**{
+            f'{field_name}__gte': value,
+            f'{field_name}__lt': value + PREFIX_UPPER_BOUND,
+        })
+    if field_name.startswith('='):
+        return Q(**{field_name[1:]: value})
+    return Q(**{f'{field_name}__contains': value})
+
+
+class CasefoldSearchFilter(SearchFilter):
+    """SearchFilter по casefold-колонкам.
+
+    Поисковые слова приводятся к casefold, а поля в `search_fields`
+    должны быть CasefoldField с префиксами `^` (префикс) или `=` (точно).
+    """
+
+    def filter_queryset(self, request, queryset, view):
+        """Filter_queryset method for CasefoldSearchFilter."""
+        search_fields = self.get_search_fields(view, request)
+        search_terms = self.get_search_terms(request)
+        if not search_fields or not search_terms:
+            return queryset
+        for term in search_terms:
+            conditions = Q()
+            for field_name in search_fields:
+                conditions |= casefold_lookup(field_name, term.casefold())
+            queryset = queryset.filter(conditions)
+        return queryset
 
 
 class TitlesFilter(filters .FilterSet):
     """Titles filter."""
 
-    name = filters.CharFilter(
-        field_name='name',
-        lookup_expr='icontains'
-    )
+    q = filters.CharFilter(method='search')
+    name = filters.CharFilter(method='name_prefix')
     category = filters.CharFilter(
         field_name='category__slug',
         lookup_expr='icontains'
@@ -25,3 +67,13 @@ class TitlesFilter(filters .FilterSet):
 
         model = Title
         fields = ('name', 'year', 'genre', 'category')
+
+    def search(self, queryset, name, value):
+        """Полнотекстовый поиск по названию и описанию."""
+        return search_titles(queryset, value)
+
+    def name_prefix(self, queryset, name, value):
+        """Поиск по началу названия без учёта регистра."""
+        return queryset.filter(
+            casefold_lookup('^name_casefold', value.casefold())
+        )
@@ -0,0 +1,168 @@
+"""Benchmark of the title list projection."""
+import io
+import json
+import os
+import random
+import time
+
+from django.conf import settings
+from django.core.management import call_command
+from django.core.management.base import BaseCommand, CommandError
+from django.db import DEFAULT_DB_ALIAS, connections
+from django.test.utils import override_settings
+from rest_framework.test import APIRequestFactory
+
+from api.benchmark import environment, percentile, throwaway_database
+from api.pagination import CachedCountPagination
+from api.views import TitleViewSet
+from reviews.models import Genres, Title
+
+# Режимы замера: значение API_TITLE_LIST_PROJECTION.
+MODES = {'serializer': False, 'projection': True}
+
+
+class Command(BaseCommand):
+    """Замер процессорного времени списка произведений."""
+
+    help = (
+        'Seed a throwaway database and compare CPU time per request of '
+        'the title list with and without API_TITLE_LIST_PROJECTION'
+    )
+
+    def add_arguments(self, parser):
+        """Arguments for benchmark_title_list command."""
+        parser.add_argument(
+            '--titles', type=int, default=2000,
+            help='Number of seeded titles (see generate_data)',
+        )
+        parser.add_argument(
+            '--page-size', type=int, default=100,
+            help='Titles per page',
+        )
+        parser.add_argument(
+            '--requests', type=int, default=200,
+            help='Number of measured requests per mode',
+        )
+        parser.add_argument(
+            '--warmup', type=int, default=20,
+            help='Number of unmeasured requests per mode sent first',
+        )
+        parser.add_argument(
+            '--seed', type=int, default=1,
+            help='Random seed for the dataset and request mix',
+        )
+        parser.add_argument(
+            '--output',
+            default=os.path.join(
+                settings.BASE_DIR, 'benchmark_title_list.json'
+            ),
+            help='Path of the JSON report',
+        )
+
+    def seed(self, options):
+        """Заполнить базу и составить запросы к списку."""
+        call_command(
+            'generate_data', stdout=io.StringIO(), users=50,
+            titles=options['titles'], reviews=options['titles'],
+            comments=0, seed=options['seed'],
+        )
+        pages = max(-(-Title.objects.count() // options['page_size']), 1)
+        genres = list(Genres.objects.values_list('slug', flat=True))
+        rng = random.Random(options['seed'])
+        queries = []
+        for _ in range(options['warmup'] + options['requests']):
+            query = {'page': rng.randint(1, pages)}
+            if genres and rng.random() < 0.3:
+                query = {'genre': rng.choice(genres)}
+            queries.append(query)
+        return queries
+
+    def measure(self, view, query, enabled):
+        """Процессорное время запроса в секундах и тело ответа."""
+        request = APIRequestFactory().get('/api/v1/titles/', query)
+        with override_settings(API_TITLE_LIST_PROJECTION=enabled):
+            started = time.process_time()
+            response = view(request).render()
+            elapsed = time.process_time() - started
+        if response.status_code != 200:
+            raise CommandError(
+                f'GET /api/v1/titles/ {query}: {response.status_code}'
+            )
+        return elapsed, response.content
+
+    def run(self, options):
+        """Засеять базу и выполнить запросы в обоих режимах поочерёдно."""
+        self.stdout.write('Seeding database...')
+        queries = self.seed(options)
+        pagination = type('BenchmarkPagination', (CachedCountPagination,), {
+            'page_size': options['page_size'],
+        })
+        view = TitleViewSet.as_view(
+            {'get': 'list'}, pagination_class=pagination
+        )
+        samples = {mode: [] for mode in MODES}
+        for number, query in enumerate(queries):
+            contents = set()
+            for mode, enabled in MODES.items():
+                elapsed, content = self.measure(view, query, enabled)
+                contents.add(content)
+                if number >= options['warmup']:
+                    samples[mode].append(elapsed)
+            if len(contents) != 1:
+                raise CommandError(
+                    f'Responses differ for GET /api/v1/titles/ {query}'
+                )
+        return samples
+
+    def write_report(self, samples, options):
+        """Сохранить отчёт и вывести таблицу."""
+        report = {
+            'environment': environment(),
+            'titles': options['titles'],
+            'page_size': options['page_size'],
+            'modes': {},
+        }
+        for mode, values in samples.items():
+            values = sorted(values)
+            report['modes'][mode] = {
+                'requests': len(values),
+                'cpu_mean': sum(values) / len(values) * 1000,
+                'cpu_p50': percentile(values, 50) * 1000,
+                'cpu_p95': percentile(values, 95) * 1000,
+            }
+        base = report['modes']['serializer']['cpu_mean']
+        current = report['modes']['projection']['cpu_mean']
+        report['cpu_reduction'] = (base - current) / base * 100 if base else 0
+        with open(options['output'], 'w', encoding='utf8') as target:
+            json.dump(report, target, indent=2, sort_keys=True)
+        self.stdout.write(
+            f'{"mode":<12}{"requests":>9}{"mean ms":>9}'
+            f'{"p50 ms":>9}{"p95 ms":>9}'
+        )
+        for mode, summary in report['modes'].items():
+            self.stdout.write(
+                f'{mode:<12}{summary["requests"]:>9}'
+                f'{summary["cpu_mean"]:>9.2f}{summary["cpu_p50"]:>9.2f}'
+                f'{summary["cpu_p95"]:>9.2f}'
+            )
+        self.stdout.write(
+            f'CPU time per request: {-report["cpu_reduction"]:+.1f}%'
+        )
+        self.stdout.write(f'Report written to {options["output"]}')
+
+    def handle(self, *args, **options):
+        """Command body."""
+        sizes = (options['titles'], options['page_size'], options['requests'])
+        if min(sizes) < 1:
+            raise CommandError(
+                '--titles, --page-size and --requests must be positive'
+            )
+        connection = connections[DEFAULT_DB_ALIAS]
+        if connection.vendor != 'sqlite':
+            raise CommandError(
+                'benchmark_title_list seeds a throwaway SQLite database'
+            )
+        with override_settings(API_THROTTLE_RATES={}):
+            with throwaway_database(connection, 'benchmark.sqlite3'):
+                samples = self.run(options)
+        self.write_report(samples, options)
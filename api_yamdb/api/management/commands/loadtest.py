@@ -0,0 +1,420 @@
+"""HTTP load test for API."""
+import http.client
+import io
+import json
+import os
+import random
+import threading
+import time
+from contextlib import ExitStack
+from socketserver import ThreadingMixIn
+from wsgiref.simple_server import WSGIRequestHandler, WSGIServer
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.contrib.auth.hashers import make_password
+from django.contrib.auth.tokens import default_token_generator
+from django.core.management import call_command
+from django.core.management.base import BaseCommand, CommandError
+from django.db import DEFAULT_DB_ALIAS, connections
+from django.test.utils import override_settings
+from rest_framework_simplejwt.tokens import AccessToken
+
+from api.benchmark import (
+    compare, environment, summarize, throwaway_database,
+)
+from reviews.management.commands.generate_data import WORDS
+from reviews.models import Categories, Genres, Review, Title
+
+User = get_user_model()
+
+# Сценарии и их доля в нагрузке.
+SCENARIOS = {
+    'title_list': 30,
+    'title_detail': 20,
+    'review_list': 20,
+    'comment_list': 15,
+    'review_create': 10,
+    'comment_create': 10,
+    'token': 5,
+}
+# Сценарии записи: по ним считается число успешных записей в секунду.
+WRITE_SCENARIOS = ('review_create', 'comment_create')
+# Настройки, отключающие режим SQLite под нагрузкой (--no-sqlite-tuning).
+UNTUNED_SQLITE = {'API_SQLITE_PRAGMAS': {}, 'API_SQLITE_WRITE_QUEUE': False}
+# Параметры набора данных, передаваемые generate_data.
+DATASET_OPTIONS = ('users', 'titles', 'reviews', 'comments', 'seed')
+
+
+def sentence(rng, low, high):
+    """Случайный текст из русских слов."""
+    return ' '.join(
+        rng.choice(WORDS) for _ in range(rng.randint(low, high))
+    ).capitalize()
+
+
+class QueryCountingApp:
+    """WSGI-обёртка, сообщающая число SQL-запросов в заголовке ответа.
+
+    Django вызывает start_response после формирования ответа, поэтому
+    к этому моменту все запросы к базе уже выполнены.
+    """
+
+    header = 'X-Query-Count'
+
+    def __init__(self, application):
+        """Init method for QueryCountingApp."""
+        self.application = application
+
+    def __call__(self, environ, start_response):
+        """Выполнить запрос, считая запросы ко всем базам."""
+        count = 0
+
+        def counter(execute, sql, params, many, context):
+            nonlocal count
+            count += 1
+            return execute(sql, params, many, context)
+
+        def counted_start_response(status, headers, exc_info=None):
+            headers.append((self.header, str(count)))
+            return start_response(status, headers, exc_info)
+
+        with ExitStack() as stack:
+            for connection in connections.all():
+                stack.enter_context(connection.execute_wrapper(counter))
+            return self.application(environ, counted_start_response)
+
+
+class ThreadingWSGIServer(ThreadingMixIn, WSGIServer):
+    """WSGI-сервер с потоком на соединение."""
+
+    daemon_threads = True
+    request_queue_size = 128
+
+
+class QuietHandler(WSGIRequestHandler):
+    """Обработчик без журнала запросов."""
+
+    def log_message(self, *args):
+        """Не писать строку на каждый запрос."""
+
+
+class Command(BaseCommand):
+    """Нагрузочное тестирование API."""
+
+    help = (
+        'Seed a throwaway database, serve api_yamdb.wsgi locally and '
+        'report latency percentiles, RPS and queries per request'
+    )
+
+    def add_arguments(self, parser):
+        """Arguments for loadtest command."""
+        for name, default in (
+            ('users', 500), ('titles', 1000),
+            ('reviews', 20000), ('comments', 20000),
+        ):
+            parser.add_argument(
+                f'--{name}', type=int, default=default,
+                help=f'Number of seeded {name} (see generate_data)',
+            )
+        parser.add_argument(
+            '--workers', type=int, default=16,
+            help='Number of concurrent clients',
+        )
+        parser.add_argument(
+            '--requests', type=int, default=2000,
+            help='Total number of measured requests',
+        )
+        parser.add_argument(
+            '--warmup', type=int, default=100,
+            help='Number of unmeasured requests sent first',
+        )
+        parser.add_argument(
+            '--scenarios', nargs='+', choices=list(SCENARIOS),
+            default=list(SCENARIOS),
+            help='Run only these scenarios (weights are kept)',
+        )
+        parser.add_argument(
+            '--seed', type=int, default=1,
+            help='Random seed for the dataset and request mix',
+        )
+        parser.add_argument(
+            '--throttle', action='store_true',
+            help='Keep API_THROTTLE_RATES instead of disabling throttling',
+        )
+        parser.add_argument(
+            '--no-sqlite-tuning', action='store_true',
+            help='Disable API_SQLITE_PRAGMAS and the write queue '
+                 '(baseline for write throughput)',
+        )
+        parser.add_argument(
+            '--output',
+            default=os.path.join(settings.BASE_DIR, 'loadtest_report.json'),
+            help='Path of the JSON report',
+        )
+        parser.add_argument(
+            '--compare', metavar='REPORT',
+            help='Print changes against a previous JSON report',
+        )
+
+    def seed(self, options):
+        """Заполнить базу командой generate_data."""
+        call_command(
+            'generate_data', stdout=io.StringIO(), **{
+                name: options[name] for name in DATASET_OPTIONS
+            }
+        )
+        page_size = settings.REST_FRAMEWORK['PAGE_SIZE']
+        users = User.objects.order_by('pk')[:50]
+        # Авторы новых отзывов: у них ещё нет отзывов ни на одно
+        # произведение, поэтому пары (автор, произведение) не повторяются.
+        password = make_password(None)
+        User.objects.bulk_create(
+            User(
+                username=f'writer{number}',
+                email=f'writer{number}@yamdb.fake',
+                password=password,
+            )
+            for number in range(options['workers'])
+        )
+        writers = User.objects.filter(
+            username__startswith='writer'
+        ).order_by('pk')
+        title_ids = list(Title.objects.values_list('pk', flat=True))
+        return {
+            'titles': [
+                (title_id, max(-(-count // page_size), 1))
+                for title_id, count in Title.objects.values_list(
+                    'pk', 'review_count'
+                )
+            ],
+            'reviews': list(Review.objects.values_list('pk', 'title_id')),
+            'genres': list(Genres.objects.values_list('slug', flat=True)),
+            'categories': list(
+                Categories.objects.values_list('slug', flat=True)
+            ),
+            'writers': [
+                (f'Bearer {AccessToken.for_user(writer)}', iter(title_ids))
+                for writer in writers
+            ],
+            'codes': [
+                (user.username, default_token_generator.make_token(user))
+                for user in users
+            ],
+        }
+
+    def build_request(self, scenario, rng, data, worker):
+        """Метод, путь, тело и заголовки запроса сценария."""
+        title_id, pages = rng.choice(data['titles'])
+        if scenario == 'title_list':
+            query = rng.choice((
+                '', f'?genre={rng.choice(data["genres"])}',
+                f'?category={rng.choice(data["categories"])}',
+                f'?year={rng.randint(1900, 2020)}', '?page=2',
+            ))
+            return 'GET', f'/api/v1/titles/{query}', None, {}
+        if scenario == 'title_detail':
+            return 'GET', f'/api/v1/titles/{title_id}/', None, {}
+        if scenario == 'review_list':
+            page = rng.randint(1, pages)
+            return (
+                'GET', f'/api/v1/titles/{title_id}/reviews/?page={page}',
+                None, {}
+            )
+        if scenario == 'comment_list':
+            review_id, title_id = rng.choice(data['reviews'])
+            return (
+                'GET',
+                f'/api/v1/titles/{title_id}/reviews/{review_id}/comments/',
+                None, {}
+            )
+        if scenario == 'review_create':
+            token, titles = data['writers'][worker]
+            title_id = next(titles, title_id)
+            body = {'text': sentence(rng, 5, 40), 'score': rng.randint(1, 10)}
+            return (
+                'POST', f'/api/v1/titles/{title_id}/reviews/', body,
+                {'Authorization': token}
+            )
+        if scenario == 'comment_create':
+            token, _ = data['writers'][worker]
+            review_id, title_id = rng.choice(data['reviews'])
+            return (
+                'POST',
+                f'/api/v1/titles/{title_id}/reviews/{review_id}/comments/',
+                {'text': sentence(rng, 3, 20)}, {'Authorization': token}
+            )
+        username, code = rng.choice(data['codes'])
+        body = {'username': username, 'confirmation_code': code}
+        return 'POST', '/api/v1/auth/token/', body, {}
+
+    def send(self, port, method, path, body, headers):
+        """Выполнить запрос; вернуть латентность, успех и число запросов."""
+        headers = dict(headers)
+        if body is not None:
+            body = json.dumps(body)
+            headers['Content-Type'] = 'application/json'
+        connection = http.client.HTTPConnection('127.0.0.1', port)
+        started = time.perf_counter()
+        try:
+            connection.request(method, path, body, headers)
+            response = connection.getresponse()
+            response.read()
+        except OSError:
+            return time.perf_counter() - started, False, None
+        finally:
+            connection.close()
+        latency = time.perf_counter() - started
+        queries = response.getheader(QueryCountingApp.header)
+        return (
+            latency, response.status < 400,
+            int(queries) if queries is not None else None
+        )
+
+    def drive(self, port, data, options, total, samples):
+        """Отправить `total` запросов из нескольких потоков."""
+        scenarios = options['scenarios']
+        weights = [SCENARIOS[name] for name in scenarios]
+        remaining = [total]
+        lock = threading.Lock()
+
+        def worker(number):
+            rng = random.Random(f'{options["seed"]}:{number}:{total}')
+            while True:
+                with lock:
+                    if not remaining[0]:
+                        return
+                    remaining[0] -= 1
+                scenario = rng.choices(scenarios, weights)[0]
+                sample = self.send(
+                    port, *self.build_request(scenario, rng, data, number)
+                )
+                if samples is not None:
+                    with lock:
+                        samples[scenario].append(sample)
+
+        threads = [
+            threading.Thread(target=worker, args=(number,))
+            for number in range(options['workers'])
+        ]
+        started = time.perf_counter()
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        return time.perf_counter() - started
+
+    def run(self, options):
+        """Засеять базу, поднять сервер и собрать замеры."""
+        self.stdout.write('Seeding database...')
+        data = self.seed(options)
+        from api_yamdb.wsgi import application
+        server = ThreadingWSGIServer(('127.0.0.1', 0), QuietHandler)
+        server.set_app(QueryCountingApp(application))
+        port = server.server_address[1]
+        thread = threading.Thread(target=server.serve_forever, daemon=True)
+        thread.start()
+        try:
+            self.drive(port, data, options, options['warmup'], None)
+            samples = {name: [] for name in options['scenarios']}
+            self.stdout.write(
+                f'Sending {options["requests"]} requests from '
+                f'{options["workers"]} workers...'
+            )
+            elapsed = self.drive(
+                port, data, options, options['requests'], samples
+            )
+        finally:
+            server.shutdown()
+            server.server_close()
+        return samples, elapsed
+
+    def write_report(self, samples, elapsed, options):
+        """Сохранить отчёт и вывести таблицу."""
+        report = {
+            'environment': environment(),
+            'dataset': {
+                name: options[name] for name in DATASET_OPTIONS
+            },
+            'workers': options['workers'],
+            'sqlite_tuning': not options['no_sqlite_tuning'],
+            'elapsed': elapsed,
+            'writes_per_second': sum(
+                1 for name in WRITE_SCENARIOS
+                for _, ok, _ in samples.get(name, ()) if ok
+            ) / elapsed if elapsed else 0.0,
+            'overall': summarize(
+                [sample for group in samples.values() for sample in group],
+                elapsed
+            ),
+            'scenarios': {
+                name: summarize(group, elapsed)
+                for name, group in samples.items()
+            },
+        }
+        with open(options['output'], 'w', encoding='utf8') as target:
+            json.dump(report, target, indent=2, sort_keys=True)
+        rows = [('overall', report['overall'])]
+        rows += list(report['scenarios'].items())
+        self.stdout.write(
+            f'{"scenario":<15}{"requests":>9}{"errors":>7}{"rps":>9}'
+            f'{"p50 ms":>9}{"p95 ms":>9}{"p99 ms":>9}{"queries":>9}'
+        )
+        for name, summary in rows:
+            queries = summary['queries_per_request']
+            self.stdout.write(
+                f'{name:<15}{summary["requests"]:>9}{summary["errors"]:>7}'
+                f'{summary["rps"]:>9.1f}{summary["p50"]:>9.1f}'
+                f'{summary["p95"]:>9.1f}{summary["p99"]:>9.1f}'
+                f'{queries if queries is None else round(queries, 1):>9}'
+            )
+        self.stdout.write(
+            f'Successful writes per second: '
+            f'{report["writes_per_second"]:.1f}'
+        )
+        self.stdout.write(f'Report written to {options["output"]}')
+        return report
+
+    def print_comparison(self, path, report):
+        """Вывести изменения относительно предыдущего отчёта."""
+        with open(path, encoding='utf8') as source:
+            baseline = json.load(source)
+        self.stdout.write(
+            f'Compared with {baseline["environment"].get("commit")}:'
+        )
+        base_writes = baseline.get('writes_per_second')
+        if base_writes:
+            delta = (
+                (report['writes_per_second'] - base_writes) / base_writes * 100
+            )
+            self.stdout.write(f'  writes per second: {delta:+.1f}%')
+        for name, deltas in compare(baseline, report).items():
+            changes = ', '.join(
+                f'{metric} {delta:+.1f}%' for metric, delta in deltas.items()
+            )
+            self.stdout.write(f'  {name}: {changes}')
+
+    def run_on_test_db(self, connection, options):
+        """Выполнить тест на временной SQLite-базе."""
+        with throwaway_database(connection, 'loadtest.sqlite3'):
+            return self.run(options)
+
+    def handle(self, *args, **options):
+        """Command body."""
+        if options['workers'] < 1 or options['requests'] < 1:
+            raise CommandError('--workers and --requests must be positive')
+        if options['compare'] and not os.path.exists(options['compare']):
+            raise CommandError(f'File not found: {options["compare"]}')
+        connection = connections[DEFAULT_DB_ALIAS]
+        if connection.vendor != 'sqlite':
+            raise CommandError('loadtest seeds a throwaway SQLite database')
+        overrides = {}
+        if not options['throttle']:
+            overrides['API_THROTTLE_RATES'] = {}
+        if options['no_sqlite_tuning']:
+            overrides.update(UNTUNED_SQLITE)
+        with override_settings(**overrides):
+            samples, elapsed = self.run_on_test_db(connection, options)
+        report = self.write_report(samples, elapsed, options)
+        if options['compare']:
+            self.print_comparison(options['compare'], report)
@@ -0,0 +1,43 @@
+"""Replication stand-in for local SQLite replicas."""
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import DEFAULT_DB_ALIAS, connections
+
+from api.replicas import get_replicas, replicate
+
+
+class Command(BaseCommand):
+    """Копирование основной SQLite-базы в реплики."""
+
+    help = 'Copy the primary SQLite database into the replica databases'
+
+    def add_arguments(self, parser):
+        """Arguments for replicate command."""
+        parser.add_argument(
+            '--loop', action='store_true',
+            help='Keep copying instead of exiting after one pass',
+        )
+        parser.add_argument(
+            '--interval', type=float, default=1.0,
+            help='Seconds between copies in --loop mode (replication lag)',
+        )
+
+    def handle(self, *args, **options):
+        """Handle method for replicate command."""
+        replicas = get_replicas()
+        if not replicas:
+            raise CommandError('API_DATABASE_REPLICAS is empty')
+        for alias in (DEFAULT_DB_ALIAS, *replicas):
+            if connections[alias].vendor != 'sqlite':
+                raise CommandError(
+                    f'Database "{alias}" is not SQLite; use real replication'
+                )
+        while True:
+            replicate(targets=replicas)
+            self.stdout.write(
+                f'Copied {DEFAULT_DB_ALIAS} to {", ".join(replicas)}'
+            )
+            if not options['loop']:
+                return
+            time.sleep(options['interval'])
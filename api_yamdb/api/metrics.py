@@ -0,0 +1,316 @@
+"""Prometheus metrics for API."""
+import glob
+import mmap
+import os
+import struct
+import threading
+
+from django.conf import settings
+from django.db.models import Count
+
+# Границы корзин гистограммы времени запроса, секунды.
+DURATION_BUCKETS = (
+    0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0,
+)
+METRICS = {
+    'api_requests_total': (
+        'counter', 'Requests by route, method and status code.'
+    ),
+    'api_request_duration_seconds': (
+        'histogram', 'Request latency by route.'
+    ),
+    'api_db_queries_total': (
+        'counter', 'SQL queries by route.'
+    ),
+    'api_db_query_duration_seconds_total': (
+        'counter', 'Time spent in SQL queries by route.'
+    ),
+    'api_serialize_duration_seconds_total': (
+        'counter', 'Time spent in serializers by route.'
+    ),
+    'api_response_cache_requests_total': (
+        'counter', 'Cached list responses by result (hit or miss).'
+    ),
+    'api_response_cache_hit_ratio': (
+        'gauge', 'Share of cached list responses served from the cache.'
+    ),
+    'api_email_outbox_messages': (
+        'gauge', 'Emails in the outbox by status.'
+    ),
+}
+
+
+class MemoryStore:
+    """Счётчики в памяти процесса."""
+
+    def __init__(self):
+        """Init method for MemoryStore."""
+        self._lock = threading.Lock()
+        self._values = {}
+
+    def inc_many(self, increments):
+        """Увеличить несколько счётчиков под одной блокировкой."""
+        with self._lock:
+            for key, amount in increments:
+                self._values[key] = self._values.get(key, 0.0) + amount
+
+    def items(self):
+        """Пары (образец, значение)."""
+        with self._lock:
+            return list(self._values.items())
+
+
+class MmapStore:
+    """Счётчики процесса в отображённом в память файле.
+
+    Каждый процесс пишет только в свой файл, поэтому блокировки между
+    процессами не нужны; при сборе метрик файлы всех процессов
+    читаются и суммируются. Формат: в заголовке занятый размер (uint32),
+    затем записи «длина ключа, ключ с выравниванием до 8 байт, double».
+    """
+
+    HEADER = 8
+    INITIAL_SIZE = 64 * 1024
+
+    def __init__(self, path):
+        """Init method for MmapStore."""
+        self._lock = threading.Lock()
+        self._file = open(path, 'a+b')
+        if os.fstat(self._file.fileno()).st_size < self.INITIAL_SIZE:
+            self._file.truncate(self.INITIAL_SIZE)
+        self._map = mmap.mmap(self._file.fileno(), 0)
+        self._used = struct.unpack_from('<I', self._map, 0)[0]
+        self._positions = {}
+        if not self._used:
+            self._used = self.HEADER
+            struct.pack_into('<I', self._map, 0, self._used)
+        for key, _, position in read_entries(self._map, self._used):
+            self._positions[key] = position
+
+    def append(self, key):
+        """Добавить запись для нового ключа; вернуть смещение значения."""
+        encoded = key.encode()
+        padding = b' ' * (-(len(encoded) + 4) % 8)
+        entry = (
+            struct.pack('<I', len(encoded)) + encoded + padding
+            + struct.pack('<d', 0.0)
+        )
+        if self._used + len(entry) > len(self._map):
+            size = max(len(self._map) * 2, self._used + len(entry))
+            self._map.close()
+            self._file.truncate(size)
+            self._map = mmap.mmap(self._file.fileno(), 0)
+        self._map[self._used:self._used + len(entry)] = entry
+        position = self._used + len(entry) - 8
+        # Размер обновляется после записи: читатели не увидят
+        # частично записанную запись.
+        self._used += len(entry)
+        struct.pack_into('<I', self._map, 0, self._used)
+        self._positions[key] = position
+        return position
+
+    def inc_many(self, increments):
+        """Увеличить несколько счётчиков под одной блокировкой."""
+        with self._lock:
+            for key, amount in increments:
+                position = self._positions.get(key)
+                if position is None:
+                    position = self.append(key)
+                value = struct.unpack_from('<d', self._map, position)[0]
+                struct.pack_into('<d', self._map, position, value + amount)
+
+    def items(self):
+        """Пары (образец, значение) этого процесса."""
+        with self._lock:
+            return [
+                (key, value) for key, value, _ in
+                read_entries(self._map, self._used)
+            ]
+
+
+def read_entries(data, used):
+    """Записи файла счётчиков: ключ, значение и смещение значения."""
+    position = MmapStore.HEADER
+    while position < used:
+        length = struct.unpack_from('<I', data, position)[0]
+        key = bytes(data[position + 4:position + 4 + length]).decode()
+        position += 4 + length + (-(length + 4) % 8)
+        yield key, struct.unpack_from('<d', data, position)[0], position
+        position += 8
+
+
+def read_file(path):
+    """Записи файла счётчиков другого процесса."""
+    with open(path, 'rb') as source:
+        data = source.read()
+    if len(data) < MmapStore.HEADER:
+        return []
+    used = struct.unpack_from('<I', data, 0)[0]
+    return [(key, value) for key, value, _ in read_entries(data, used)]
+
+
+def escape(value):
+    """Экранировать значение метки."""
+    return (
+        str(value).replace('\\', r'\\').replace('\n', r'\n')
+        .replace('"', r'\"')
+    )
+
+
+def sample(name, **labels):
+    """Ключ образца в формате Prometheus: `name{label="value"}`."""
+    if not labels:
+        return name
+    pairs = ','.join(
+        f'{label}="{escape(value)}"' for label, value in labels.items()
+    )
+    return f'{name}{{{pairs}}}'
+
+
+class RequestMetrics:
+    """Метрики запросов, общие для процессов через файлы.
+
+    Если настройка API_METRICS_DIR задана, каждый процесс пишет
+    в собственный файл в этом каталоге (файл открывается заново после
+    fork), иначе счётчики хранятся в памяти процесса.
+    """
+
+    def __init__(self):
+        """Init method for RequestMetrics."""
+        self._lock = threading.Lock()
+        self._store = None
+        self._owner = None
+
+    @property
+    def directory(self):
+        """Каталог файлов счётчиков или None."""
+        return getattr(settings, 'API_METRICS_DIR', None)
+
+    @property
+    def store(self):
+        """Хранилище счётчиков текущего процесса."""
+        owner = (os.getpid(), self.directory)
+        if self._owner != owner:
+            with self._lock:
+                if self._owner != owner:
+                    pid, directory = owner
+                    if directory is None:
+                        self._store = MemoryStore()
+                    else:
+                        self._store = MmapStore(
+                            os.path.join(directory, f'api_{pid}.db')
+                        )
+                    self._owner = owner
+        return self._store
+
+    def observe(self, route, method, response, timing, total):
+        """Учесть завершённый запрос."""
+        increments = [
+            (sample(
+                'api_requests_total', route=route, method=method,
+                status=response.status_code
+            ), 1),
+            (sample('api_request_duration_seconds_sum', route=route), total),
+            (sample('api_request_duration_seconds_count', route=route), 1),
+            (sample('api_db_queries_total', route=route), timing.queries),
+            (sample(
+                'api_db_query_duration_seconds_total', route=route
+            ), timing.sql),
+            (sample(
+                'api_serialize_duration_seconds_total', route=route
+            ), timing.serialize),
+        ]
+        increments += [
+            (sample(
+                'api_request_duration_seconds_bucket', route=route, le=bound
+            ), 1)
+            for bound in DURATION_BUCKETS if total <= bound
+        ]
+        increments.append((sample(
+            'api_request_duration_seconds_bucket', route=route, le='+Inf'
+        ), 1))
+        cache = response.get('X-Cache')
+        if cache is not None:
+            increments.append((sample(
+                'api_response_cache_requests_total', result=cache.lower()
+            ), 1))
+        self.store.inc_many(increments)
+
+    def collect(self):
+        """Сумма счётчиков всех процессов."""
+        directory = self.directory
+        if directory is None:
+            entries = [self.store.items()]
+        else:
+            entries = [
+                read_file(path)
+                for path in glob.glob(os.path.join(directory, 'api_*.db'))
+            ]
+        totals = {}
+        for items in entries:
+            for key, value in items:
+                totals[key] = totals.get(key, 0.0) + value
+        return totals
+
+
+request_metrics = RequestMetrics()
+
+
+def outbox_samples():
+    """Число писем в очереди по статусам."""
+    from users.models import OutboxEmail
+    counts = dict.fromkeys(
+        (OutboxEmail.PENDING, OutboxEmail.SENDING, OutboxEmail.SENT,
+         OutboxEmail.DEAD), 0
+    )
+    counts.update(
+        OutboxEmail.objects.order_by().values_list('status').annotate(
+            total=Count('id')
+        )
+    )
+    return {
+        sample('api_email_outbox_messages', status=status): total
+        for status, total in counts.items()
+    }
+
+
+def family(key):
+    """Имя метрики, к которой относится образец."""
+    name = key.split('{', 1)[0]
+    for suffix in ('_bucket', '_sum', '_count'):
+        if name.endswith(suffix) and name[:-len(suffix)] in METRICS:
+            return name[:-len(suffix)]
+    return name
+
+
+def sample_order(key):
+    """Порядок образцов: корзины гистограммы по возрастанию границы."""
+    head, _, bound = key.partition(',le="')
+    if not bound:
+        return key, 0.0
+    return head, float(bound.rstrip('"}'))
+
+
+def render():
+    """Метрики в текстовом формате Prometheus."""
+    values = request_metrics.collect()
+    hits = values.get(
+        sample('api_response_cache_requests_total', result='hit'), 0
+    )
+    misses = values.get(
+        sample('api_response_cache_requests_total', result='miss'), 0
+    )
+    values['api_response_cache_hit_ratio'] = (
+        hits / (hits + misses) if hits + misses else 0.0
+    )
+    values.update(outbox_samples())
+    families = {}
+    for key in sorted(values, key=sample_order):
+        families.setdefault(family(key), []).append(key)
+    lines = []
+    for name, (kind, help_text) in METRICS.items():
+        lines.append(f'# HELP {name} {help_text}')
+        lines.append(f'# TYPE {name} {kind}')
+        for key in families.get(name, ()):
+            lines.append(f'{key} {values[key]!r}')
+    return '\n'.join(lines) + '\n'
@@ -1,8 +1,278 @@
 """Mixins for api_yamdb."""
-from rest_framework import mixins, viewsets
+import hashlib
+from calendar import timegm
+
+from django.conf import settings
+from django.core.exceptions import ValidationError
+from django.http import Http404
+from django.utils.http import (
+    http_date, parse_etags, parse_http_date_safe, quote_etag
+)
+from rest_framework import mixins, status, viewsets
+from rest_framework.permissions import SAFE_METHODS
+from rest_framework.response import Response
+
+from .cache import response_cache
+from .concurrency import fetch_concurrently, is_concurrent
+from .replicas import reads_from_primary
+from .sparse import Fieldset, narrow_queryset
+from .sqlite import write_queue
+
+
+class CachedListMixin:
+    """Кэширование ответа list с учётом версии модели.
+
+    Версия увеличивается сигналами при создании и удалении объектов
+    (см. ApiConfig.ready). Ответы, прочитанные с реплики, не кэшируются.
+    """
+
+    def list(self, request, *args, **kwargs):
+        """List method for CachedListMixin."""
+        model = self.get_queryset().model
+        key = response_cache.make_key(model, request)
+        data = response_cache.get(key)
+        if data is not None:
+            response = Response(data)
+            response['X-Cache'] = 'HIT'
+            return response
+        response = super().list(request, *args, **kwargs)
+        if (
+            response.status_code == status.HTTP_200_OK
+            and reads_from_primary()
+        ):
+            response_cache.set(key, response.data)
+        response['X-Cache'] = 'MISS'
+        return response
+
+
+class ConditionalGetMixin:
+    """Слабые ETag и Last-Modified для retrieve и list.
+
+    Метка изменения берётся из поля `updated_at` объекта или из
+    `get_collection_changed_at()` для списка. При условном запросе метка
+    читается до выборки и сериализации данных, и совпавший
+    `If-None-Match` или `If-Modified-Since` сразу возвращает 304.
+    """
+
+    changed_at = None
+
+    def get_object(self):
+        """Get_object method for ConditionalGetMixin."""
+        obj = super().get_object()
+        self.changed_at = getattr(obj, 'updated_at', None)
+        return obj
+
+    def get_object_changed_at(self):
+        """Дата изменения запрошенного объекта без его выборки."""
+        lookup_url_kwarg = self.lookup_url_kwarg or self.lookup_field
+        return self.get_queryset().filter(**{
+            self.lookup_field: self.kwargs[lookup_url_kwarg]
+        }).values_list('updated_at', flat=True).first()
+
+    def get_collection_changed_at(self):
+        """Дата изменения списка или None, если список не поддерживается."""
+        return None
+
+    def is_conditional(self, request):
+        """Есть ли в запросе условные заголовки."""
+        return (
+            'HTTP_IF_NONE_MATCH' in request.META
+            or 'HTTP_IF_MODIFIED_SINCE' in request.META
+        )
+
+    def get_validators(self, request, changed_at):
+        """ETag и время изменения в секундах для метки."""
+        etag = 'W/' + quote_etag(hashlib.md5(
+            f'{request.get_full_path()}|{changed_at.isoformat()}'.encode()
+        ).hexdigest())
+        return etag, timegm(changed_at.utctimetuple())
+
+    def is_not_modified(self, request, etag, last_modified):
+        """Совпадают ли условные заголовки с текущей версией."""
+        if_none_match = request.META.get('HTTP_IF_NONE_MATCH')
+        if if_none_match is not None:
+            etags = parse_etags(if_none_match)
+            return '*' in etags or any(
+                tag.replace('W/', '', 1) == etag.replace('W/', '', 1)
+                for tag in etags
+            )
+        if_modified_since = parse_http_date_safe(
+            request.META.get('HTTP_IF_MODIFIED_SINCE', '')
+        )
+        return (
+            if_modified_since is not None
+            and last_modified <= if_modified_since
+        )
+
+    def conditional_response(self, request, changed_at, handler):
+        """Вернуть 304 по условным заголовкам или ответ handler."""
+        if changed_at is not None and self.is_conditional(request):
+            etag, last_modified = self.get_validators(request, changed_at)
+            if self.is_not_modified(request, etag, last_modified):
+                response = Response(status=status.HTTP_304_NOT_MODIFIED)
+                response['ETag'] = etag
+                response['Last-Modified'] = http_date(last_modified)
+                return response
+        response = handler()
+        changed_at = changed_at or self.changed_at
+        if response.status_code == status.HTTP_200_OK and changed_at:
+            etag, last_modified = self.get_validators(request, changed_at)
+            response['ETag'] = etag
+            response['Last-Modified'] = http_date(last_modified)
+        return response
+
+    def retrieve(self, request, *args, **kwargs):
+        """Retrieve method for ConditionalGetMixin."""
+        changed_at = None
+        if self.is_conditional(request):
+            changed_at = self.get_object_changed_at()
+        return self.conditional_response(
+            request, changed_at,
+            lambda: super(ConditionalGetMixin, self).retrieve(
+                request, *args, **kwargs
+            )
+        )
+
+    def list(self, request, *args, **kwargs):
+        """List method for ConditionalGetMixin."""
+        return self.conditional_response(
+            request, self.get_collection_changed_at(),
+            lambda: super(ConditionalGetMixin, self).list(
+                request, *args, **kwargs
+            )
+        )
+
+
+class ConcurrentRetrieveMixin:
+    """Выборка объекта и его prefetch_related параллельно под ASGI."""
+
+    def get_object(self):
+        """Get_object method for ConcurrentRetrieveMixin."""
+        if not is_concurrent(self.request):
+            return super().get_object()
+        queryset = self.filter_queryset(self.get_queryset())
+        lookup_url_kwarg = self.lookup_url_kwarg or self.lookup_field
+        try:
+            queryset = queryset.filter(**{
+                self.lookup_field: self.kwargs[lookup_url_kwarg]
+            })
+        except (TypeError, ValueError, ValidationError):
+            raise Http404
+        rows, = fetch_concurrently(queryset)
+        if not rows:
+            raise Http404
+        obj = rows[0]
+        self.check_object_permissions(self.request, obj)
+        return obj
+
+
+class SparseFieldsMixin:
+    """Поля ответа по `?fields=` и `?expand=` для безопасных запросов.
+
+    Набор полей передаётся сериализатору в контексте (см.
+    api.sparse.SparseFieldsSerializerMixin), а выборка читает только
+    нужные ему колонки и связи.
+    """
+
+    def get_fieldset(self):
+        """Набор полей запроса или None."""
+        if not hasattr(self, '_fieldset'):
+            self._fieldset = None
+            if self.request.method in SAFE_METHODS:
+                serializer = self.get_serializer_class()(
+                    context=super().get_serializer_context()
+                )
+                self._fieldset = Fieldset.from_request(
+                    self.request, serializer
+                )
+        return self._fieldset
+
+    def get_serializer_context(self):
+        """Get_serializer_context method for SparseFieldsMixin."""
+        context = super().get_serializer_context()
+        context['fieldset'] = self.get_fieldset()
+        return context
+
+    def filter_queryset(self, queryset):
+        """Filter_queryset method for SparseFieldsMixin."""
+        queryset = super().filter_queryset(queryset)
+        if self.get_fieldset() is None:
+            return queryset
+        return narrow_queryset(queryset, self.get_serializer())
+
+
+class ProjectedListMixin:
+    """Список через проекцию без сериализатора, если она включена.
+
+    `projection` — объект с `supported`, `queryset()` и `render()`
+    (см. api.projections), `projection_setting` — настройка, которая
+    его включает. С `?fields=` список выводится сериализатором.
+    """
+
+    projection = None
+    projection_setting = None
+
+    def get_projection(self):
+        """Проекция для этого запроса или None."""
+        if (
+            self.projection is None
+            or not getattr(settings, self.projection_setting, False)
+            or not self.projection.supported
+        ):
+            return None
+        if getattr(self, 'get_fieldset', lambda: None)() is not None:
+            return None
+        return self.projection
+
+    def list(self, request, *args, **kwargs):
+        """List method for ProjectedListMixin."""
+        projection = self.get_projection()
+        if projection is None:
+            return super().list(request, *args, **kwargs)
+        queryset = projection.queryset(
+            self.filter_queryset(self.get_queryset())
+        )
+        page = self.paginate_queryset(queryset)
+        if page is not None:
+            return self.get_paginated_response(projection.render(page))
+        return Response(projection.render(list(queryset)))
+
+
+def queued_save(serializer, **kwargs):
+    """Сохранение сериализатора, которое очередь может повторить.
+
+    После отката пачки (см. WriteQueue.commit) экземпляр уже изменён
+    первой попыткой, в том числе отметками сигналов (`_loaded_*`),
+    поэтому перед каждой попыткой восстанавливается исходное состояние.
+    """
+    instance = serializer.instance
+    state = None if instance is None else vars(instance).copy()
+
+    def save():
+        if state is not None:
+            vars(instance).clear()
+            vars(instance).update(state)
+        serializer.instance = instance
+        return serializer.save(**kwargs)
+    return save
+
+
+class QueuedWriteMixin:
+    """Сохранение объектов через очередь записей SQLite."""
+
+    def perform_create(self, serializer):
+        """Perform_create method for QueuedWriteMixin."""
+        write_queue.run(queued_save(serializer))
+
+    def perform_update(self, serializer):
+        """Perform_update method for QueuedWriteMixin."""
+        write_queue.run(queued_save(serializer))
 
 
 class CreateListDestroyViewSet(
+    CachedListMixin,
+    SparseFieldsMixin,
+    QueuedWriteMixin,
     mixins.CreateModelMixin,
     mixins.ListModelMixin,
     mixins.DestroyModelMixin,
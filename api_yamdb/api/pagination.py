@@ -0,0 +1,397 @@
+"""Pagination for API."""
+import hashlib
+from base64 import b64decode, b64encode
+from collections import OrderedDict
+from functools import partial
+
+from django.conf import settings
+from django.core.paginator import InvalidPage, Page, Paginator
+from django.db import DEFAULT_DB_ALIAS, DatabaseError, connections
+from django.db.models import Q
+from django.utils.dateparse import parse_datetime
+from django.utils.functional import cached_property
+from django.utils.translation import gettext
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import BasePagination, PageNumberPagination
+from rest_framework.response import Response
+from rest_framework.utils.urls import remove_query_param, replace_query_param
+
+from .cache import response_cache
+from .concurrency import fetch_concurrently, is_concurrent
+
+# Значения параметра `count`, отключающие подсчёт объектов.
+FALSE_VALUES = ('0', 'false', 'no')
+
+# Режимы подсчёта объектов страницы.
+EXACT, ESTIMATED, NO_COUNT = 'exact', 'estimated', 'none'
+
+
+class KeysetPagination(BasePagination):
+    """Курсорная пагинация по ключу (pub_date, id).
+
+    Следующая страница выбирается условием на последний ключ предыдущей,
+    поэтому глубокие страницы стоят столько же, сколько первая,
+    а запрос `COUNT(*)` не выполняется.
+    """
+
+    cursor_query_param = 'cursor'
+    ordering = ('pub_date', 'id')
+    invalid_cursor_message = 'Неверный курсор.'
+
+    def __init__(self, page_size):
+        """Init method for KeysetPagination."""
+        self.page_size = page_size
+
+    def encode_cursor(self, obj, reverse):
+        """Закодировать ключ объекта в курсор."""
+        key_field, id_field = self.ordering
+        raw = '{}|{}|{}'.format(
+            int(reverse),
+            getattr(obj, key_field).isoformat(),
+            getattr(obj, id_field),
+        )
+        return b64encode(raw.encode()).decode()
+
+    def decode_cursor(self, request):
+        """Раскодировать курсор из параметров запроса."""
+        encoded = request.query_params.get(self.cursor_query_param)
+        if not encoded:
+            return False, None, None
+        try:
+            reverse, key, pk = b64decode(encoded).decode().split('|')
+            key = parse_datetime(key)
+            pk = int(pk)
+        except (TypeError, ValueError, UnicodeDecodeError):
+            raise NotFound(self.invalid_cursor_message)
+        if key is None:
+            raise NotFound(self.invalid_cursor_message)
+        return reverse == '1', key, pk
+
+    def paginate_queryset(self, queryset, request, view=None):
+        """Paginate_queryset method for KeysetPagination."""
+        self.request = request
+        key_field, id_field = self.ordering
+        reverse, key, pk = self.decode_cursor(request)
+        if key is not None:
+            lookup = 'lt' if reverse else 'gt'
+            queryset = queryset.filter(
+                Q(**{f'{key_field}__{lookup}': key})
+                | Q(**{key_field: key, f'{id_field}__{lookup}': pk})
+            )
+        if reverse:
+            queryset = queryset.order_by(f'-{key_field}', f'-{id_field}')
+        else:
+            queryset = queryset.order_by(key_field, id_field)
+
+        results = list(queryset[:self.page_size + 1])
+        has_more = len(results) > self.page_size
+        results = results[:self.page_size]
+        if reverse:
+            results.reverse()
+            self.has_next, self.has_previous = key is not None, has_more
+        else:
+            self.has_next, self.has_previous = has_more, key is not None
+        self.page = results
+        return results
+
+    def get_link(self, obj, reverse):
+        """Ссылка на соседнюю страницу относительно объекта."""
+        url = self.request.build_absolute_uri()
+        return replace_query_param(
+            url, self.cursor_query_param, self.encode_cursor(obj, reverse)
+        )
+
+    def get_next_link(self):
+        """Get_next_link method for KeysetPagination."""
+        if not self.has_next:
+            return None
+        if not self.page:
+            return remove_query_param(
+                self.request.build_absolute_uri(), self.cursor_query_param
+            )
+        return self.get_link(self.page[-1], reverse=False)
+
+    def get_previous_link(self):
+        """Get_previous_link method for KeysetPagination."""
+        if not self.has_previous:
+            return None
+        if not self.page:
+            return None
+        return self.get_link(self.page[0], reverse=True)
+
+    def get_paginated_response(self, data):
+        """Get_paginated_response method for KeysetPagination."""
+        return Response(OrderedDict([
+            ('next', self.get_next_link()),
+            ('previous', self.get_previous_link()),
+            ('results', data),
+        ]))
+
+
+def count_key(queryset):
+    """Ключ числа объектов выборки: модель, её версия и SQL запроса."""
+    sql, params = queryset.query.sql_with_params()
+    digest = hashlib.md5(
+        f'{queryset.db}:{sql}:{params!r}'.encode()
+    ).hexdigest()
+    model = queryset.model
+    version = response_cache.get_version(model)
+    return f'api:count:{model._meta.label_lower}:{version}:{digest}'
+
+
+def table_estimate(connection, table):
+    """Оценка числа строк таблицы по статистике планировщика или None.
+
+    SQLite хранит её в sqlite_stat1 после ANALYZE, PostgreSQL —
+    в pg_class.reltuples.
+    """
+    if connection.vendor == 'sqlite':
+        sql = 'SELECT stat FROM sqlite_stat1 WHERE tbl = %s'
+    elif connection.vendor == 'postgresql':
+        sql = 'SELECT reltuples FROM pg_class WHERE relname = %s'
+    else:
+        return None
+    try:
+        with connection.cursor() as cursor:
+            cursor.execute(sql, [table])
+            rows = cursor.fetchall()
+    except DatabaseError:
+        return None
+    estimates = [int(str(stat).split()[0]) for stat, in rows]
+    return max(estimates) if estimates else None
+
+
+def estimate_rows(queryset):
+    """Оценка числа строк таблицы выборки, закэшированная как число."""
+    model = queryset.model
+    key = f'api:estimate:{queryset.db}:{model._meta.db_table}'
+    cache = response_cache.cache
+    estimate = cache.get(key)
+    if estimate is None:
+        estimate = table_estimate(
+            connections[queryset.db], model._meta.db_table
+        )
+        cache.set(
+            key, -1 if estimate is None else estimate,
+            getattr(settings, 'API_COUNT_CACHE_TIMEOUT', 60)
+        )
+    return None if estimate is None or estimate < 0 else estimate
+
+
+class CountedPaginator(Paginator):
+    """Paginator, который получает число объектов от пагинации."""
+
+    def __init__(self, object_list, per_page, get_count, **kwargs):
+        """Init method for CountedPaginator."""
+        super().__init__(object_list, per_page, **kwargs)
+        self.get_count = get_count
+
+    @cached_property
+    def count(self):
+        """Число объектов выборки."""
+        return self.get_count(self.object_list)
+
+
+class ProbePage(Page):
+    """Страница без числа объектов.
+
+    Следующая страница есть, если выборка вернула на строку больше
+    размера страницы.
+    """
+
+    def __init__(self, object_list, number, paginator, has_next):
+        """Init method for ProbePage."""
+        super().__init__(object_list, number, paginator)
+        self._has_next = has_next
+
+    def has_next(self):
+        """Has_next method for ProbePage."""
+        return self._has_next
+
+    def next_page_number(self):
+        """Next_page_number method for ProbePage."""
+        return self.number + 1
+
+    def previous_page_number(self):
+        """Previous_page_number method for ProbePage."""
+        return self.number - 1
+
+
+class ConcurrentPageNumberPagination(PageNumberPagination):
+    """Постраничная пагинация с параллельными запросами под ASGI.
+
+    Строки страницы, `COUNT(*)` и prefetch_related запрашиваются
+    одновременно, а номер страницы проверяется по числу объектов уже
+    после выборки. Ответы совпадают с PageNumberPagination.
+    """
+
+    def django_paginator_class(self, object_list, per_page):
+        """Paginator с числом объектов из get_count."""
+        return CountedPaginator(object_list, per_page, self.get_count)
+
+    def get_count(self, queryset):
+        """Число объектов выборки."""
+        return queryset.count()
+
+    def paginate_queryset(self, queryset, request, view=None):
+        """Paginate_queryset method for ConcurrentPageNumberPagination."""
+        page_number = request.query_params.get(self.page_query_param, 1)
+        if not is_concurrent(request) or page_number in self.last_page_strings:
+            return super().paginate_queryset(queryset, request, view)
+        page_size = self.get_page_size(request)
+        if not page_size:
+            return None
+        paginator = self.django_paginator_class(queryset, page_size)
+        try:
+            number = int(page_number)
+        except (TypeError, ValueError):
+            number = page_number
+        try:
+            if not isinstance(number, int) or number < 1:
+                # Неверный номер: исключение без запроса к БД.
+                paginator.validate_number(number)
+            offset = (number - 1) * page_size
+            rows, paginator.count = fetch_concurrently(
+                queryset[offset:offset + page_size],
+                partial(self.get_count, queryset)
+            )
+            paginator.validate_number(number)
+        except InvalidPage as exc:
+            raise NotFound(self.invalid_page_message.format(
+                page_number=page_number, message=str(exc)
+            ))
+        self.page = Page(rows, number, paginator)
+        if paginator.num_pages > 1 and self.template is not None:
+            self.display_page_controls = True
+        self.request = request
+        return rows
+
+
+class CachedCountPagination(ConcurrentPageNumberPagination):
+    """Постраничная пагинация без лишних `COUNT(*)`.
+
+    Точное число объектов берётся из счётчика представления
+    (`get_collection_count`) или из кэша по SQL выборки на
+    API_COUNT_CACHE_TIMEOUT секунд; кэш сбрасывается с версией модели,
+    а числа, посчитанные на реплике, не кэшируются.
+    Если оценка размера таблицы не меньше API_COUNT_ESTIMATE_THRESHOLD,
+    `COUNT(*)` не выполняется: для выборки без условий отдаётся оценка
+    (`count_estimated`), для выборки с условиями `count` не отдаётся,
+    а следующая страница определяется выборкой на строку больше
+    размера страницы. Так же без `count` отвечает запрос с `?count=false`.
+    """
+
+    count_query_param = 'count'
+
+    def get_count(self, queryset):
+        """Get_count method for CachedCountPagination."""
+        counter = getattr(self.view, 'get_collection_count', None)
+        if counter is not None:
+            return counter()
+        timeout = getattr(settings, 'API_COUNT_CACHE_TIMEOUT', 60)
+        if not timeout:
+            return super().get_count(queryset)
+        key = count_key(queryset)
+        count = response_cache.cache.get(key)
+        if count is None:
+            count = super().get_count(queryset)
+            # Реплика может отставать: её число сохранилось бы под новой
+            # версией модели и отдавалось бы после догона реплики.
+            if queryset.db == DEFAULT_DB_ALIAS:
+                response_cache.cache.set(key, count, timeout)
+        return count
+
+    def get_count_mode(self, queryset, request):
+        """Как считать объекты: точно, по оценке или не считать."""
+        value = request.query_params.get(self.count_query_param, '')
+        if value.lower() in FALSE_VALUES:
+            return NO_COUNT
+        threshold = getattr(settings, 'API_COUNT_ESTIMATE_THRESHOLD', None)
+        if threshold is None or hasattr(self.view, 'get_collection_count'):
+            return EXACT
+        estimate = estimate_rows(queryset)
+        if estimate is None or estimate < threshold:
+            return EXACT
+        if queryset.query.has_filters():
+            return NO_COUNT
+        self.estimate = estimate
+        return ESTIMATED
+
+    def paginate_queryset(self, queryset, request, view=None):
+        """Paginate_queryset method for CachedCountPagination."""
+        self.view = view
+        page_number = request.query_params.get(self.page_query_param, 1)
+        self.count_mode = EXACT
+        if page_number not in self.last_page_strings:
+            self.count_mode = self.get_count_mode(queryset, request)
+        if self.count_mode == EXACT:
+            return super().paginate_queryset(queryset, request, view)
+        page_size = self.get_page_size(request)
+        if not page_size:
+            return None
+        try:
+            number = int(page_number)
+        except (TypeError, ValueError):
+            raise NotFound(self.invalid_page_message.format(
+                page_number=page_number,
+                message=gettext('That page number is not an integer')
+            ))
+        if number < 1:
+            raise NotFound(self.invalid_page_message.format(
+                page_number=page_number,
+                message=gettext('That page number is less than 1')
+            ))
+        offset = (number - 1) * page_size
+        probe = queryset[offset:offset + page_size + 1]
+        if is_concurrent(request):
+            rows, = fetch_concurrently(probe)
+        else:
+            rows = list(probe)
+        if not rows and number > 1:
+            raise NotFound(self.invalid_page_message.format(
+                page_number=page_number,
+                message=gettext('That page contains no results')
+            ))
+        self.page = ProbePage(
+            rows[:page_size], number, Paginator(queryset, page_size),
+            has_next=len(rows) > page_size
+        )
+        self.request = request
+        return list(self.page)
+
+    def get_paginated_response(self, data):
+        """Get_paginated_response method for CachedCountPagination."""
+        if self.count_mode == EXACT:
+            return super().get_paginated_response(data)
+        fields = []
+        if self.count_mode == ESTIMATED:
+            fields = [('count', self.estimate), ('count_estimated', True)]
+        return Response(OrderedDict(fields + [
+            ('next', self.get_next_link()),
+            ('previous', self.get_previous_link()),
+            ('results', data),
+        ]))
+
+
+class PageNumberOrKeysetPagination(CachedCountPagination):
+    """Постраничная пагинация с курсорным режимом по запросу.
+
+    Если в запросе передан параметр `cursor` (в том числе пустой),
+    используется KeysetPagination, иначе постраничная пагинация.
+    """
+
+    keyset_class = KeysetPagination
+
+    def paginate_queryset(self, queryset, request, view=None):
+        """Paginate_queryset method for PageNumberOrKeysetPagination."""
+        self.keyset = None
+        if self.keyset_class.cursor_query_param in request.query_params:
+            self.keyset = self.keyset_class(self.get_page_size(request))
+            return self.keyset.paginate_queryset(queryset, request, view)
+        return super().paginate_queryset(queryset, request, view)
+
+    def get_paginated_response(self, data):
+        """Get_paginated_response method for PageNumberOrKeysetPagination."""
+        if self.keyset is not None:
+            return self.keyset.get_paginated_response(data)
+        return super().get_paginated_response(data)
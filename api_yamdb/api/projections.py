@@ -0,0 +1,92 @@
+"""List projections for API."""
+from collections import defaultdict
+
+from django.utils.functional import cached_property
+from rest_framework import serializers
+
+from reviews.models import Genres
+from .serializers import TitlesReadSerializer
+from .timing import timed_serialization
+
+# Поля произведения, которые выводятся значением колонки как есть,
+# и поле DRF, которым их выводит TitlesReadSerializer.
+TITLE_COLUMNS = {
+    'id': serializers.IntegerField,
+    'name': serializers.CharField,
+    'year': serializers.IntegerField,
+    'rating': serializers.FloatField,
+    'description': serializers.CharField,
+}
+# Поля жанра и категории во вложенных объектах.
+NESTED_FIELDS = ('name', 'slug')
+
+
+class TitleListProjection:
+    """Список произведений из values() без экземпляров моделей и DRF.
+
+    Колонки страницы читаются одним запросом values(), жанры всей
+    страницы — одним запросом той же формы, что и prefetch_related,
+    и ответ собирается словарями в порядке полей TitlesReadSerializer.
+    Если поля сериализатора изменились и проекция их не знает,
+    `supported` ложно и список выводится сериализатором.
+    """
+
+    serializer_class = TitlesReadSerializer
+
+    @cached_property
+    def keys(self):
+        """Поля ответа в порядке сериализатора."""
+        return tuple(self.serializer_class().fields)
+
+    @cached_property
+    def supported(self):
+        """Совпадает ли вывод проекции с выводом сериализатора."""
+        fields = self.serializer_class().fields
+        if set(fields) != set(TITLE_COLUMNS) | {'genre', 'category'}:
+            return False
+        for name, field_class in TITLE_COLUMNS.items():
+            field = fields[name]
+            if type(field) is not field_class or field.source != name:
+                return False
+        genre, category = fields['genre'], fields['category']
+        return (
+            isinstance(genre, serializers.ListSerializer)
+            and genre.source == 'genre'
+            and tuple(genre.child.fields) == NESTED_FIELDS
+            and category.source == 'category'
+            and tuple(category.fields) == NESTED_FIELDS
+        )
+
+    def queryset(self, queryset):
+        """Выборка колонок произведений вместо объектов."""
+        return queryset.select_related(None).prefetch_related(None).values(
+            *TITLE_COLUMNS, 'category', 'category__name', 'category__slug'
+        )
+
+    def genres(self, rows):
+        """Жанры произведений страницы: {id произведения: [жанры]}."""
+        genres = defaultdict(list)
+        for title_id, name, slug in Genres.objects.filter(
+            title__in=[row['id'] for row in rows]
+        ).values_list('title', 'name', 'slug'):
+            genres[title_id].append({'name': name, 'slug': slug})
+        return genres
+
+    def render(self, rows):
+        """Данные ответа для строк выборки."""
+        genres = self.genres(rows) if rows else {}
+        keys = self.keys
+        data = []
+        with timed_serialization():
+            for row in rows:
+                row['genre'] = genres.get(row['id'], [])
+                if row['category'] is not None:
+                    row['category'] = {
+                        'name': row['category__name'],
+                        'slug': row['category__slug'],
+                    }
+                data.append({key: row[key] for key in keys})
+        return data
+
+
+title_list_projection = TitleListProjection()
@@ -0,0 +1,146 @@
+"""Read replicas for API."""
+import hashlib
+import random
+from contextvars import ContextVar
+
+from django.conf import settings
+from django.core.cache import caches
+from django.db import DEFAULT_DB_ALIAS, connections
+
+SAFE_METHODS = ('GET', 'HEAD', 'OPTIONS')
+
+# База для чтения в текущем запросе; None вне ReplicaMiddleware.
+_read_alias = ContextVar('api_read_alias', default=None)
+
+
+def get_replicas():
+    """Псевдонимы реплик из настроек."""
+    return list(getattr(settings, 'API_DATABASE_REPLICAS', ()))
+
+
+def get_read_alias():
+    """База для чтения в текущем запросе (основная вне запроса)."""
+    return _read_alias.get() or DEFAULT_DB_ALIAS
+
+
+def reads_from_primary():
+    """Читает ли текущий запрос с основной базы.
+
+    Данные с реплики могут отставать, поэтому кэши, ключ которых
+    меняется при записи (версии моделей, снимки пользователей),
+    заполняются только чтением с основной базы: иначе устаревшие строки
+    реплики сохранились бы под новым ключом на весь таймаут.
+    """
+    return get_read_alias() == DEFAULT_DB_ALIAS
+
+
+def get_sticky_cache():
+    """Бэкенд кэша для отметок о недавней записи."""
+    return caches[getattr(settings, 'API_CACHE_ALIAS', 'default')]
+
+
+def sticky_key(request):
+    """Ключ клиента: заголовок Authorization или IP-адрес."""
+    ident = request.META.get('HTTP_AUTHORIZATION') or request.META.get(
+        'REMOTE_ADDR', ''
+    )
+    return f'api:sticky:{hashlib.md5(ident.encode()).hexdigest()}'
+
+
+def pin(request):
+    """Читать с основной базы для этого клиента в течение окна."""
+    timeout = getattr(settings, 'API_REPLICA_STICKY_SECONDS', 10)
+    if timeout > 0:
+        get_sticky_cache().set(sticky_key(request), True, timeout)
+
+
+def is_pinned(request):
+    """Была ли у клиента запись в пределах окна."""
+    return get_sticky_cache().get(sticky_key(request), False)
+
+
+class ReplicaRouter:
+    """Чтение с реплик в безопасных запросах, запись в основную базу.
+
+    База для чтения выбирается ReplicaMiddleware на весь запрос. Вне
+    запроса, в открытой транзакции и пока реплики не заданы
+    в API_DATABASE_REPLICAS, всё идёт в основную базу.
+    """
+
+    def db_for_read(self, model, **hints):
+        """Db_for_read method for ReplicaRouter."""
+        instance = hints.get('instance')
+        if instance is not None and instance._state.db:
+            return instance._state.db
+        if connections[DEFAULT_DB_ALIAS].in_atomic_block:
+            return DEFAULT_DB_ALIAS
+        return get_read_alias()
+
+    def db_for_write(self, model, **hints):
+        """Db_for_write method for ReplicaRouter."""
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        """Allow_relation method for ReplicaRouter."""
+        databases = {DEFAULT_DB_ALIAS, *get_replicas()}
+        if obj1._state.db in databases and obj2._state.db in databases:
+            return True
+        return None
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        """Схему реплик обновляет репликация, а не migrate."""
+        if db in get_replicas():
+            return False
+        return None
+
+
+class ReplicaMiddleware:
+    """Выбор базы для чтения на время запроса.
+
+    Небезопасные запросы и запросы клиента, который недавно писал
+    (окно API_REPLICA_STICKY_SECONDS), читают с основной базы, чтобы
+    клиент сразу видел свои изменения. Остальные читают со случайной
+    реплики.
+    """
+
+    def __init__(self, get_response):
+        """Init method for ReplicaMiddleware."""
+        self.get_response = get_response
+
+    def get_read_alias(self, request):
+        """База для чтения в запросе."""
+        replicas = get_replicas()
+        if (
+            not replicas or request.method not in SAFE_METHODS
+            or is_pinned(request)
+        ):
+            return DEFAULT_DB_ALIAS
+        return random.choice(replicas)
+
+    def __call__(self, request):
+        """Выполнить запрос с выбранной базой для чтения."""
+        token = _read_alias.set(self.get_read_alias(request))
+        try:
+            response = self.get_response(request)
+        finally:
+            _read_alias.reset(token)
+        if (
+            get_replicas() and request.method not in SAFE_METHODS
+            and response.status_code < 400
+        ):
+            pin(request)
+        return response
+
+
+def replicate(source=DEFAULT_DB_ALIAS, targets=None):
+    """Скопировать SQLite-базу source в реплики.
+
+    Замена репликации для локального запуска и тестов: реплика
+    полностью перезаписывается копией основной базы через backup API.
+    """
+    source_connection = connections[source]
+    source_connection.ensure_connection()
+    for alias in get_replicas() if targets is None else targets:
+        target = connections[alias]
+        target.ensure_connection()
+        source_connection.connection.backup(target.connection)
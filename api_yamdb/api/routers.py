@@ -0,0 +1,18 @@
+"""Routers for API."""
+from rest_framework.routers import DefaultRouter
+
+
+class BulkRouter(DefaultRouter):
+    """DefaultRouter с пакетным PATCH на адрес списка.
+
+    PATCH со списком на адрес списка вызывает `bulk_partial_update`
+    представления (см. api.bulk.BulkMixin), если он есть.
+    """
+
+    routes = [
+        route._replace(
+            mapping={**route.mapping, 'patch': 'bulk_partial_update'}
+        )
+        if route.name == '{basename}-list' else route
+        for route in DefaultRouter.routes
+    ]
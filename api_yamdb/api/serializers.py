@@ -11,12 +11,21 @@ from reviews.models import (
     Comments,
     Review
 )
+from .compiled import CompiledSerializerMixin
+from .fields import BatchSlugRelatedField
+from .sparse import SparseFieldsSerializerMixin
+from .timing import TimedSerializerMixin
 
 
 User = get_user_model()
 
 
-class UserSerializer(serializers.ModelSerializer):
+class UserSerializer(
+    SparseFieldsSerializerMixin,
+    TimedSerializerMixin,
+    CompiledSerializerMixin,
+    serializers.ModelSerializer
+):
     """Сериализатор пользователя."""
 
     class Meta:
@@ -28,9 +37,16 @@ class UserSerializer(serializers.ModelSerializer):
         )
 
 
-class CategorySerializer(serializers.ModelSerializer):
+class CategorySerializer(
+    SparseFieldsSerializerMixin,
+    TimedSerializerMixin,
+    CompiledSerializerMixin,
+    serializers.ModelSerializer
+):
     """CategorySerializer for API."""
 
+    collapsed_field = 'slug'
+
     class Meta:
         """Meta for CategorySerializer."""
 
@@ -38,9 +54,16 @@ class CategorySerializer(serializers.ModelSerializer):
         fields = ('name', 'slug')
 
 
-class GenreSerializer(serializers.ModelSerializer):
+class GenreSerializer(
+    SparseFieldsSerializerMixin,
+    TimedSerializerMixin,
+    CompiledSerializerMixin,
+    serializers.ModelSerializer
+):
     """GenreSerializer for API."""
 
+    collapsed_field = 'slug'
+
     class Meta:
         """Meta for GenreSerializer."""
 
@@ -48,13 +71,13 @@ class GenreSerializer(serializers.ModelSerializer):
         fields = ('name', 'slug')
 
 
-class TitleSerializer(serializers.ModelSerializer):
+class TitleSerializer(TimedSerializerMixin, serializers.ModelSerializer):
     """TitleSerializer for API."""
 
-    genre = serializers.SlugRelatedField(
+    genre = BatchSlugRelatedField(
         slug_field='slug', many=True, queryset=Genres.objects.all()
     )
-    category = serializers.SlugRelatedField(
+    category = BatchSlugRelatedField(
         slug_field='slug', queryset=Categories.objects.all()
     )
 
@@ -62,10 +85,18 @@ class TitleSerializer(serializers.ModelSerializer):
         """Meta for TitleSerializer."""
 
         model = Title
-        fields = '__all__'
+        exclude = (
+            'rating', 'review_count', 'score_sum', 'name_casefold',
+            'updated_at', 'reviews_changed_at',
+        )
 
 
-class TitlesReadSerializer(serializers.ModelSerializer):
+class TitlesReadSerializer(
+    SparseFieldsSerializerMixin,
+    TimedSerializerMixin,
+    CompiledSerializerMixin,
+    serializers.ModelSerializer
+):
     """TitlesReadSerializer for API."""
 
     rating = serializers.FloatField(read_only=True)
@@ -76,10 +107,18 @@ class TitlesReadSerializer(serializers.ModelSerializer):
         """Meta for TitlesReadSerializer."""
 
         model = Title
-        fields = '__all__'
+        exclude = (
+            'review_count', 'score_sum', 'name_casefold',
+            'updated_at', 'reviews_changed_at',
+        )
 
 
-class ReviewSerializer(serializers.ModelSerializer):
+class ReviewSerializer(
+    SparseFieldsSerializerMixin,
+    TimedSerializerMixin,
+    CompiledSerializerMixin,
+    serializers.ModelSerializer
+):
     """Serializer for reviews."""
 
     author = serializers.SlugRelatedField(
@@ -92,7 +131,7 @@ class ReviewSerializer(serializers.ModelSerializer):
         """Meta for ReviewSerializer."""
 
         model = Review
-        fields = '__all__'
+        exclude = ('updated_at', 'comments_changed_at')
         read_only_fields = ('title',)
         ordering = ['id']
 
@@ -110,7 +149,12 @@ class ReviewSerializer(serializers.ModelSerializer):
         return attrs
 
 
-class CommentSerializer(serializers.ModelSerializer):
+class CommentSerializer(
+    SparseFieldsSerializerMixin,
+    TimedSerializerMixin,
+    CompiledSerializerMixin,
+    serializers.ModelSerializer
+):
     """CommentSerializer for API."""
 
     author = serializers.SlugRelatedField(
@@ -121,13 +165,13 @@ class CommentSerializer(serializers.ModelSerializer):
     class Meta:
         """Meta for CommentSerializer."""
 
-        exclude = ('review',)
+        exclude = ('review', 'updated_at')
         model = Comments
         read_only_fields = ('review',)
         ordering = ['id']
 
 
-class SignUpSerializer(serializers.ModelSerializer):
+class SignUpSerializer(TimedSerializerMixin, serializers.ModelSerializer):
     """SignUpSerializer for API."""
 
     class Meta:
@@ -0,0 +1,247 @@
+"""Sparse fieldsets for API."""
+from collections import OrderedDict
+
+from django.core.exceptions import FieldDoesNotExist
+from django.db.models import Prefetch
+from django.db.models.constants import LOOKUP_SEP
+from rest_framework import serializers
+from rest_framework.exceptions import ValidationError
+
+# Поля сериализатора, которые выводят один связанный объект.
+RELATED_TYPES = (serializers.Serializer, serializers.RelatedField)
+
+
+def parse_names(value):
+    """Имена полей из значения параметра через запятую."""
+    return [name.strip() for name in value.split(',') if name.strip()]
+
+
+def collapsed_field(field):
+    """Поле слага, до которого сворачивается вложенный сериализатор."""
+    if isinstance(field, serializers.ListSerializer):
+        field = field.child
+    return getattr(field, 'collapsed_field', None)
+
+
+def collapse(field):
+    """Заменить вложенный сериализатор слагами связанных объектов."""
+    kwargs = {'read_only': True, 'slug_field': collapsed_field(field)}
+    if field.source:
+        kwargs['source'] = field.source
+    if isinstance(field, serializers.ListSerializer):
+        kwargs['many'] = True
+    return serializers.SlugRelatedField(**kwargs)
+
+
+class Fieldset:
+    """Поля ответа из параметров `fields` и `expand`.
+
+    `fields` оставляет в ответе только перечисленные поля, а связанные
+    объекты среди них сворачивает до слага, если их нет в `expand`.
+    """
+
+    fields_param = 'fields'
+    expand_param = 'expand'
+
+    def __init__(self, fields, expand):
+        """Init method for Fieldset."""
+        self.fields = fields
+        self.expand = expand
+
+    @classmethod
+    def from_request(cls, request, serializer):
+        """Набор полей запроса для сериализатора или None."""
+        fields = request.query_params.get(cls.fields_param)
+        expand = request.query_params.get(cls.expand_param)
+        if fields is None and expand is None:
+            return None
+        available = serializer.fields
+        errors = {}
+        if fields is not None:
+            fields = parse_names(fields)
+            unknown = [name for name in fields if name not in available]
+            if unknown:
+                errors[cls.fields_param] = [
+                    f'Неизвестные поля: {", ".join(unknown)}.'
+                ]
+        expand = parse_names(expand or '')
+        unknown = [
+            name for name in expand
+            if name not in available or not collapsed_field(available[name])
+        ]
+        if unknown:
+            errors[cls.expand_param] = [
+                f'Эти поля нельзя раскрыть: {", ".join(unknown)}.'
+            ]
+        if errors:
+            raise ValidationError(errors)
+        if fields is None:
+            return None
+        return cls(set(fields), set(expand))
+
+    def apply(self, fields):
+        """Оставить и при необходимости свернуть поля сериализатора."""
+        result = OrderedDict()
+        for name, field in fields.items():
+            if name not in self.fields:
+                continue
+            if name not in self.expand and collapsed_field(field):
+                field = collapse(field)
+            result[name] = field
+        return result
+
+
+class SparseFieldsSerializerMixin:
+    """Поля корневого сериализатора по набору из контекста (`fieldset`).
+
+    `collapsed_field` — поле слага, до которого сворачивается этот
+    сериализатор, когда он вложен и не раскрыт.
+    """
+
+    collapsed_field = None
+
+    def is_sparse_root(self):
+        """Корневой ли это сериализатор (или элемент корневого списка)."""
+        root = self.root
+        return root is self or getattr(root, 'child', None) is self
+
+    def get_fields(self):
+        """Get_fields method for SparseFieldsSerializerMixin."""
+        fields = super().get_fields()
+        fieldset = self.context.get('fieldset')
+        if fieldset is None or not self.is_sparse_root():
+            return fields
+        return fieldset.apply(fields)
+
+
+def get_model_field(model, name):
+    """Поле модели по имени или None."""
+    try:
+        return model._meta.get_field(name)
+    except FieldDoesNotExist:
+        return None
+
+
+def required_fields(model):
+    """Поля, которые читаются всегда: ключ, сортировка и updated_at.
+
+    По сортировке работает курсорная пагинация, а по `updated_at` —
+    Last-Modified (см. ConditionalGetMixin).
+    """
+    names = {model._meta.pk.name}
+    for name in model._meta.ordering:
+        if isinstance(name, str):
+            names.add(name.lstrip('-'))
+    if get_model_field(model, 'updated_at') is not None:
+        names.add('updated_at')
+    return {
+        name for name in names
+        if name != '?' and LOOKUP_SEP not in name
+    }
+
+
+def related_paths(field, model):
+    """Поля связанной модели для поля сериализатора или None (все поля)."""
+    if isinstance(field, serializers.SlugRelatedField):
+        if LOOKUP_SEP in field.slug_field or '.' in field.slug_field:
+            return None
+        return required_fields(model) | {field.slug_field}
+    if isinstance(field, serializers.PrimaryKeyRelatedField):
+        return required_fields(model)
+    if not isinstance(field, serializers.ModelSerializer):
+        return None
+    paths = required_fields(model)
+    for child in field.fields.values():
+        model_field = get_model_field(model, child.source)
+        if (
+            model_field is None
+            or model_field.is_relation
+            or not model_field.concrete
+        ):
+            return None
+        paths.add(model_field.name)
+    return paths
+
+
+def relation_child(field):
+    """Элемент поля со списком связанных объектов или None."""
+    if isinstance(field, serializers.ListSerializer):
+        return field.child
+    if isinstance(field, serializers.ManyRelatedField):
+        return field.child_relation
+    return None
+
+
+def prefetch_queryset(child, model_field):
+    """Выборка для prefetch_related связи или None (все поля)."""
+    related = model_field.related_model
+    paths = related_paths(child, related)
+    if paths is None:
+        return None
+    return related._default_manager.only(*paths)
+
+
+def foreign_paths(field, model_field):
+    """Пути only() для поля, выводящего объект по внешнему ключу."""
+    paths = {model_field.name}
+    if isinstance(field, serializers.PrimaryKeyRelatedField):
+        return paths
+    related = related_paths(field, model_field.related_model)
+    paths.update(
+        f'{model_field.name}{LOOKUP_SEP}{path}' for path in related or ()
+    )
+    return paths
+
+
+def serializer_paths(serializer, model):
+    """Что читать для полей сериализатора: (only, select, prefetch).
+
+    None, если какое-то поле не сводится к полям модели.
+    """
+    only, select, prefetch = required_fields(model), [], {}
+    for field in serializer.fields.values():
+        model_field = None
+        if field.source != '*' and '.' not in field.source:
+            model_field = get_model_field(model, field.source)
+        if model_field is None:
+            return None
+        child = relation_child(field)
+        if child is not None:
+            if not model_field.many_to_many:
+                return None
+            prefetch[model_field.name] = prefetch_queryset(child, model_field)
+        elif isinstance(field, RELATED_TYPES):
+            if not (model_field.many_to_one or model_field.one_to_one):
+                return None
+            only.update(foreign_paths(field, model_field))
+            if not isinstance(field, serializers.PrimaryKeyRelatedField):
+                select.append(model_field.name)
+        elif model_field.is_relation or not model_field.concrete:
+            return None
+        else:
+            only.add(model_field.name)
+    return only, select, prefetch
+
+
+def narrow_queryset(queryset, serializer):
+    """Читать только колонки и связи, нужные полям сериализатора.
+
+    Ненужные select_related и prefetch_related убираются, а у нужных
+    связей читаются только выводимые поля.
+    """
+    paths = serializer_paths(serializer, queryset.model)
+    if paths is None:
+        return queryset
+    only, select, prefetch = paths
+    # Выборка через related manager (title.reviews) подставляет строкам
+    # известный объект по внешнему ключу, поэтому ключ нужно прочитать.
+    only.update(field.name for field in queryset._known_related_objects)
+    queryset = queryset.select_related(None).prefetch_related(None)
+    if select:
+        queryset = queryset.select_related(*select)
+    if prefetch:
+        queryset = queryset.prefetch_related(*[
+            name if related is None else Prefetch(name, queryset=related)
+            for name, related in prefetch.items()
+        ])
+    return queryset.only(*only)
@@ -0,0 +1,194 @@
+"""SQLite tuning for API."""
+import os
+import queue
+import threading
+from concurrent.futures import Future
+from contextlib import contextmanager
+from contextvars import copy_context
+
+from django.conf import settings
+from django.db import (
+    DEFAULT_DB_ALIAS, IntegrityError, connections, transaction
+)
+
+from .timing import instrument_connections
+
+
+def get_pragmas():
+    """PRAGMA для новых соединений SQLite из настроек."""
+    return getattr(settings, 'API_SQLITE_PRAGMAS', {})
+
+
+def apply_pragmas(sender, connection, **kwargs):
+    """Обработчик connection_created: настроить соединение SQLite.
+
+    PRAGMA выполняются на соединении DB-API, минуя обёртки Django,
+    и не попадают в число запросов запроса.
+    """
+    if connection.vendor != 'sqlite':
+        return
+    for name, value in get_pragmas().items():
+        connection.connection.execute(f'PRAGMA {name} = {value}')
+
+
+def begin_immediate(connection):
+    """Начинать транзакции соединения с BEGIN IMMEDIATE.
+
+    Блокировка записи берётся в начале транзакции, поэтому транзакция,
+    которая сначала читает, не получает `database is locked` при первой
+    записи, а ждёт busy_timeout.
+    """
+    def start_transaction():
+        connection.cursor().execute('BEGIN IMMEDIATE')
+
+    connection._start_transaction_under_autocommit = start_transaction
+
+
+@contextmanager
+def immediate_atomic(using=DEFAULT_DB_ALIAS):
+    """transaction.atomic, на SQLite начатая с BEGIN IMMEDIATE.
+
+    Для записей, которые сначала читают то, что потом пишут (например,
+    следующий ключ): два таких блока не прочитают одно и то же.
+    Вложенный блок наследует транзакцию внешнего.
+    """
+    connection = connections[using]
+    if connection.vendor != 'sqlite' or connection.in_atomic_block:
+        with transaction.atomic(using=using):
+            yield
+        return
+    patched = '_start_transaction_under_autocommit' in vars(connection)
+    previous = vars(connection).get('_start_transaction_under_autocommit')
+    begin_immediate(connection)
+    try:
+        with transaction.atomic(using=using):
+            yield
+    finally:
+        if patched:
+            connection._start_transaction_under_autocommit = previous
+        else:
+            del connection._start_transaction_under_autocommit
+
+
+class WriteQueue:
+    """Очередь записей в SQLite с одним пишущим потоком.
+
+    Записи из потоков процесса выполняются по очереди в одном потоке,
+    поэтому они не конкурируют за блокировку базы. Всё, что накопилось
+    в очереди, пока шла предыдущая транзакция, выполняется в одной
+    транзакции (групповая фиксация, до API_SQLITE_WRITE_BATCH записей);
+    каждая запись — в своей точке сохранения, и её ошибка откатывает
+    только её. Вызвавший поток ждёт фиксации и получает результат или
+    исключение записи.
+
+    Запись может выполниться повторно после отката (см. commit), поэтому
+    она не должна зависеть от состояния, которое меняет сама.
+    """
+
+    def __init__(self):
+        """Init method for WriteQueue."""
+        self._lock = threading.Lock()
+        self._queue = None
+        self._thread = None
+        self._owner = None
+
+    @property
+    def enabled(self):
+        """Включена ли очередь для основной базы."""
+        return (
+            getattr(settings, 'API_SQLITE_WRITE_QUEUE', False)
+            and connections[DEFAULT_DB_ALIAS].vendor == 'sqlite'
+        )
+
+    @property
+    def batch_size(self):
+        """Наибольшее число записей в одной транзакции."""
+        return getattr(settings, 'API_SQLITE_WRITE_BATCH', 64)
+
+    def start(self):
+        """Запустить пишущий поток этого процесса (заново после fork)."""
+        if self._owner == os.getpid():
+            return
+        with self._lock:
+            if self._owner != os.getpid():
+                self._queue = queue.Queue()
+                self._thread = threading.Thread(
+                    target=self.loop, name='api-sqlite-writer', daemon=True
+                )
+                self._thread.start()
+                self._owner = os.getpid()
+
+    def run(self, func, *args, **kwargs):
+        """Выполнить запись в пишущем потоке и вернуть её результат.
+
+        Внутри открытой транзакции запись выполняется сразу: она должна
+        попасть в ту же транзакцию.
+        """
+        if (
+            not self.enabled
+            or connections[DEFAULT_DB_ALIAS].in_atomic_block
+            or threading.current_thread() is self._thread
+        ):
+            return func(*args, **kwargs)
+        self.start()
+        future = Future()
+        self._queue.put((copy_context(), func, args, kwargs, future))
+        return future.result()
+
+    def loop(self):
+        """Пишущий поток: забирать пачки записей и фиксировать их.
+
+        Соединение остаётся открытым между пачками (commit закрывает его
+        только после ошибки), чтобы не подключаться заново на каждую.
+        """
+        begin_immediate(connections[DEFAULT_DB_ALIAS])
+        while True:
+            batch = [self._queue.get()]
+            while len(batch) < self.batch_size:
+                try:
+                    batch.append(self._queue.get_nowait())
+                except queue.Empty:
+                    break
+            self.commit(batch)
+
+    def execute(self, func, args, kwargs):
+        """Выполнить запись с учётом её SQL в замерах запроса."""
+        with instrument_connections():
+            return func(*args, **kwargs)
+
+    def attempt(self, job):
+        """Выполнить запись в точке сохранения или своей транзакции."""
+        context, func, args, kwargs, future = job
+        try:
+            with transaction.atomic():
+                result = context.run(self.execute, func, args, kwargs)
+        except Exception as exc:
+            return future, None, exc
+        return future, result, None
+
+    def commit(self, batch):
+        """Выполнить пачку записей в одной транзакции.
+
+        Внешние ключи в SQLite отложенные, и нарушение проверяется только
+        при фиксации пачки, а её IntegrityError откатывает все записи.
+        Тогда записи выполняются заново, каждая в своей транзакции, и
+        ошибку получает только нарушившая ключ.
+        """
+        try:
+            with transaction.atomic():
+                outcomes = [self.attempt(job) for job in batch]
+        except IntegrityError:
+            outcomes = [self.attempt(job) for job in batch]
+        except Exception as exc:
+            connections[DEFAULT_DB_ALIAS].close()
+            for *_, future in batch:
+                future.set_exception(exc)
+            return
+        for future, result, exc in outcomes:
+            if exc is None:
+                future.set_result(result)
+            else:
+                future.set_exception(exc)
+
+
+write_queue = WriteQueue()
@@ -0,0 +1,168 @@
+"""Throttling for API."""
+import threading
+from collections import OrderedDict
+
+from django.conf import settings
+from django.core.cache import caches
+from rest_framework.permissions import SAFE_METHODS
+from rest_framework.settings import api_settings
+from rest_framework.throttling import SimpleRateThrottle
+
+
+class LocalBucketStore:
+    """Корзины в памяти процесса, без внешних сервисов.
+
+    Корзина, которая успела наполниться, ничем не отличается от новой,
+    и её можно удалить. Для каждой длительности окна ключи хранятся
+    в порядке последнего обращения, то есть и в порядке наполнения,
+    поэтому наполнившиеся корзины снимаются с начала без обхода
+    остальных, а корзины активных клиентов не удаляются.
+    """
+
+    def __init__(self):
+        """Init method for LocalBucketStore."""
+        self._lock = threading.Lock()
+        self._buckets = {}
+        self._order = {}
+
+    def take(self, key, capacity, duration, now):
+        """Списать токен; вернуть время ожидания или 0."""
+        with self._lock:
+            self.prune(now)
+            tokens, stamp, _, old_duration = self._buckets.get(
+                key, (capacity, now, now, duration)
+            )
+            tokens, wait = consume(tokens, stamp, capacity, duration, now)
+            if old_duration != duration:
+                self._order[old_duration].pop(key, None)
+            self._buckets[key] = (tokens, now, now + duration, duration)
+            order = self._order.setdefault(duration, OrderedDict())
+            order[key] = None
+            order.move_to_end(key)
+            return wait
+
+    def prune(self, now):
+        """Удалить корзины, которые уже успели наполниться."""
+        for order in self._order.values():
+            while order:
+                key = next(iter(order))
+                if self._buckets[key][2] > now:
+                    break
+                del order[key]
+                del self._buckets[key]
+
+    def clear(self):
+        """Сбросить все корзины."""
+        with self._lock:
+            self._buckets.clear()
+            self._order.clear()
+
+
+class CacheBucketStore:
+    """Корзины в общем бэкенде кэша Django.
+
+    Чтение и запись не атомарны: при гонке несколько процессов могут
+    пропустить лишний запрос, но не заблокируют клиента зря.
+    """
+
+    def __init__(self, alias):
+        """Init method for CacheBucketStore."""
+        self.alias = alias
+
+    def take(self, key, capacity, duration, now):
+        """Списать токен; вернуть время ожидания или 0."""
+        cache = caches[self.alias]
+        tokens, stamp = cache.get(key, (capacity, now))
+        tokens, wait = consume(tokens, stamp, capacity, duration, now)
+        cache.set(key, (tokens, now), duration)
+        return wait
+
+
+def consume(tokens, stamp, capacity, duration, now):
+    """Пополнить корзину за прошедшее время и списать один токен."""
+    refill = capacity / duration
+    tokens = min(capacity, tokens + (now - stamp) * refill)
+    if tokens >= 1:
+        return tokens - 1, 0
+    return tokens, (1 - tokens) / refill
+
+
+local_store = LocalBucketStore()
+
+
+def get_store():
+    """Хранилище корзин из настроек."""
+    alias = getattr(settings, 'API_THROTTLE_CACHE_ALIAS', None)
+    if alias is None:
+        return local_store
+    return CacheBucketStore(alias)
+
+
+class RouteRateThrottle(SimpleRateThrottle):
+    """Ограничение частоты запросов на изменение данных.
+
+    Корзина токенов на пару «маршрут — клиент»: клиент определяется
+    пользователем, а для анонимных запросов — IP-адресом. Маршрут
+    задаётся атрибутом `throttle_scope` представления, частоты —
+    настройкой API_THROTTLE_RATES в формате DRF ('5/min').
+    Безопасные методы не ограничиваются.
+    """
+
+    scope = None
+
+    def __init__(self):
+        """Частота читается из настроек при каждом запросе."""
+
+    def get_rate(self):
+        """Частота для маршрута или None, если он не ограничен."""
+        return getattr(settings, 'API_THROTTLE_RATES', {}).get(self.scope)
+
+    def get_ident(self, request):
+        """IP-адрес клиента.
+
+        Без NUM_PROXIES DRF берёт адрес из X-Forwarded-For, который
+        клиент задаёт сам и мог бы менять на каждый запрос, поэтому
+        используется REMOTE_ADDR. За прокси нужно указать NUM_PROXIES.
+        """
+        if api_settings.NUM_PROXIES is None:
+            return request.META.get('REMOTE_ADDR', '')
+        return super().get_ident(request)
+
+    def get_cache_key(self, request, view):
+        """Ключ корзины: маршрут, пользователь или IP."""
+        if request.user and request.user.is_authenticated:
+            ident = f'user:{request.user.pk}'
+        else:
+            ident = f'ip:{self.get_ident(request)}'
+        return f'api:throttle:{self.scope}:{ident}'
+
+    def allow_request(self, request, view):
+        """Пропустить запрос, если в корзине есть токен."""
+        if request.method in SAFE_METHODS:
+            return True
+        self.scope = self.scope or getattr(view, 'throttle_scope', None)
+        rate = self.get_rate()
+        if rate is None:
+            return True
+        capacity, duration = self.parse_rate(rate)
+        self.delay = get_store().take(
+            self.get_cache_key(request, view),
+            capacity, duration, self.timer()
+        )
+        return not self.delay
+
+    def wait(self):
+        """Секунды до появления токена, для заголовка Retry-After."""
+        return self.delay
+
+
+class SignUpRateThrottle(RouteRateThrottle):
+    """Ограничение регистрации."""
+
+    scope = 'signup'
+
+
+class TokenRateThrottle(RouteRateThrottle):
+    """Ограничение выдачи токенов."""
+
+    scope = 'token'
@@ -0,0 +1,179 @@
+"""Per-route timing for API."""
+import threading
+import time
+from contextlib import ExitStack, contextmanager
+from contextvars import ContextVar
+
+from django.conf import settings
+from django.db import connections
+
+from .metrics import request_metrics
+
+# Замеры текущего запроса; None вне ServerTimingMiddleware.
+_current = ContextVar('api_request_timing', default=None)
+
+
+class RequestTiming:
+    """Замеры одного запроса."""
+
+    __slots__ = ('queries', 'sql', 'serialize', 'depth')
+
+    def __init__(self):
+        """Init method for RequestTiming."""
+        self.queries = 0
+        self.sql = 0.0
+        self.serialize = 0.0
+        self.depth = 0
+
+    def __call__(self, execute, sql, params, many, context):
+        """Обёртка выполнения SQL: считать запросы и их время."""
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.sql += time.perf_counter() - started
+            self.queries += 1
+
+
+class RouteStats:
+    """Накопленные замеры маршрутов в этом процессе."""
+
+    FIELDS = ('count', 'total', 'sql', 'queries', 'serialize')
+
+    def __init__(self):
+        """Init method for RouteStats."""
+        self._lock = threading.Lock()
+        self._routes = {}
+
+    def record(self, route, timing, total):
+        """Добавить замеры запроса к маршруту."""
+        with self._lock:
+            stats = self._routes.get(route)
+            if stats is None:
+                stats = self._routes[route] = [0, 0.0, 0.0, 0, 0.0]
+            stats[0] += 1
+            stats[1] += total
+            stats[2] += timing.sql
+            stats[3] += timing.queries
+            stats[4] += timing.serialize
+
+    def snapshot(self):
+        """Замеры по маршрутам: суммы и число запросов."""
+        with self._lock:
+            return {
+                route: dict(zip(self.FIELDS, stats))
+                for route, stats in self._routes.items()
+            }
+
+    def reset(self):
+        """Сбросить замеры."""
+        with self._lock:
+            self._routes.clear()
+
+
+route_stats = RouteStats()
+
+
+@contextmanager
+def instrument_connections():
+    """Учитывать SQL этого потока в замерах текущего запроса.
+
+    Нужно и в потоках, которые выполняют запросы от имени обработчика
+    (см. api.concurrency): у каждого потока свои соединения с БД.
+    """
+    timing = _current.get()
+    with ExitStack() as stack:
+        if timing is not None:
+            for connection in connections.all():
+                stack.enter_context(connection.execute_wrapper(timing))
+        yield
+
+
+@contextmanager
+def timed_serialization():
+    """Учесть время блока как сериализацию в замерах текущего запроса.
+
+    Для вывода без сериализаторов DRF (см. api.projections).
+    """
+    timing = _current.get()
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        if timing is not None:
+            timing.serialize += time.perf_counter() - started
+
+
+def route_name(request):
+    """Имя маршрута: класс представления и действие.
+
+    `TitleViewSet.list`, `ReviewViewSet.create`, `get_token.post`.
+    """
+    match = getattr(request, 'resolver_match', None)
+    if match is None:
+        return 'unresolved'
+    view = getattr(match.func, 'cls', None)
+    if view is None:
+        return match.view_name or match.func.__name__
+    method = request.method.lower()
+    actions = getattr(match.func, 'actions', None) or {}
+    return f'{view.__name__}.{actions.get(method, method)}'
+
+
+class ServerTimingMiddleware:
+    """Время SQL, сериализации и всего запроса в заголовке Server-Timing.
+
+    Замеры накапливаются по маршрутам в `route_stats` и в метриках
+    Prometheus (`request_metrics`). Заголовок включается настройкой
+    API_SERVER_TIMING_HEADER (по умолчанию — при DEBUG).
+    """
+
+    def __init__(self, get_response):
+        """Init method for ServerTimingMiddleware."""
+        self.get_response = get_response
+
+    def __call__(self, request):
+        """Выполнить запрос с замерами."""
+        timing = RequestTiming()
+        token = _current.set(timing)
+        started = time.perf_counter()
+        try:
+            with instrument_connections():
+                response = self.get_response(request)
+        finally:
+            _current.reset(token)
+        total = time.perf_counter() - started
+        route = route_name(request)
+        route_stats.record(route, timing, total)
+        request_metrics.observe(
+            route, request.method, response, timing, total
+        )
+        if getattr(settings, 'API_SERVER_TIMING_HEADER', False):
+            response['Server-Timing'] = (
+                f'db;dur={timing.sql * 1000:.2f};'
+                f'desc="{timing.queries} queries", '
+                f'serialize;dur={timing.serialize * 1000:.2f}, '
+                f'total;dur={total * 1000:.2f}'
+            )
+        return response
+
+
+class TimedSerializerMixin:
+    """Учёт времени to_representation в замерах запроса.
+
+    Учитывается только внешний сериализатор: вложенные выполняются
+    внутри его замера.
+    """
+
+    def to_representation(self, instance):
+        """To_representation method for TimedSerializerMixin."""
+        timing = _current.get()
+        if timing is None or timing.depth:
+            return super().to_representation(instance)
+        timing.depth += 1
+        started = time.perf_counter()
+        try:
+            return super().to_representation(instance)
+        finally:
+            timing.serialize += time.perf_counter() - started
+            timing.depth -= 1
@@ -1,7 +1,7 @@
 """URL's for API."""
 from django.urls import include, path
-from rest_framework.routers import DefaultRouter
 
+from .routers import BulkRouter
 from .views import (
     CategoryViewSet,
     GenreViewSet,
@@ -10,10 +10,11 @@ from .views import (
     CommentViewSet,
     UserViewSet,
     get_token,
+    metrics,
     send_confirmation_code,
 )
 
-v1_router = DefaultRouter()
+v1_router = BulkRouter()
 v1_router.register('categories', CategoryViewSet, basename='category')
 v1_router.register('genres', GenreViewSet, basename='genre')
 v1_router.register('titles', TitleViewSet, basename='title')
@@ -30,5 +31,6 @@ app_name = 'api'
 urlpatterns = [
     path('v1/auth/signup/', send_confirmation_code),
     path('v1/auth/token/', get_token),
+    path('v1/metrics/', metrics),
     path('v1/', include(v1_router.urls)),
 ]
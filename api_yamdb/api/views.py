@@ -1,11 +1,12 @@
 """Views for API."""
 from django.contrib.auth import get_user_model
 from django.contrib.auth.tokens import default_token_generator
-from django.core.mail import send_mail
-from django.db.models import Avg
+from django.http import HttpResponse
 from django.shortcuts import get_object_or_404
 from rest_framework import filters, permissions, status, viewsets
-from rest_framework.decorators import action, api_view, permission_classes
+from rest_framework.decorators import (
+    action, api_view, permission_classes, throttle_classes
+)
 from rest_framework.pagination import PageNumberPagination
 from rest_framework.permissions import IsAuthenticatedOrReadOnly
 from rest_framework.response import Response
@@ -13,8 +14,22 @@ from rest_framework.response import Response
 from django_filters.rest_framework import DjangoFilterBackend
 from rest_framework_simplejwt.tokens import AccessToken
 from reviews.models import Categories, Genres, Title, Review
-from .filters import TitlesFilter
-from .mixins import CreateListDestroyViewSet
+from users.models import OutboxEmail
+from .bulk import BulkMixin
+from .filters import CasefoldSearchFilter, TitlesFilter
+from .metrics import render
+from .mixins import (
+    ConcurrentRetrieveMixin,
+    ConditionalGetMixin,
+    CreateListDestroyViewSet,
+    ProjectedListMixin,
+    QueuedWriteMixin,
+    SparseFieldsMixin,
+    queued_save
+)
+from .pagination import PageNumberOrKeysetPagination
+from .projections import title_list_projection
+from .sqlite import write_queue
 from .serializers import (
     CategorySerializer,
     GenreSerializer,
@@ -31,21 +46,26 @@ from .permissions import (
     AdminOrReadOnlyPermission,
     UserSafeOrUpdatePermission
 )
+from .throttling import (
+    RouteRateThrottle, SignUpRateThrottle, TokenRateThrottle
+)
 
 
 User = get_user_model()
 
 
-class UserViewSet(viewsets.ModelViewSet):
+class UserViewSet(SparseFieldsMixin, viewsets.ModelViewSet):
     """API пользователя."""
 
     queryset = User.objects.all()
     pagination_class = PageNumberPagination
     serializer_class = UserSerializer
     permission_classes = (AdminOnlyPermission,)
-    filter_backends = (filters.SearchFilter,)
-    search_fields = ('username', )
+    filter_backends = (CasefoldSearchFilter,)
+    search_fields = ('^username_casefold', )
     lookup_field = 'username'
+    throttle_classes = (RouteRateThrottle,)
+    throttle_scope = 'users'
 
     @action(
         methods=['get', 'patch'],
@@ -54,7 +74,9 @@ class UserViewSet(viewsets.ModelViewSet):
     )
     def me(self, request):
         """Информация о пользователе."""
-        user = self.request.user
+        # request.user может быть снимком из кэша аутентификации
+        # с отложенными полями, поэтому профиль читается целиком.
+        user = get_object_or_404(User, pk=self.request.user.pk)
         serializer = self.get_serializer(user)
         if self.request.method == 'PATCH':
             serializer = self.get_serializer(
@@ -67,24 +89,25 @@ class UserViewSet(viewsets.ModelViewSet):
 
 @api_view(['POST'])
 @permission_classes([permissions.AllowAny])
+@throttle_classes([SignUpRateThrottle])
 def send_confirmation_code(request):
     """Отправка кода подтверждения на почту."""
     serializer = SignUpSerializer(data=request.data)
     serializer.is_valid(raise_exception=True)
     user = serializer.save()
     confirmation_code = default_token_generator.make_token(user)
-    send_mail(
-        'Код подтверждения YAMDB',
-        f'Код подтверждения: {confirmation_code}',
-        'adminm@yamdb.ru',
-        [user.email],
-        fail_silently=False,
+    OutboxEmail.objects.create(
+        subject='Код подтверждения YAMDB',
+        body=f'Код подтверждения: {confirmation_code}',
+        from_email='adminm@yamdb.ru',
+        recipient=user.email,
     )
     return Response(serializer.data)
 
 
 @api_view(['POST'])
 @permission_classes([permissions.AllowAny])
+@throttle_classes([TokenRateThrottle])
 def get_token(request):
     """Получение токена."""
     serializer = ConfirmationCodeSerializer(data=request.data)
@@ -93,46 +116,65 @@ def get_token(request):
         User, username=serializer.validated_data["username"]
     )
     confirmation_code = serializer.data['confirmation_code']
-    if confirmation_code == default_token_generator.check_token(
-        user, confirmation_code
-    ):
+    if default_token_generator.check_token(user, confirmation_code):
         token = AccessToken.for_user(user)
         return Response({f'token: {token}'}, status=status.HTTP_200_OK)
     return Response(status=status.HTTP_400_BAD_REQUEST)
 
 
-class CategoryViewSet(CreateListDestroyViewSet):
+@api_view(['GET'])
+@permission_classes([AdminOnlyPermission])
+def metrics(request):
+    """Метрики в формате Prometheus."""
+    return HttpResponse(
+        render(), content_type='text/plain; version=0.0.4; charset=utf-8'
+    )
+
+
+class CategoryViewSet(BulkMixin, CreateListDestroyViewSet):
     """CategoryViewSet for API."""
 
     queryset = Categories.objects.all()
     serializer_class = CategorySerializer
     permission_classes = (AdminOrReadOnlyPermission, )
-    filter_backends = (DjangoFilterBackend, filters.SearchFilter, )
+    filter_backends = (DjangoFilterBackend, CasefoldSearchFilter, )
     filterset_fields = ('name', )
-    search_fields = ('=name',)
+    search_fields = ('=name_casefold',)
     lookup_field = 'slug'
 
 
-class GenreViewSet(CreateListDestroyViewSet):
+class GenreViewSet(BulkMixin, CreateListDestroyViewSet):
     """GenreViewSet for API."""
 
     queryset = Genres.objects.all()
     serializer_class = GenreSerializer
     permission_classes = (AdminOrReadOnlyPermission, )
-    filter_backends = (DjangoFilterBackend, filters.SearchFilter, )
+    filter_backends = (DjangoFilterBackend, CasefoldSearchFilter, )
     filterset_fields = ('name', )
-    search_fields = ('=name',)
+    search_fields = ('=name_casefold',)
     lookup_field = 'slug'
 
 
-class TitleViewSet(viewsets.ModelViewSet):
+class TitleViewSet(
+    BulkMixin,
+    ConditionalGetMixin,
+    ConcurrentRetrieveMixin,
+    ProjectedListMixin,
+    SparseFieldsMixin,
+    QueuedWriteMixin,
+    viewsets.ModelViewSet
+):
     """TitleViewSet for API."""
 
-    queryset = Title.objects.all().annotate(rating=(Avg('reviews__score')))
+    queryset = Title.objects.select_related(
+        'category'
+    ).prefetch_related('genre')
     permission_classes = (AdminOrReadOnlyPermission, )
-    filter_backends = (DjangoFilterBackend, filters.SearchFilter, )
+    filter_backends = (DjangoFilterBackend, CasefoldSearchFilter, )
     filterset_class = TitlesFilter
-    search_fields = ('=name',)
+    search_fields = ('=name_casefold',)
+    projection = title_list_projection
+    projection_setting = 'API_TITLE_LIST_PROJECTION'
 
     def get_serializer_class(self):
         """Get_serializer_class method for TitleViewSet."""
@@ -141,7 +183,12 @@ class TitleViewSet(viewsets.ModelViewSet):
         return TitleSerializer
 
 
-class ReviewViewSet(viewsets.ModelViewSet):
+class ReviewViewSet(
+    ConditionalGetMixin,
+    SparseFieldsMixin,
+    QueuedWriteMixin,
+    viewsets.ModelViewSet
+):
     """Viewset for review."""
 
     permission_classes = (
@@ -149,23 +196,43 @@ class ReviewViewSet(viewsets.ModelViewSet):
         UserSafeOrUpdatePermission,
     )
     serializer_class = ReviewSerializer
+    pagination_class = PageNumberOrKeysetPagination
     filter_backends = (DjangoFilterBackend, filters.SearchFilter, )
+    throttle_classes = (RouteRateThrottle,)
+    throttle_scope = 'reviews'
 
     def get_title(self):
         """Get title object."""
-        title_id = self.kwargs.get("title_id")
-        return get_object_or_404(Title, id=title_id)
+        if not hasattr(self, '_title'):
+            title_id = self.kwargs.get("title_id")
+            self._title = get_object_or_404(Title, id=title_id)
+        return self._title
 
     def get_queryset(self):
         """Queryset definition."""
-        return self.get_title().reviews.all()
+        return self.get_title().reviews.select_related('author')
+
+    def get_collection_changed_at(self):
+        """Дата изменения отзывов произведения."""
+        return self.get_title().reviews_changed_at
+
+    def get_collection_count(self):
+        """Число отзывов произведения из его счётчика."""
+        return self.get_title().review_count
 
     def perform_create(self, serializer):
         """Create redefinition."""
-        serializer.save(author=self.request.user, title=self.get_title())
+        write_queue.run(queued_save(
+            serializer, author=self.request.user, title=self.get_title()
+        ))
 
 
-class CommentViewSet(viewsets.ModelViewSet):
+class CommentViewSet(
+    ConditionalGetMixin,
+    SparseFieldsMixin,
+    QueuedWriteMixin,
+    viewsets.ModelViewSet
+):
     """Viewset for comments."""
 
     permission_classes = (
@@ -173,22 +240,31 @@ class CommentViewSet(viewsets.ModelViewSet):
         UserSafeOrUpdatePermission
     )
     serializer_class = CommentSerializer
+    pagination_class = PageNumberOrKeysetPagination
     filter_backends = (DjangoFilterBackend, filters.SearchFilter, )
+    throttle_classes = (RouteRateThrottle,)
+    throttle_scope = 'comments'
 
     def get_review(self):
         """Get_review method for CommentViewSet."""
-        return get_object_or_404(
-            Review,
-            pk=self.kwargs.get('review_id')
-        )
+        if not hasattr(self, '_review'):
+            self._review = get_object_or_404(
+                Review,
+                title=self.kwargs.get('title_id'),
+                pk=self.kwargs.get('review_id')
+            )
+        return self._review
 
     def get_queryset(self):
         """Get_queryset method for CommentViewSet."""
-        review = Review.objects.filter(title=self.kwargs.get('title_id'),
-                                       pk=self.kwargs.get('review_id')).get()
-        return review.comments.all()
+        return self.get_review().comments.select_related('author')
+
+    def get_collection_changed_at(self):
+        """Дата изменения комментариев отзыва."""
+        return self.get_review().comments_changed_at
 
     def perform_create(self, serializer):
         """Perform_create method for CommentViewSet."""
-        serializer.save(author=self.request.user,
-                        review=self.get_review())
+        write_queue.run(queued_save(
+            serializer, author=self.request.user, review=self.get_review()
+        ))
@@ -3,14 +3,17 @@ ASGI config for YaMDb project.
 
 It exposes the ASGI callable as a module-level variable named ``application``.
 
-For more information on this file, see
-https://docs.djangoproject.com/en/3.0/howto/deployment/asgi/
+Django 2.2 has no ASGI support of its own, so the application is served
+by api.asgi.ASGIHandler on top of the WSGI handler.
 """
 
 import os
 
-from django.core.asgi import get_asgi_application
+import django
 
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'api_yamdb.settings')
+django.setup(set_prefix=False)
 
-application = get_asgi_application()
+from api.asgi import ASGIHandler  # noqa: E402
+
+application = ASGIHandler()
@@ -31,6 +31,8 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    'api.timing.ServerTimingMiddleware',
+    'api.replicas.ReplicaMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
@@ -71,6 +73,45 @@ DATABASES = {
     }
 }
 
+# Реплики для чтения: псевдонимы из DATABASES (с 'TEST': {'MIRROR':
+# 'default'}). Безопасные запросы читают с реплик, запись и чтение
+# клиента в течение API_REPLICA_STICKY_SECONDS после его записи — с
+# основной базы. Для SQLite-реплик копию делает
+# `python manage.py replicate --loop`.
+
+DATABASE_ROUTERS = ['api.replicas.ReplicaRouter']
+
+API_DATABASE_REPLICAS = []
+
+API_REPLICA_STICKY_SECONDS = 10
+
+# Режим SQLite под нагрузкой: PRAGMA для каждого соединения и запись
+# из perform_create/perform_update через один пишущий поток процесса
+# с групповой фиксацией (до API_SQLITE_WRITE_BATCH записей).
+
+API_SQLITE_PRAGMAS = {
+    'journal_mode': 'wal',
+    'synchronous': 'normal',
+    'busy_timeout': 5000,
+    'mmap_size': 256 * 1024 * 1024,
+}
+
+API_SQLITE_WRITE_QUEUE = True
+
+API_SQLITE_WRITE_BATCH = 64
+
+# Кэш (ответы списков категорий и жанров)
+
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+    }
+}
+
+API_CACHE_ALIAS = 'default'
+
+API_CACHE_TIMEOUT = 300
+
 
 # Password validation
 
@@ -116,7 +157,7 @@ AUTH_USER_MODEL = 'users.User'
 
 REST_FRAMEWORK = {
     'DEFAULT_AUTHENTICATION_CLASSES': (
-        'rest_framework_simplejwt.authentication.JWTAuthentication',
+        'api.authentication.CachedJWTAuthentication',
     ),
     'DEFAULT_PERMISSION_CLASSES': (
         'rest_framework.permissions.IsAuthenticated',
@@ -125,7 +166,7 @@ REST_FRAMEWORK = {
         'django_filters.rest_framework.DjangoFilterBackend'
     ),
     'DEFAULT_PAGINATION_CLASS': (
-        'rest_framework.pagination.PageNumberPagination'
+        'api.pagination.CachedCountPagination'
     ),
     'PAGE_SIZE': 10
 }
@@ -137,7 +178,84 @@ SIMPLE_JWT = {
     'AUTH_HEADER_TYPES': ('Bearer',),
 }
 
+# Частота запросов на изменение данных по маршрутам (формат DRF).
+# Корзины хранятся в памяти процесса; чтобы делить их между
+# процессами, укажите псевдоним общего кэша в API_THROTTLE_CACHE_ALIAS.
+
+API_THROTTLE_RATES = {
+    'signup': '5/min',
+    'token': '10/min',
+    'users': '60/min',
+    'reviews': '20/min',
+    'comments': '30/min',
+}
+
+API_THROTTLE_CACHE_ALIAS = None
+
+# Заголовок Server-Timing с временем SQL и сериализации. По умолчанию
+# только при DEBUG: замеры по путям аутентификации и поиска не должны
+# уходить анонимным клиентам в продакшене.
+
+API_SERVER_TIMING_HEADER = DEBUG
+
+# Каталог файлов метрик для нескольких процессов (gunicorn и т. п.):
+# каждый процесс пишет свой файл, /api/v1/metrics/ суммирует их.
+# Каталог очищается перед запуском сервера. None — метрики процесса.
+
+API_METRICS_DIR = None
+
+# Потоки ASGI-обработчика (api_yamdb.asgi): для представлений и для
+# независимых запросов к БД внутри представления.
+
+API_ASGI_THREADS = 8
+
+API_ASGI_QUERY_THREADS = 8
+
+# Наибольшее число объектов в одном пакетном POST или PATCH
+
+API_BULK_MAX_ITEMS = 1000
+
+# Кэш слаг → id жанров и категорий для записи произведений в памяти
+# процесса. Сбрасывается сигналами только в своём процессе: при
+# нескольких процессах включайте, если слаги не переименовываются.
+
+API_SLUG_CACHE = False
+
+# Пагинация: точное число объектов страницы кэшируется на
+# API_COUNT_CACHE_TIMEOUT секунд (0 — без кэша). Если оценка размера
+# таблицы (sqlite_stat1 после ANALYZE, pg_class) не меньше
+# API_COUNT_ESTIMATE_THRESHOLD, COUNT(*) не выполняется: списки без
+# фильтров получают оценку, с фильтрами — только ссылку `next`.
+# None — всегда точное число.
+
+API_COUNT_CACHE_TIMEOUT = 60
+
+API_COUNT_ESTIMATE_THRESHOLD = None
+
+# Список произведений без сериализатора DRF: колонки через values(),
+# жанры страницы одним запросом (api.projections). Ответ тот же.
+
+API_TITLE_LIST_PROJECTION = False
+
+# Сериализаторы чтения выводят объекты функциями, скомпилированными
+# при запуске (api.compiled); поля, которые компилятор не знает,
+# выводятся через DRF. False — вывод только через DRF.
+
+API_COMPILED_SERIALIZERS = True
+
+# Время жизни снимка пользователя в кэше аутентификации (секунды)
+
+AUTH_USER_CACHE_TIMEOUT = 60
+
 # Настройки электронной почты
 
 EMAIL_BACKEND = "django.core.mail.backends.filebased.EmailBackend"
 EMAIL_FILE_PATH = os.path.join(BASE_DIR, "sent_emails")
+
+# Очередь писем (python manage.py send_emails)
+
+EMAIL_OUTBOX_MAX_ATTEMPTS = 5
+
+EMAIL_OUTBOX_RETRY_DELAY = 60
+
+EMAIL_OUTBOX_LEASE = 300
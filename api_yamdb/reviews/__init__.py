@@ -1 +1,2 @@
 """__init__ for reviews."""
+default_app_config = 'reviews.apps.ReviewsConfig'
@@ -1,8 +1,22 @@
 """Apps for Reviews."""
 from django.apps import AppConfig
+from django.db import connections
+from django.db.models.signals import post_migrate
 
 
 class ReviewsConfig(AppConfig):
     """ReviewsConfig for reviews app."""
 
     name = 'reviews'
+
+    def ready(self):
+        """Подключение сигналов приложения."""
+        from . import signals  # noqa: F401
+        post_migrate.connect(build_search_index, sender=self)
+
+
+def build_search_index(sender, using, **kwargs):
+    """Создание индекса полнотекстового поиска после миграций."""
+    from .search import create_search_index
+
+    create_search_index(connections[using])
@@ -0,0 +1,39 @@
+"""Model fields for Reviews app."""
+from django.db import models
+
+
+class CasefoldField(models.CharField):
+    """Индексируемая копия текстового поля, приведённая к casefold.
+
+    SQLite сравнивает без учёта регистра только ASCII, поэтому поиск
+    по кириллице идёт по этой колонке. Значение вычисляется из поля
+    `source` при каждом сохранении, в том числе в `bulk_create`.
+    """
+
+    def __init__(self, source, *args, **kwargs):
+        """Init method for CasefoldField."""
+        self.source = source
+        kwargs.setdefault('editable', False)
+        kwargs.setdefault('db_index', True)
+        kwargs.setdefault('default', '')
+        super().__init__(*args, **kwargs)
+
+    def deconstruct(self):
+        """Deconstruct method for CasefoldField."""
+        name, path, args, kwargs = super().deconstruct()
+        kwargs['source'] = self.source
+        return name, path, args, kwargs
+
+    def pre_save(self, model_instance, add):
+        """Вычислить значение из исходного поля."""
+        value = (getattr(model_instance, self.source) or '').casefold()
+        setattr(model_instance, self.attname, value)
+        return value
+
+
+def casefold_fields(model):
+    """Поля CasefoldField модели."""
+    return [
+        field for field in model._meta.concrete_fields
+        if isinstance(field, CasefoldField)
+    ]
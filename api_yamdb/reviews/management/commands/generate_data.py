@@ -0,0 +1,432 @@
+"""Synthetic data generator."""
+import csv
+import math
+import os
+import random
+import time
+from contextlib import nullcontext
+from datetime import datetime, timezone
+from importlib import import_module
+from itertools import accumulate
+
+from django.contrib.auth.hashers import make_password
+from django.core.management import call_command
+from django.core.management.base import BaseCommand, CommandError
+from django.db import DEFAULT_DB_ALIAS, connections, models, transaction
+from django.db.models import Max
+
+from reviews.fields import CasefoldField
+
+# Модели и переименования колонок те же, что у команды import:
+# CSV-файлы генератора загружаются ею без изменений.
+DATA_FILES = import_module('reviews.management.commands.import').DATA_FILES
+HEADERS = {
+    'users.csv': (
+        'id', 'username', 'email', 'role', 'bio', 'first_name', 'last_name'
+    ),
+    'category.csv': ('id', 'name', 'slug'),
+    'genre.csv': ('id', 'name', 'slug'),
+    'titles.csv': ('id', 'name', 'year', 'category', 'description'),
+    'genre_title.csv': ('id', 'title_id', 'genre_id'),
+    'review.csv': ('id', 'title_id', 'text', 'author', 'score', 'pub_date'),
+    'comments.csv': ('id', 'review_id', 'text', 'author', 'pub_date'),
+}
+WORDS = (
+    'книга', 'фильм', 'песня', 'герой', 'время', 'город', 'дорога', 'море',
+    'ночь', 'свет', 'история', 'жизнь', 'любовь', 'война', 'мир', 'дом',
+    'сердце', 'память', 'ветер', 'зима', 'лето', 'звезда', 'мастер', 'сад',
+    'отличный', 'скучный', 'сюжет', 'финал', 'актёр', 'роль', 'музыка',
+    'автор', 'режиссёр', 'глава', 'персонаж', 'смысл', 'неожиданный',
+    'прекрасный', 'странный', 'старый', 'новый', 'долгий', 'короткий',
+    'советую', 'пересматривал', 'прочитал', 'слушаю', 'понравилось',
+    'не', 'и', 'но', 'очень', 'совсем', 'почти', 'всегда', 'снова', 'это',
+    'был', 'была', 'было', 'как', 'так', 'уже', 'ещё', 'только', 'даже',
+    'Москва', 'Петербург', 'детство', 'дружба', 'тайна', 'путешествие',
+)
+ROLES = ('user', 'moderator', 'admin')
+ROLE_WEIGHTS = (0.989, 0.01, 0.001)
+# Оценки смещены к высоким, как в настоящих отзывах.
+SCORES = range(1, 11)
+SCORE_WEIGHTS = list(accumulate((2, 1, 1, 2, 4, 6, 10, 14, 12, 10)))
+DATE_RANGE = (
+    datetime(2015, 1, 1, tzinfo=timezone.utc).timestamp(),
+    datetime(2023, 1, 1, tzinfo=timezone.utc).timestamp(),
+)
+
+
+def power_law(size, exponent):
+    """Накопленные веса рангов 1..size, вес ранга r равен r^-exponent."""
+    return list(accumulate(
+        rank ** -exponent for rank in range(1, size + 1)
+    ))
+
+
+class TextPool:
+    """Русские тексты — отрезки заранее перемешанной последовательности слов.
+
+    Выбор отрезка стоит одного случайного числа на текст, а не на слово.
+    """
+
+    SIZE = 100000
+
+    def __init__(self, rng):
+        """Init method for TextPool."""
+        self.rng = rng
+        self.words = rng.choices(WORDS, k=self.SIZE)
+
+    def __call__(self, mu, sigma, limit):
+        """Текст с логнормальным числом слов, не длиннее `limit`."""
+        rng = self.rng
+        length = min(max(int(rng.lognormvariate(mu, sigma)), 1), limit)
+        start = rng.randrange(self.SIZE - length)
+        return ' '.join(self.words[start:start + length]).capitalize()
+
+
+def distinct(rng, population, cum_weights, count):
+    """`count` разных элементов, выбранных с весами."""
+    if count * 2 > len(population):
+        return rng.sample(population, count)
+    chosen = set()
+    while len(chosen) < count:
+        chosen.update(rng.choices(
+            population, cum_weights=cum_weights, k=count - len(chosen)
+        ))
+    return list(chosen)
+
+
+def isoformat(value):
+    """Дата в формате файлов static/data."""
+    return value.strftime('%Y-%m-%dT%H:%M:%S.%f')[:-3] + 'Z'
+
+
+class CsvSink:
+    """Запись строк в CSV-файл в формате static/data."""
+
+    def __init__(self, path, header):
+        """Init method for CsvSink."""
+        self.file = open(path, 'w', encoding='utf8', newline='')
+        self.writer = csv.writer(self.file)
+        self.writer.writerow(header)
+        self.written = 0
+
+    def write(self, row):
+        """Записать строку."""
+        self.writer.writerow(
+            isoformat(value) if isinstance(value, datetime) else value
+            for value in row
+        )
+        self.written += 1
+
+    def flush(self):
+        """Записать буфер в файл."""
+        self.file.flush()
+
+    def close(self):
+        """Закрыть файл."""
+        self.file.close()
+
+
+class TableSink:
+    """Пакетная вставка строк CSV-формата прямо в таблицу модели.
+
+    Строки вставляются через executemany без создания объектов модели.
+    Поля, которых нет в CSV, заполняются значениями по умолчанию,
+    casefold-копии вычисляются из исходных полей. Перед вставкой пакета
+    вставляются пакеты таблиц из `depends_on`, на которые он ссылается.
+    """
+
+    def __init__(self, model, header, renames, database, batch_size,
+                 overrides=None):
+        """Init method for TableSink."""
+        self.connection = connections[database]
+        self.batch_size = batch_size
+        self.rows = []
+        self.written = 0
+        self.depends_on = []
+        fields = {
+            field.attname: field for field in model._meta.concrete_fields
+        }
+        attnames = [renames.get(column, column) for column in header]
+        self.adapters = [
+            self.get_adapter(fields[attname]) for attname in attnames
+        ]
+        self.casefold = [
+            attnames.index(fields[field.source].attname)
+            for field in model._meta.concrete_fields
+            if isinstance(field, CasefoldField)
+        ]
+        now = datetime.now(timezone.utc)
+        self.constants = []
+        columns = list(attnames)
+        for attname, field in fields.items():
+            if attname in attnames or isinstance(field, CasefoldField):
+                continue
+            if overrides and attname in overrides:
+                value = overrides[attname]
+            elif getattr(field, 'auto_now', False) or getattr(
+                field, 'auto_now_add', False
+            ):
+                value = now
+            else:
+                value = field.get_default()
+            columns.append(attname)
+            self.constants.append(
+                field.get_db_prep_save(value, self.connection)
+            )
+        columns += [
+            field.attname for field in model._meta.concrete_fields
+            if isinstance(field, CasefoldField)
+        ]
+        quote = self.connection.ops.quote_name
+        self.sql = 'INSERT INTO {} ({}) VALUES ({})'.format(
+            quote(model._meta.db_table),
+            ', '.join(quote(column) for column in columns),
+            ', '.join(['%s'] * len(columns)),
+        )
+
+    def get_adapter(self, field):
+        """Преобразование значения в формат базы или None."""
+        if isinstance(field, models.DateTimeField):
+            return self.connection.ops.adapt_datetimefield_value
+        return None
+
+    def write(self, row):
+        """Добавить строку в пакет."""
+        values = [
+            value if adapter is None else adapter(value)
+            for adapter, value in zip(self.adapters, row)
+        ]
+        values += self.constants
+        values += [row[index].casefold() for index in self.casefold]
+        self.rows.append(values)
+        if len(self.rows) >= self.batch_size:
+            self.flush()
+
+    def flush(self):
+        """Вставить накопленный пакет."""
+        if not self.rows:
+            return
+        for sink in self.depends_on:
+            sink.flush()
+        with self.connection.cursor() as cursor:
+            cursor.executemany(self.sql, self.rows)
+        self.written += len(self.rows)
+        self.rows = []
+
+    def close(self):
+        """Таблице закрывать нечего."""
+
+
+class Command(BaseCommand):
+    """Генерация синтетических данных для нагрузочных проверок."""
+
+    help = (
+        'Generate a deterministic synthetic dataset with Zipfian reviews '
+        'per title and power-law authors, into the DB or to CSV files'
+    )
+
+    def add_arguments(self, parser):
+        """Arguments for generate_data command."""
+        for name, default, help_text in (
+            ('users', 10000, 'Number of users'),
+            ('categories', 20, 'Number of categories'),
+            ('genres', 50, 'Number of genres'),
+            ('titles', 100000, 'Number of titles'),
+            ('reviews', 1000000, 'Approximate number of reviews'),
+            ('comments', 500000, 'Approximate number of comments'),
+        ):
+            parser.add_argument(
+                f'--{name}', type=int, default=default, help=help_text
+            )
+        parser.add_argument(
+            '--title-exponent', type=float, default=1.1,
+            help='Zipf exponent of reviews per title',
+        )
+        parser.add_argument(
+            '--author-exponent', type=float, default=1.2,
+            help='Power-law exponent of reviews and comments per author',
+        )
+        parser.add_argument(
+            '--seed', type=int, default=1,
+            help='Random seed; the same seed gives the same dataset',
+        )
+        parser.add_argument(
+            '--csv-dir',
+            help='Write CSV files in the static/data format to this '
+                 'directory instead of inserting into the database',
+        )
+        parser.add_argument(
+            '--batch-size', type=int, default=10000,
+            help='Number of rows inserted per statement',
+        )
+        parser.add_argument(
+            '--database', default=DEFAULT_DB_ALIAS,
+            help='Database alias to insert data into',
+        )
+
+    def open_sinks(self, options):
+        """Приёмники строк для каждого файла и первые свободные id."""
+        sinks, starts = {}, {}
+        overrides = {'users.csv': {'password': make_password(None)}}
+        directory = options['csv_dir']
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        for filename, model, renames, _ in DATA_FILES:
+            if directory:
+                sinks[filename] = CsvSink(
+                    os.path.join(directory, filename), HEADERS[filename]
+                )
+                starts[filename] = 1
+                continue
+            sinks[filename] = TableSink(
+                model, HEADERS[filename], renames, options['database'],
+                options['batch_size'], overrides.get(filename)
+            )
+            # DATA_FILES упорядочены по зависимостям.
+            sinks[filename].depends_on = list(sinks.values())[:-1]
+            last = model._default_manager.using(
+                options['database']
+            ).aggregate(last=Max('pk'))['last']
+            starts[filename] = (last or 0) + 1
+        return sinks, starts
+
+    def generate_catalog(self, rng, sinks, starts, options):
+        """Пользователи, категории, жанры, произведения и их жанры."""
+        start = starts['users.csv']
+        users = list(range(start, start + options['users']))
+        sink = sinks['users.csv']
+        for user_id, role in zip(users, rng.choices(
+            ROLES, ROLE_WEIGHTS, k=len(users)
+        )):
+            sink.write((
+                user_id, f'gen_{user_id}', f'gen_{user_id}@yamdb.fake',
+                role, self.text(1.5, 1.0, 50) if rng.random() < 0.3 else '',
+                '', ''
+            ))
+        groups = {}
+        for filename, kind, option, name in (
+            ('category.csv', 'category', 'categories', 'Категория'),
+            ('genre.csv', 'genre', 'genres', 'Жанр'),
+        ):
+            start = starts[filename]
+            groups[kind] = list(range(start, start + options[option]))
+            for pk in groups[kind]:
+                sinks[filename].write((
+                    pk, f'{name} «{rng.choice(WORDS)}» {pk}', f'{kind}-{pk}'
+                ))
+        categories = power_law(len(groups['category']), 1.0)
+        genres = power_law(len(groups['genre']), 1.0)
+        start = starts['titles.csv']
+        titles = list(range(start, start + options['titles']))
+        link_id = starts['genre_title.csv']
+        for title_id in titles:
+            sinks['titles.csv'].write((
+                title_id, self.text(0.7, 0.6, 8), rng.randint(1900, 2022),
+                rng.choices(groups['category'], cum_weights=categories)[0],
+                self.text(3.0, 0.6, 200),
+            ))
+            for genre_id in distinct(
+                rng, groups['genre'], genres, rng.randint(1, 3)
+            ):
+                sinks['genre_title.csv'].write((link_id, title_id, genre_id))
+                link_id += 1
+        return users, titles
+
+    def generate_reviews(self, rng, sinks, starts, options, users, titles):
+        """Отзывы с распределением Ципфа по произведениям и комментарии."""
+        # Популярность произведения не зависит от его id.
+        ranked = list(titles)
+        rng.shuffle(ranked)
+        weights = [
+            rank ** -options['title_exponent']
+            for rank in range(1, len(ranked) + 1)
+        ]
+        scale = options['reviews'] / sum(weights) if weights else 0
+        authors = list(users)
+        rng.shuffle(authors)
+        author_weights = power_law(len(authors), options['author_exponent'])
+        comments_per_review = (
+            options['comments'] / options['reviews']
+            if options['reviews'] else 0
+        )
+        # Число комментариев к отзыву распределено геометрически:
+        # floor(Exp(rate)) со средним comments_per_review.
+        rate = (
+            math.log1p(1 / comments_per_review) if comments_per_review else 0
+        )
+        review_id = starts['review.csv']
+        comment_id = starts['comments.csv']
+        low, high = DATE_RANGE
+        for title_id, weight in zip(ranked, weights):
+            expected = weight * scale
+            count = int(expected) + (rng.random() < expected % 1)
+            count = min(count, len(authors))
+            for author_id in distinct(rng, authors, author_weights, count):
+                published = rng.uniform(low, high)
+                sinks['review.csv'].write((
+                    review_id, title_id, self.text(3.0, 0.8, 400), author_id,
+                    rng.choices(SCORES, cum_weights=SCORE_WEIGHTS)[0],
+                    datetime.fromtimestamp(published, timezone.utc),
+                ))
+                replies = 0
+                if comments_per_review:
+                    replies = int(rng.expovariate(rate))
+                for _ in range(replies):
+                    sinks['comments.csv'].write((
+                        comment_id, review_id, self.text(2.3, 0.7, 100),
+                        rng.choices(authors, cum_weights=author_weights)[0],
+                        datetime.fromtimestamp(
+                            published + rng.uniform(0, 30 * 86400),
+                            timezone.utc
+                        ),
+                    ))
+                    comment_id += 1
+                review_id += 1
+
+    def handle(self, *args, **options):
+        """Command body."""
+        if options['batch_size'] < 1:
+            raise CommandError('--batch-size must be positive')
+        if not options['users'] or not options['titles']:
+            raise CommandError('--users and --titles must be positive')
+        rng = random.Random(options['seed'])
+        self.text = TextPool(rng)
+        started = time.monotonic()
+        sinks, starts = self.open_sinks(options)
+        # В базу всё вставляется в одной транзакции: фиксация каждого
+        # пакета на SQLite обходится дороже самой вставки.
+        if options['csv_dir']:
+            context = nullcontext()
+        else:
+            context = transaction.atomic(using=options['database'])
+        try:
+            with context:
+                users, titles = self.generate_catalog(
+                    rng, sinks, starts, options
+                )
+                self.generate_reviews(
+                    rng, sinks, starts, options, users, titles
+                )
+                for sink in sinks.values():
+                    sink.flush()
+        finally:
+            for sink in sinks.values():
+                sink.close()
+        elapsed = time.monotonic() - started
+        total = sum(sink.written for sink in sinks.values())
+        for filename, sink in sinks.items():
+            self.stdout.write(f'{filename}: {sink.written} rows')
+        self.stdout.write(
+            f'{total} rows in {elapsed:.1f}s '
+            f'({total / elapsed if elapsed else total:.0f} rows/sec)'
+        )
+        if not options['csv_dir']:
+            call_command(
+                'recompute_ratings', database=options['database'],
+                stdout=self.stdout
+            )
+            # Статистика планировщика; по ней же API оценивает размер
+            # таблиц (API_COUNT_ESTIMATE_THRESHOLD).
+            with connections[options['database']].cursor() as cursor:
+                cursor.execute('ANALYZE')
+        self.stdout.write(self.style.SUCCESS('Data generated'))
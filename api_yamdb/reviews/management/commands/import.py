@@ -1,7 +1,65 @@
-"""DB import script."""""
+"""DB import script."""
 import csv
-import sqlite3
-from django.core.management.base import BaseCommand
+import hashlib
+import json
+import os
+import time
+from contextlib import contextmanager
+from itertools import islice
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.contrib.auth.hashers import make_password
+from django.core.exceptions import ValidationError
+from django.core.management import call_command
+from django.core.management.base import BaseCommand, CommandError
+from django.db import DEFAULT_DB_ALIAS, DatabaseError, connections, transaction
+
+from reviews.fields import CasefoldField, casefold_fields
+from reviews.models import Categories, Comments, Genres, Review, Title
+
+User = get_user_model()
+
+# Файлы в порядке зависимостей:
+# (файл, модель, переименование колонок, ключ для --upsert).
+DATA_FILES = (
+    ('users.csv', User, {}, 'username'),
+    ('category.csv', Categories, {}, 'slug'),
+    ('genre.csv', Genres, {}, 'slug'),
+    ('titles.csv', Title, {'category': 'category_id'}, 'id'),
+    (
+        'genre_title.csv', Title.genre.through,
+        {'genre_id': 'genres_id'}, 'id'
+    ),
+    ('review.csv', Review, {'author': 'author_id'}, 'id'),
+    ('comments.csv', Comments, {'author': 'author_id'}, 'id'),
+)
+HASH_CHUNK_SIZE = 1024 * 1024
+
+
+def file_hash(path):
+    """Хэш содержимого файла."""
+    digest = hashlib.sha256()
+    with open(path, 'rb') as source:
+        for chunk in iter(lambda: source.read(HASH_CHUNK_SIZE), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+@contextmanager
+def keep_auto_now_add(model):
+    """Сохранять даты из файла вместо текущего времени при вставке."""
+    fields = [
+        field for field in model._meta.concrete_fields
+        if getattr(field, 'auto_now_add', False)
+    ]
+    for field in fields:
+        field.auto_now_add = False
+    try:
+        yield
+    finally:
+        for field in fields:
+            field.auto_now_add = True
 
 
 class Command(BaseCommand):
@@ -9,19 +67,316 @@ class Command(BaseCommand):
 
     help = 'Script for filling DB by test-data'
 
+    def add_arguments(self, parser):
+        """Arguments for import command."""
+        parser.add_argument(
+            '--data-dir',
+            default=os.path.join(settings.BASE_DIR, 'static', 'data'),
+            help='Directory with CSV files',
+        )
+        parser.add_argument(
+            '--batch-size', type=int, default=5000,
+            help='Number of rows read and inserted per batch',
+        )
+        parser.add_argument(
+            '--database', default=DEFAULT_DB_ALIAS,
+            help='Database alias to load data into',
+        )
+        parser.add_argument(
+            '--files', nargs='+', metavar='FILE',
+            choices=[filename for filename, *_ in DATA_FILES],
+            help='Load only these files (dependency order is kept)',
+        )
+        parser.add_argument(
+            '--upsert', action='store_true',
+            help='Update existing rows by primary or natural key, '
+                 'commit every batch and skip invalid rows',
+        )
+        parser.add_argument(
+            '--checkpoint',
+            default=os.path.join(settings.BASE_DIR, 'import_checkpoint.json'),
+            help='Checkpoint file used by --upsert to resume and to skip '
+                 'unchanged files',
+        )
+        parser.add_argument(
+            '--force', action='store_true',
+            help='With --upsert, reload files even if they are unchanged',
+        )
+
+    def get_converters(self, model, header, renames):
+        """Сопоставить колонкам CSV поля модели и их преобразователи."""
+        fields = {
+            field.attname: field for field in model._meta.concrete_fields
+        }
+        converters = []
+        for column in header:
+            attname = renames.get(column, column)
+            field = fields.get(attname)
+            if field is None:
+                continue
+            converters.append((column, attname, field))
+        return converters
+
+    def build(self, model, converters, row):
+        """Создать объект модели из строки CSV."""
+        values = {}
+        for column, attname, field in converters:
+            value = row[column]
+            if value == '' and field.null:
+                value = None
+            elif value is not None:
+                value = field.to_python(value)
+            values[attname] = value
+        if model is User:
+            values.setdefault('password', self.unusable_password)
+        return model(**values)
+
+    def load_file(self, path, model, renames, batch_size, database):
+        """Потоково загрузить один файл в одной транзакции."""
+        connection = connections[database]
+        loaded = 0
+        started = time.monotonic()
+        with open(path, encoding='utf8', newline='') as source:
+            reader = csv.DictReader(source)
+            converters = self.get_converters(
+                model, reader.fieldnames or (), renames
+            )
+            with connection.constraint_checks_disabled():
+                with transaction.atomic(using=database):
+                    with keep_auto_now_add(model):
+                        while True:
+                            batch = [
+                                self.build(model, converters, row)
+                                for row in islice(reader, batch_size)
+                            ]
+                            if not batch:
+                                break
+                            # Размер запроса подбирает Django: на SQLite
+                            # он ограничен числом параметров.
+                            model.objects.using(database).bulk_create(batch)
+                            loaded += len(batch)
+                    connection.check_constraints(
+                        table_names=[model._meta.db_table]
+                    )
+        return loaded, time.monotonic() - started
+
+    def read_checkpoint(self, path):
+        """Прочитать состояние предыдущих загрузок."""
+        if not os.path.exists(path):
+            return {}
+        with open(path, encoding='utf8') as source:
+            return json.load(source)
+
+    def write_checkpoint(self, path, state):
+        """Атомарно сохранить состояние загрузки."""
+        tmp_path = f'{path}.tmp'
+        with open(tmp_path, 'w', encoding='utf8') as target:
+            json.dump(state, target, indent=2, sort_keys=True)
+        os.replace(tmp_path, path)
+
+    def build_rows(self, model, converters, rows, line):
+        """Создать объекты, пропуская строки с некорректными значениями."""
+        objs = []
+        for offset, row in enumerate(rows):
+            try:
+                objs.append(self.build(model, converters, row))
+            except (ValidationError, ValueError, TypeError) as error:
+                self.report_skipped(line + offset, error)
+        return objs
+
+    def report_skipped(self, line, error):
+        """Сообщить о пропущенной строке."""
+        self.skipped += 1
+        self.stderr.write(f'  record {line} skipped: {error}')
+
+    def drop_dangling(self, converters, objs, database):
+        """Отбросить строки со ссылками на несуществующие объекты.
+
+        Внешние ключи проверяются при фиксации транзакции, поэтому
+        ссылки проверяются заранее, одним запросом на поле.
+        """
+        for _, attname, field in converters:
+            if not field.is_relation:
+                continue
+            ids = {getattr(obj, attname) for obj in objs} - {None}
+            found = set(
+                field.related_model._default_manager.using(database).filter(
+                    pk__in=ids
+                ).values_list('pk', flat=True)
+            )
+            valid = []
+            for obj in objs:
+                value = getattr(obj, attname)
+                if value is None or value in found:
+                    valid.append(obj)
+                else:
+                    self.report_skipped(
+                        f'{obj._meta.pk.attname}={obj.pk}',
+                        f'{attname}={value} does not exist'
+                    )
+            objs = valid
+        return objs
+
+    def upsert_batch(self, model, objs, key, fields, database):
+        """Обновить существующие строки по ключу и вставить новые."""
+        manager = model.objects.using(database)
+        key_attname = model._meta.get_field(key).attname
+        existing = dict(
+            manager.filter(**{
+                f'{key}__in': [getattr(obj, key_attname) for obj in objs]
+            }).values_list(key, 'pk')
+        )
+        to_create, to_update = [], []
+        for obj in objs:
+            pk = existing.get(getattr(obj, key_attname))
+            if pk is None:
+                to_create.append(obj)
+            else:
+                obj.pk = pk
+                to_update.append(obj)
+        if to_create:
+            manager.bulk_create(to_create)
+        if to_update and fields:
+            # bulk_update не вызывает pre_save: вычисляемые поля
+            # (casefold-копии, auto_now) обновляются здесь.
+            computed = [
+                field for field in model._meta.concrete_fields
+                if field.attname in fields and (
+                    isinstance(field, CasefoldField)
+                    or getattr(field, 'auto_now', False)
+                )
+            ]
+            for field in computed:
+                for obj in to_update:
+                    field.pre_save(obj, add=False)
+            manager.bulk_update(to_update, fields)
+
+    def upsert_file(self, path, model, renames, key, options, progress):
+        """Загрузить файл с обновлением, фиксируя каждый пакет.
+
+        После каждого пакета число обработанных записей сохраняется
+        в контрольной точке, с неё продолжается прерванная загрузка.
+        """
+        database = options['database']
+        batch_size = options['batch_size']
+        skip = progress['rows']
+        started = time.monotonic()
+        with open(path, encoding='utf8', newline='') as source:
+            reader = csv.DictReader(source)
+            converters = self.get_converters(
+                model, reader.fieldnames or (), renames
+            )
+            fields = [
+                attname for _, attname, field in converters
+                if not field.primary_key and field.name != key
+            ]
+            fields += [
+                field.attname for field in casefold_fields(model)
+                if field.source in fields
+            ] + [
+                field.attname for field in model._meta.concrete_fields
+                if getattr(field, 'auto_now', False)
+            ]
+            for _ in islice(reader, skip):
+                pass
+            with keep_auto_now_add(model):
+                while True:
+                    rows = list(islice(reader, batch_size))
+                    if not rows:
+                        break
+                    objs = self.build_rows(
+                        model, converters, rows, progress['rows'] + 1
+                    )
+                    objs = self.drop_dangling(converters, objs, database)
+                    try:
+                        with transaction.atomic(using=database):
+                            self.upsert_batch(
+                                model, objs, key, fields, database
+                            )
+                    except DatabaseError:
+                        self.upsert_rows(model, objs, key, fields, database)
+                    progress['rows'] += len(rows)
+                    self.save_state()
+        return progress['rows'] - skip, time.monotonic() - started
+
+    def upsert_rows(self, model, objs, key, fields, database):
+        """Загрузить пакет построчно, пропуская строки с ошибками."""
+        with transaction.atomic(using=database):
+            for obj in objs:
+                try:
+                    with transaction.atomic(using=database):
+                        self.upsert_batch(
+                            model, [obj], key, fields, database
+                        )
+                except DatabaseError as error:
+                    self.report_skipped(
+                        f'{model._meta.pk.attname}={obj.pk}', error
+                    )
+
+    def save_state(self):
+        """Сохранить файл контрольной точки."""
+        self.write_checkpoint(self.checkpoint_path, self.state)
+
+    def get_progress(self, filename, path, force):
+        """Состояние загрузки файла или None, если файл не изменился."""
+        content_hash = file_hash(path)
+        progress = self.state.get(filename, {})
+        if progress.get('hash') != content_hash or force:
+            progress = {'hash': content_hash, 'rows': 0, 'done': False}
+        elif progress['done']:
+            self.stdout.write(f'{filename}: unchanged, skipped')
+            return None
+        elif progress['rows']:
+            self.stdout.write(
+                f'{filename}: resuming after record {progress["rows"]}'
+            )
+        self.state[filename] = progress
+        return progress
+
     def handle(self, *args, **options):
         """Script body."""
-        con = sqlite3.connect("C:/Dev/api_yamdb/api_yamdb/db.sqlite3")
-        cur = con.cursor()
-        with open(
-            'C:/Dev/api_yamdb/api_yamdb/static/data/genre.csv',
-            'r', encoding="utf8"
-        ) as fin:
-            dr = csv.DictReader(fin)
-            to_db = [(i['id'], i['name'], i['slug']) for i in dr]
-        cur.executemany(
-            "INSERT INTO reviews_genres (id, name, slug) VALUES (?, ?, ?);",
-            to_db
-        )
-        con.commit()
-        con.close()
+        data_dir = options['data_dir']
+        database = options['database']
+        batch_size = options['batch_size']
+        if batch_size < 1:
+            raise CommandError('--batch-size must be positive')
+        selected = options['files']
+        upsert = options['upsert']
+        self.unusable_password = make_password(None)
+        self.skipped = 0
+        if upsert:
+            self.checkpoint_path = options['checkpoint']
+            self.state = self.read_checkpoint(self.checkpoint_path)
+        loaded_files = []
+        for filename, model, renames, key in DATA_FILES:
+            if selected and filename not in selected:
+                continue
+            path = os.path.join(data_dir, filename)
+            if not os.path.exists(path):
+                raise CommandError(f'File not found: {path}')
+            if not upsert:
+                loaded, elapsed = self.load_file(
+                    path, model, renames, batch_size, database
+                )
+            else:
+                progress = self.get_progress(filename, path, options['force'])
+                if progress is None:
+                    continue
+                loaded, elapsed = self.upsert_file(
+                    path, model, renames, key, options, progress
+                )
+                progress['done'] = True
+                self.save_state()
+            loaded_files.append(filename)
+            rate = loaded / elapsed if elapsed else loaded
+            self.stdout.write(
+                f'{filename}: {loaded} rows in {elapsed:.2f}s '
+                f'({rate:.0f} rows/sec)'
+            )
+        if self.skipped:
+            self.stderr.write(f'Skipped {self.skipped} invalid rows')
+        if 'review.csv' in loaded_files:
+            call_command(
+                'recompute_ratings', database=database, stdout=self.stdout
+            )
+        self.stdout.write(self.style.SUCCESS('Import finished'))
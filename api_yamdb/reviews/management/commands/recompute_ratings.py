@@ -0,0 +1,42 @@
+"""Recompute stored title ratings."""
+from django.core.management.base import BaseCommand
+from django.db import DEFAULT_DB_ALIAS
+
+from reviews.models import Title
+
+
+class Command(BaseCommand):
+    """Пересчёт сохранённых рейтингов произведений."""
+
+    help = 'Rebuild rating, review_count and score_sum of titles in chunks'
+
+    def add_arguments(self, parser):
+        """Arguments for recompute_ratings command."""
+        parser.add_argument(
+            '--chunk-size', type=int, default=1000,
+            help='Number of titles recomputed per query batch',
+        )
+        parser.add_argument(
+            '--database', default=DEFAULT_DB_ALIAS,
+            help='Database alias to recompute ratings in',
+        )
+
+    def handle(self, *args, **options):
+        """Command body."""
+        chunk_size = options['chunk_size']
+        database = options['database']
+        last_id = 0
+        total = 0
+        while True:
+            title_ids = list(
+                Title.objects.using(database).filter(
+                    pk__gt=last_id
+                ).order_by('pk').values_list('pk', flat=True)[:chunk_size]
+            )
+            if not title_ids:
+                break
+            total += Title.recompute_scores(title_ids, using=database)
+            last_id = title_ids[-1]
+        self.stdout.write(
+            self.style.SUCCESS(f'Recomputed ratings for {total} titles')
+        )
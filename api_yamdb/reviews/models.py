@@ -4,7 +4,13 @@ from datetime import datetime
 from django.contrib.auth import get_user_model
 from django.core.validators import MaxValueValidator, MinValueValidator
 from django.db import models
-from django.db.models import UniqueConstraint
+from django.db.models import (
+    Case, Count, ExpressionWrapper, F, FloatField, Sum, UniqueConstraint, When
+)
+from django.db.models.functions import Cast
+from django.utils import timezone
+
+from .fields import CasefoldField
 
 User = get_user_model()
 
@@ -22,6 +28,7 @@ class Categories(models.Model):
         help_text='Добавьте уникальный ID для категории',
         unique=True
     )
+    name_casefold = CasefoldField(source='name', max_length=100)
 
     class Meta:
         """Meta for Categories."""
@@ -32,6 +39,15 @@ class Categories(models.Model):
         """__str__ for Categories."""
         return self.name
 
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        """Запомнить исходные название и слаг."""
+        instance = super().from_db(db, field_names, values)
+        instance._loaded_names = (
+            instance.__dict__.get('name'), instance.__dict__.get('slug')
+        )
+        return instance
+
 
 class Genres(models.Model):
     """Genres for reviews app."""
@@ -46,6 +62,7 @@ class Genres(models.Model):
         help_text='Добавьте уникальный ID для жанра',
         unique=True
     )
+    name_casefold = CasefoldField(source='name', max_length=100)
 
     class Meta:
         """Meta for Genres."""
@@ -56,6 +73,15 @@ class Genres(models.Model):
         """__str__ for Genres."""
         return self.name
 
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        """Запомнить исходные название и слаг."""
+        instance = super().from_db(db, field_names, values)
+        instance._loaded_names = (
+            instance.__dict__.get('name'), instance.__dict__.get('slug')
+        )
+        return instance
+
 
 class Title(models.Model):
     """Titles for reviews app."""
@@ -65,6 +91,7 @@ class Title(models.Model):
         verbose_name='Название произведения',
         help_text='Укажите название произведения'
     )
+    name_casefold = CasefoldField(source='name', max_length=255)
     year = models.PositiveSmallIntegerField(
         validators=[
             MaxValueValidator(datetime.now().year)
@@ -84,6 +111,32 @@ class Title(models.Model):
         null=True,
         related_name='titles'
     )
+    rating = models.FloatField(
+        null=True,
+        blank=True,
+        editable=False,
+        verbose_name='Рейтинг произведения',
+    )
+    review_count = models.PositiveIntegerField(
+        default=0,
+        editable=False,
+        verbose_name='Количество отзывов',
+    )
+    score_sum = models.PositiveIntegerField(
+        default=0,
+        editable=False,
+        verbose_name='Сумма оценок',
+    )
+    updated_at = models.DateTimeField(
+        auto_now=True,
+        db_index=True,
+        verbose_name='Дата изменения',
+    )
+    reviews_changed_at = models.DateTimeField(
+        default=timezone.now,
+        editable=False,
+        verbose_name='Дата изменения отзывов',
+    )
 
     class Meta:
         """Meta for Title."""
@@ -94,6 +147,67 @@ class Title(models.Model):
         """__str__ for Title."""
         return self.name
 
+    @staticmethod
+    def rating_expression():
+        """Выражение рейтинга из сохранённых агрегатов."""
+        return Case(
+            When(review_count=0, then=None),
+            default=ExpressionWrapper(
+                Cast('score_sum', FloatField()) / F('review_count'),
+                output_field=FloatField()
+            ),
+            output_field=FloatField()
+        )
+
+    @classmethod
+    def shift_score(cls, title_id, count_delta, score_delta):
+        """Инкрементально изменить агрегаты оценок произведения."""
+        now = timezone.now()
+        titles = cls.objects.filter(pk=title_id)
+        titles.update(
+            review_count=F('review_count') + count_delta,
+            score_sum=F('score_sum') + score_delta,
+            updated_at=now,
+            reviews_changed_at=now,
+        )
+        titles.update(rating=cls.rating_expression())
+
+    @classmethod
+    def touch_reviews(cls, title_id):
+        """Отметить изменение отзывов без изменения оценок."""
+        cls.objects.filter(pk=title_id).update(
+            reviews_changed_at=timezone.now()
+        )
+
+    @classmethod
+    def recompute_scores(cls, title_ids, using=None):
+        """Пересчитать агрегаты оценок для набора произведений."""
+        totals = {
+            row['title']: row
+            for row in Review.objects.using(using).filter(
+                title__in=title_ids
+            ).order_by().values('title').annotate(
+                count=Count('id'), total=Sum('score')
+            )
+        }
+        titles = list(
+            cls.objects.using(using).filter(pk__in=title_ids).only('pk')
+        )
+        now = timezone.now()
+        for title in titles:
+            title.updated_at = now
+            row = totals.get(title.pk, {'count': 0, 'total': 0})
+            title.review_count = row['count']
+            title.score_sum = row['total'] or 0
+            title.rating = (
+                title.score_sum / title.review_count
+                if title.review_count else None
+            )
+        cls.objects.using(using).bulk_update(
+            titles, ('review_count', 'score_sum', 'rating', 'updated_at')
+        )
+        return len(titles)
+
 
 class Review(models.Model):
     """Review for reviews app."""
@@ -122,16 +236,37 @@ class Review(models.Model):
         ],
     )
     pub_date = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(
+        auto_now=True,
+        verbose_name='Дата изменения',
+    )
+    comments_changed_at = models.DateTimeField(
+        default=timezone.now,
+        editable=False,
+        verbose_name='Дата изменения комментариев',
+    )
 
     class Meta:
         """Meta for Review model."""
 
-        ordering = ('pub_date',)
+        ordering = ('pub_date', 'id')
+        indexes = [
+            models.Index(fields=['title', 'pub_date', 'id'],
+                         name='review_title_pub_date_idx'),
+        ]
         constraints = [
             UniqueConstraint(fields=['author', 'title'],
                              name='unique_relationships'),
         ]
 
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        """Запомнить исходные оценку и произведение отзыва."""
+        instance = super().from_db(db, field_names, values)
+        instance._loaded_score = instance.__dict__.get('score')
+        instance._loaded_title_id = instance.__dict__.get('title_id')
+        return instance
+
 
 class Comments(models.Model):
     """Comments for reviews app."""
@@ -151,8 +286,16 @@ class Comments(models.Model):
         related_name='comments',
     )
     pub_date = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(
+        auto_now=True,
+        verbose_name='Дата изменения',
+    )
 
     class Meta:
         """Meta for Comments model."""
 
-        ordering = ('pub_date',)
+        ordering = ('pub_date', 'id')
+        indexes = [
+            models.Index(fields=['review', 'pub_date', 'id'],
+                         name='comment_review_pub_date_idx'),
+        ]
@@ -0,0 +1,107 @@
+"""Full-text search for titles."""
+import re
+
+from django.db import DatabaseError, connections
+from django.db.models import FloatField, Q
+from django.db.models.expressions import RawSQL
+
+from .models import Title
+
+FTS_TABLE = 'reviews_title_fts'
+TITLE_TABLE = Title._meta.db_table
+
+CREATE_SQL = (
+    f"CREATE VIRTUAL TABLE IF NOT EXISTS {FTS_TABLE} USING fts5("
+    f"name, description, content='{TITLE_TABLE}', content_rowid='id', "
+    f"tokenize='unicode61 remove_diacritics 2')",
+    f"CREATE TRIGGER IF NOT EXISTS {FTS_TABLE}_ai AFTER INSERT ON "
+    f"{TITLE_TABLE} BEGIN "
+    f"INSERT INTO {FTS_TABLE}(rowid, name, description) "
+    f"VALUES (new.id, new.name, new.description); END",
+    f"CREATE TRIGGER IF NOT EXISTS {FTS_TABLE}_ad AFTER DELETE ON "
+    f"{TITLE_TABLE} BEGIN "
+    f"INSERT INTO {FTS_TABLE}({FTS_TABLE}, rowid, name, description) "
+    f"VALUES ('delete', old.id, old.name, old.description); END",
+    f"CREATE TRIGGER IF NOT EXISTS {FTS_TABLE}_au AFTER UPDATE OF "
+    f"name, description ON {TITLE_TABLE} BEGIN "
+    f"INSERT INTO {FTS_TABLE}({FTS_TABLE}, rowid, name, description) "
+    f"VALUES ('delete', old.id, old.name, old.description); "
+    f"INSERT INTO {FTS_TABLE}(rowid, name, description) "
+    f"VALUES (new.id, new.name, new.description); END",
+)
+REBUILD_SQL = f"INSERT INTO {FTS_TABLE}({FTS_TABLE}) VALUES ('rebuild')"
+MATCH_SQL = (
+    f'{TITLE_TABLE}.id IN '
+    f'(SELECT rowid FROM {FTS_TABLE} WHERE {FTS_TABLE} MATCH %s)'
+)
+RANK_SQL = (
+    f'SELECT bm25({FTS_TABLE}) FROM {FTS_TABLE} '
+    f'WHERE {FTS_TABLE} MATCH %s AND rowid = {TITLE_TABLE}.id'
+)
+
+# Псевдонимы баз, в которых индекс уже найден.
+_available = set()
+
+
+def fts_available(connection):
+    """Есть ли в базе индекс полнотекстового поиска произведений."""
+    if connection.alias in _available:
+        return True
+    if connection.vendor != 'sqlite':
+        return False
+    with connection.cursor() as cursor:
+        cursor.execute(
+            "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = %s",
+            [FTS_TABLE]
+        )
+        if cursor.fetchone() is None:
+            return False
+    _available.add(connection.alias)
+    return True
+
+
+def create_search_index(connection):
+    """Создать индекс FTS5 и триггеры синхронизации с произведениями.
+
+    Возвращает False, если база не поддерживает FTS5.
+    """
+    if connection.vendor != 'sqlite':
+        return False
+    if fts_available(connection):
+        return True
+    try:
+        with connection.cursor() as cursor:
+            for sql in CREATE_SQL:
+                cursor.execute(sql)
+            cursor.execute(REBUILD_SQL)
+    except DatabaseError:
+        return False
+    return True
+
+
+def match_expression(query):
+    """Запрос FTS5 из пользовательской строки: префиксы всех слов."""
+    words = re.findall(r'\w+', query)
+    return ' '.join('"{}"*'.format(word) for word in words)
+
+
+def search_titles(queryset, query):
+    """Отфильтровать произведения по запросу, лучшие совпадения первыми.
+
+    Без FTS5 ищет вхождение строки в название или описание.
+    """
+    connection = connections[queryset.db]
+    expression = match_expression(query)
+    if not expression:
+        return queryset.none()
+    if not fts_available(connection):
+        return queryset.filter(
+            Q(name__icontains=query) | Q(description__icontains=query)
+        )
+    # RawSQL в `id__in` оборачивается в двойные скобки, и SQLite
+    # сравнивает id только с первой строкой подзапроса.
+    return queryset.extra(
+        where=[MATCH_SQL], params=[expression]
+    ).annotate(
+        search_rank=RawSQL(RANK_SQL, (expression,), output_field=FloatField())
+    ).order_by('search_rank', 'id')
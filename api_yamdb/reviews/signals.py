@@ -0,0 +1,107 @@
+"""Signals for Reviews app."""
+from django.db.models.signals import post_delete, post_save, pre_delete
+from django.dispatch import receiver
+from django.utils import timezone
+
+from .models import Categories, Comments, Genres, Review, Title, User
+
+
+@receiver(post_save, sender=Review)
+def review_saved(sender, instance, created, raw=False, **kwargs):
+    """Обновить агрегаты оценок после сохранения отзыва."""
+    if raw:
+        return
+    old_title_id = getattr(instance, '_loaded_title_id', None)
+    old_score = getattr(instance, '_loaded_score', None)
+    if created or old_title_id is None:
+        Title.shift_score(instance.title_id, 1, instance.score)
+    elif old_title_id != instance.title_id:
+        Title.shift_score(old_title_id, -1, -old_score)
+        Title.shift_score(instance.title_id, 1, instance.score)
+    elif old_score != instance.score:
+        Title.shift_score(instance.title_id, 0, instance.score - old_score)
+    else:
+        Title.touch_reviews(instance.title_id)
+    instance._loaded_score = instance.score
+    instance._loaded_title_id = instance.title_id
+
+
+@receiver(post_delete, sender=Review)
+def review_deleted(sender, instance, **kwargs):
+    """Обновить агрегаты оценок после удаления отзыва.
+
+    Срабатывает и при каскадном удалении пользователя или произведения.
+    """
+    title_id = getattr(instance, '_loaded_title_id', instance.title_id)
+    score = getattr(instance, '_loaded_score', instance.score)
+    Title.shift_score(title_id, -1, -score)
+
+
+@receiver(post_save, sender=Comments)
+@receiver(post_delete, sender=Comments)
+def comment_changed(sender, instance, raw=False, **kwargs):
+    """Отметить изменение комментариев отзыва."""
+    if raw:
+        return
+    Review.objects.filter(pk=instance.review_id).update(
+        comments_changed_at=timezone.now()
+    )
+
+
+@receiver(post_save, sender=Categories)
+@receiver(post_save, sender=Genres)
+def category_or_genre_saved(sender, instance, created, raw=False, **kwargs):
+    """Отметить изменение произведений при смене названия или слага.
+
+    Произведения выводят категорию и жанры вложенными объектами,
+    поэтому без этого их ETag подтверждал бы ответы со старым названием.
+    """
+    if raw or created:
+        return
+    names = (instance.name, instance.slug)
+    if getattr(instance, '_loaded_names', None) == names:
+        return
+    lookup = 'category' if sender is Categories else 'genre'
+    Title.objects.filter(**{lookup: instance}).update(
+        updated_at=timezone.now()
+    )
+    instance._loaded_names = names
+
+
+@receiver(pre_delete, sender=Categories)
+def category_deleted(sender, instance, **kwargs):
+    """Отметить изменение произведений удаляемой категории."""
+    Title.objects.filter(category=instance).update(updated_at=timezone.now())
+
+
+@receiver(pre_delete, sender=Genres)
+def genre_deleted(sender, instance, **kwargs):
+    """Отметить изменение произведений удаляемого жанра."""
+    Title.objects.filter(genre=instance).update(updated_at=timezone.now())
+
+
+@receiver(post_save, sender=User)
+def username_changed(sender, instance, created, raw=False,
+                     update_fields=None, **kwargs):
+    """Отметить изменение отзывов и комментариев при смене имени автора.
+
+    Имя автора выводится в отзывах и комментариях, поэтому их метки
+    изменения обновляются, чтобы не отдавать 304 со старым именем.
+    Если исходное имя неизвестно, метки обновляются на всякий случай.
+    """
+    if raw or created or (
+        update_fields is not None and 'username' not in update_fields
+    ):
+        return
+    if getattr(instance, '_loaded_username', None) == instance.username:
+        return
+    now = timezone.now()
+    Review.objects.filter(author=instance).update(updated_at=now)
+    Title.objects.filter(reviews__author=instance).update(
+        reviews_changed_at=now
+    )
+    Comments.objects.filter(author=instance).update(updated_at=now)
+    Review.objects.filter(comments__author=instance).update(
+        comments_changed_at=now
+    )
+    instance._loaded_username = instance.username
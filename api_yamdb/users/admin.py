@@ -1,6 +1,7 @@
 """Admin for Users app."""
 from django.contrib import admin
 
-from .models import User
+from .models import OutboxEmail, User
 
 admin.site.register(User)
+admin.site.register(OutboxEmail)
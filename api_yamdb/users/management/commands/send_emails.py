@@ -0,0 +1,129 @@
+"""Email outbox worker."""
+import time
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.mail import EmailMessage, get_connection
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.db.models import Q
+from django.utils import timezone
+
+from users.models import OutboxEmail
+
+
+class Command(BaseCommand):
+    """Отправка писем из очереди."""
+
+    help = 'Send queued emails in batches over one mail connection'
+
+    def add_arguments(self, parser):
+        """Arguments for send_emails command."""
+        parser.add_argument(
+            '--batch-size', type=int, default=100,
+            help='Number of emails claimed and sent per batch',
+        )
+        parser.add_argument(
+            '--loop', action='store_true',
+            help='Keep polling the outbox instead of exiting when empty',
+        )
+        parser.add_argument(
+            '--interval', type=float, default=5.0,
+            help='Seconds to wait between polls in --loop mode',
+        )
+
+    def claim(self, batch_size):
+        """Забрать пакет писем, готовых к отправке.
+
+        Письма помечаются как отправляемые с арендой: если обработчик
+        упадёт, после её истечения письма снова попадут в выборку.
+        """
+        now = timezone.now()
+        lease = timedelta(
+            seconds=getattr(settings, 'EMAIL_OUTBOX_LEASE', 300)
+        )
+        with transaction.atomic():
+            ids = list(
+                OutboxEmail.objects.select_for_update(
+                    skip_locked=True
+                ).filter(
+                    Q(status=OutboxEmail.PENDING)
+                    | Q(status=OutboxEmail.SENDING),
+                    next_attempt_at__lte=now,
+                ).order_by('next_attempt_at', 'id').values_list(
+                    'id', flat=True
+                )[:batch_size]
+            )
+            OutboxEmail.objects.filter(id__in=ids).update(
+                status=OutboxEmail.SENDING, next_attempt_at=now + lease
+            )
+        return list(OutboxEmail.objects.filter(id__in=ids))
+
+    def fail(self, email, error):
+        """Запланировать повтор с экспоненциальной задержкой."""
+        max_attempts = getattr(settings, 'EMAIL_OUTBOX_MAX_ATTEMPTS', 5)
+        retry_delay = getattr(settings, 'EMAIL_OUTBOX_RETRY_DELAY', 60)
+        email.attempts += 1
+        email.last_error = str(error)
+        if email.attempts >= max_attempts:
+            email.status = OutboxEmail.DEAD
+        else:
+            email.status = OutboxEmail.PENDING
+            email.next_attempt_at = timezone.now() + timedelta(
+                seconds=retry_delay * 2 ** (email.attempts - 1)
+            )
+        email.save(update_fields=(
+            'attempts', 'last_error', 'status', 'next_attempt_at'
+        ))
+
+    def send_batch(self, emails):
+        """Отправить пакет через одно соединение почтового бэкенда."""
+        sent = failed = 0
+        try:
+            connection = get_connection(fail_silently=False)
+            connection.open()
+        except Exception as error:
+            for email in emails:
+                self.fail(email, error)
+            return sent, len(emails)
+        try:
+            for email in emails:
+                message = EmailMessage(
+                    email.subject, email.body, email.from_email,
+                    [email.recipient], connection=connection,
+                )
+                try:
+                    message.send()
+                except Exception as error:
+                    self.fail(email, error)
+                    failed += 1
+                    continue
+                email.status = OutboxEmail.SENT
+                email.attempts += 1
+                email.sent_at = timezone.now()
+                email.save(update_fields=('status', 'attempts', 'sent_at'))
+                sent += 1
+        finally:
+            connection.close()
+        return sent, failed
+
+    def drain(self, batch_size):
+        """Отправлять пакеты, пока в очереди есть готовые письма."""
+        total_sent = total_failed = 0
+        while True:
+            emails = self.claim(batch_size)
+            if not emails:
+                return total_sent, total_failed
+            sent, failed = self.send_batch(emails)
+            total_sent += sent
+            total_failed += failed
+
+    def handle(self, *args, **options):
+        """Command body."""
+        while True:
+            sent, failed = self.drain(options['batch_size'])
+            if sent or failed:
+                self.stdout.write(f'Sent {sent} emails, {failed} failed')
+            if not options['loop']:
+                break
+            time.sleep(options['interval'])
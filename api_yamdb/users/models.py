@@ -2,6 +2,9 @@
 from django.contrib.auth.models import AbstractUser
 from django.core.validators import RegexValidator
 from django.db import models
+from django.utils import timezone
+
+from reviews.fields import CasefoldField
 
 
 class User(AbstractUser):
@@ -30,6 +33,7 @@ class User(AbstractUser):
         max_length=150,
         verbose_name='Имя пользователя',
     )
+    username_casefold = CasefoldField(source='username', max_length=150)
     email = models.EmailField(
         unique=True,
         max_length=254,
@@ -69,3 +73,82 @@ class User(AbstractUser):
     def __str__(self):
         """__str__ for User."""
         return self.username
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        """Запомнить исходное имя пользователя."""
+        instance = super().from_db(db, field_names, values)
+        instance._loaded_username = instance.__dict__.get('username')
+        return instance
+
+
+class OutboxEmail(models.Model):
+    """Письмо в очереди на отправку."""
+
+    PENDING = 'pending'
+    SENDING = 'sending'
+    SENT = 'sent'
+    DEAD = 'dead'
+
+    STATUS_CHOICES = (
+        (PENDING, 'Ожидает отправки'),
+        (SENDING, 'Отправляется'),
+        (SENT, 'Отправлено'),
+        (DEAD, 'Не доставлено'),
+    )
+
+    subject = models.CharField(
+        max_length=255,
+        verbose_name='Тема',
+    )
+    body = models.TextField(
+        verbose_name='Текст письма',
+    )
+    from_email = models.EmailField(
+        max_length=254,
+        verbose_name='Отправитель',
+    )
+    recipient = models.EmailField(
+        max_length=254,
+        verbose_name='Получатель',
+    )
+    status = models.CharField(
+        max_length=16,
+        choices=STATUS_CHOICES,
+        default=PENDING,
+        verbose_name='Статус',
+    )
+    attempts = models.PositiveSmallIntegerField(
+        default=0,
+        verbose_name='Попыток отправки',
+    )
+    next_attempt_at = models.DateTimeField(
+        default=timezone.now,
+        verbose_name='Следующая попытка',
+    )
+    last_error = models.TextField(
+        blank=True,
+        verbose_name='Последняя ошибка',
+    )
+    created_at = models.DateTimeField(
+        auto_now_add=True,
+        verbose_name='Дата создания',
+    )
+    sent_at = models.DateTimeField(
+        null=True,
+        blank=True,
+        verbose_name='Дата отправки',
+    )
+
+    class Meta:
+        """Meta for OutboxEmail."""
+
+        ordering = ('id',)
+        indexes = [
+            models.Index(fields=['status', 'next_attempt_at'],
+                         name='outbox_status_next_idx'),
+        ]
+
+    def __str__(self):
+        """__str__ for OutboxEmail."""
+        return f'{self.recipient}: {self.subject}'
@@ -0,0 +1,39 @@
+import pytest
+
+ROWS = 15
+
+
+@pytest.fixture
+def catalog(admin, django_user_model):
+    from reviews.models import Categories, Comments, Genres, Review, Title
+    categories = [
+        Categories.objects.create(name=f'Категория {i}', slug=f'category-{i}')
+        for i in range(ROWS)
+    ]
+    genres = [
+        Genres.objects.create(name=f'Жанр {i}', slug=f'genre-{i}')
+        for i in range(ROWS)
+    ]
+    titles = []
+    for i in range(ROWS):
+        title = Title.objects.create(
+            name=f'Произведение {i}', year=2000, description='Описание',
+            category=categories[i]
+        )
+        title.genre.set(genres[:3])
+        titles.append(title)
+    users = [
+        django_user_model.objects.create_user(
+            username=f'reader{i}', email=f'reader{i}@yamdb.fake'
+        )
+        for i in range(ROWS)
+    ]
+    reviews = [
+        Review.objects.create(title=titles[0], author=author, text='Текст', score=5)
+        for author in users
+    ]
+    comments = [
+        Comments.objects.create(review=reviews[0], author=author, text='Текст')
+        for author in users
+    ]
+    return titles, reviews, comments, users
@@ -0,0 +1,80 @@
+import os
+import traceback
+from contextlib import ContextDecorator
+
+import pytest
+from django.core.signals import request_started
+from django.db import connection
+
+SKIPPED_PATHS = (os.path.abspath(__file__), os.path.join('django', 'db', ''))
+
+
+def _call_site():
+    """Ближайшие к запросу кадры стека вне ORM и самого рекордера."""
+    frames = [
+        frame for frame in traceback.extract_stack()
+        if not any(path in frame.filename for path in SKIPPED_PATHS)
+    ]
+    return [f'{frame.filename}:{frame.lineno} in {frame.name}' for frame in frames[-4:]]
+
+
+class max_queries(ContextDecorator):
+    """Бюджет SQL-запросов на один HTTP-запрос.
+
+    Используется как контекстный менеджер или декоратор теста:
+    запросы к БД группируются по HTTP-запросам тестового клиента,
+    и каждый HTTP-запрос должен уложиться в бюджет.
+    Запросы вне HTTP-запросов (подготовка данных) не учитываются.
+    """
+
+    def __init__(self, budget):
+        self.budget = budget
+        self.requests = []
+
+    def _request_started(self, sender, environ=None, **kwargs):
+        environ = environ or {}
+        path = environ.get('PATH_INFO', '')
+        if environ.get('QUERY_STRING'):
+            path = f'{path}?{environ["QUERY_STRING"]}'
+        self.requests.append({
+            'request': f'{environ.get("REQUEST_METHOD", "")} {path}',
+            'queries': [],
+        })
+
+    def _execute(self, execute, sql, params, many, context):
+        if self.requests:
+            self.requests[-1]['queries'].append((sql, _call_site()))
+        return execute(sql, params, many, context)
+
+    def __enter__(self):
+        self.requests = []
+        request_started.connect(self._request_started)
+        self._wrapper = connection.execute_wrapper(self._execute)
+        self._wrapper.__enter__()
+        return self
+
+    def __exit__(self, exc_type, exc_value, tb):
+        self._wrapper.__exit__(exc_type, exc_value, tb)
+        request_started.disconnect(self._request_started)
+        if exc_type is None:
+            self.check()
+        return False
+
+    def check(self):
+        for recorded in self.requests:
+            queries = recorded['queries']
+            if len(queries) <= self.budget:
+                continue
+            lines = [
+                f'{recorded["request"]}: выполнено {len(queries)} SQL-запросов '
+                f'при бюджете {self.budget}'
+            ]
+            for number, (sql, call_site) in enumerate(queries, start=1):
+                lines.append(f'{number}. {sql}')
+                lines.extend(f'    {site}' for site in call_site)
+            pytest.fail('\n'.join(lines), pytrace=False)
+
+
+@pytest.fixture
+def query_budget():
+    return max_queries
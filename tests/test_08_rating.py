@@ -0,0 +1,59 @@
+import pytest
+from django.core.management import call_command
+
+from .common import auth_client, create_reviews
+
+
+class Test08TitleRating:
+
+    def get_title(self, client, title_id):
+        return client.get(f'/api/v1/titles/{title_id}/').json()
+
+    @pytest.mark.django_db(transaction=True)
+    def test_01_rating_incremental(self, admin_client, admin):
+        from reviews.models import Title
+        reviews, titles, user, moderator = create_reviews(admin_client, admin)
+        title = Title.objects.get(pk=titles[0]['id'])
+        assert (title.review_count, title.score_sum) == (3, 12), (
+            'Проверьте, что при создании отзыва обновляются `review_count` и `score_sum` произведения'
+        )
+        assert self.get_title(admin_client, titles[0]['id']).get('rating') == 4, (
+            'Проверьте, что `rating` произведения читается из сохранённого значения'
+        )
+        admin_client.patch(
+            f'/api/v1/titles/{titles[0]["id"]}/reviews/{reviews[0]["id"]}/', data={'score': 8}
+        )
+        assert self.get_title(admin_client, titles[0]['id']).get('rating') == 5, (
+            'Проверьте, что при изменении оценки отзыва пересчитывается `rating`'
+        )
+        auth_client(moderator).delete(f'/api/v1/titles/{titles[0]["id"]}/reviews/{reviews[2]["id"]}/')
+        assert self.get_title(admin_client, titles[0]['id']).get('rating') == 5.5, (
+            'Проверьте, что при удалении отзыва пересчитывается `rating`'
+        )
+        user.delete()
+        assert self.get_title(admin_client, titles[0]['id']).get('rating') == 8, (
+            'Проверьте, что при каскадном удалении пользователя пересчитывается `rating`'
+        )
+        admin_client.delete(f'/api/v1/titles/{titles[0]["id"]}/reviews/{reviews[0]["id"]}/')
+        data = self.get_title(admin_client, titles[0]['id'])
+        assert data.get('rating') is None, (
+            'Проверьте, что `rating` произведения без отзывов равен `None`'
+        )
+        assert 'score_sum' not in data and 'review_count' not in data, (
+            'Проверьте, что служебные агрегаты не попадают в ответ API'
+        )
+
+    @pytest.mark.django_db(transaction=True)
+    def test_02_recompute_command(self, admin_client, admin):
+        from reviews.models import Title
+        _, titles, _, _ = create_reviews(admin_client, admin)
+        Title.objects.update(rating=None, review_count=0, score_sum=0)
+        call_command('recompute_ratings', chunk_size=1)
+        title = Title.objects.get(pk=titles[0]['id'])
+        assert (title.review_count, title.score_sum, title.rating) == (3, 12, 4), (
+            'Проверьте, что команда `recompute_ratings` восстанавливает агрегаты оценок'
+        )
+        title = Title.objects.get(pk=titles[1]['id'])
+        assert (title.review_count, title.score_sum, title.rating) == (0, 0, None), (
+            'Проверьте, что команда `recompute_ratings` обнуляет агрегаты произведений без отзывов'
+        )
@@ -0,0 +1,55 @@
+import pytest
+
+from .fixtures.fixture_queries import max_queries
+
+# Бюджет SQL-запросов на один запрос к каждому маршруту `api/urls.py`.
+# Бюджет не зависит от размера страницы: каждая выборка данных заполняет
+# страницу целиком, поэтому N+1 сразу выходит за рамки.
+ROUTE_BUDGETS = {
+    'category': {'list': 3},
+    'genre': {'list': 3},
+    'title': {'list': 4, 'detail': 3},
+    'reviews': {'list': 4, 'detail': 3},
+    'comments': {'list': 4, 'detail': 3},
+    'users': {'list': 3, 'detail': 2},
+}
+
+
+class Test09QueryBudget:
+
+    def route_urls(self, titles, reviews, comments, users):
+        title_id, review_id = titles[0].id, reviews[0].id
+        reviews_url = f'/api/v1/titles/{title_id}/reviews/'
+        comments_url = f'{reviews_url}{review_id}/comments/'
+        return {
+            'category': {'list': '/api/v1/categories/'},
+            'genre': {'list': '/api/v1/genres/'},
+            'title': {'list': '/api/v1/titles/', 'detail': f'/api/v1/titles/{title_id}/'},
+            'reviews': {'list': reviews_url, 'detail': f'{reviews_url}{review_id}/'},
+            'comments': {'list': comments_url, 'detail': f'{comments_url}{comments[0].id}/'},
+            'users': {'list': '/api/v1/users/', 'detail': f'/api/v1/users/{users[0].username}/'},
+        }
+
+    def test_01_all_routes_have_budget(self):
+        from api.urls import v1_router
+        basenames = {basename for _, _, basename in v1_router.registry}
+        assert basenames == set(ROUTE_BUDGETS), (
+            'Проверьте, что для каждого маршрута `api/urls.py` объявлен бюджет SQL-запросов'
+        )
+
+    @pytest.mark.django_db(transaction=True)
+    def test_02_routes_within_budget(self, admin_client, catalog, query_budget):
+        urls = self.route_urls(*catalog)
+        for basename, budgets in ROUTE_BUDGETS.items():
+            for action, budget in budgets.items():
+                with query_budget(budget):
+                    response = admin_client.get(urls[basename][action])
+                assert response.status_code == 200, (
+                    f'Проверьте, что GET запрос `{urls[basename][action]}` возвращает статус 200'
+                )
+
+    @pytest.mark.django_db(transaction=True)
+    @max_queries(ROUTE_BUDGETS['title']['list'])
+    def test_03_decorator(self, admin_client, catalog):
+        admin_client.get('/api/v1/titles/')
+        admin_client.get('/api/v1/titles/?genre=genre-1')
@@ -0,0 +1,64 @@
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+from .fixtures.fixture_catalog import ROWS
+
+
+class Test10KeysetPagination:
+
+    def walk(self, client, url):
+        ids, pages = [], 0
+        while url:
+            response = client.get(url)
+            assert response.status_code == 200, (
+                f'Проверьте, что GET запрос `{url}` возвращает статус 200'
+            )
+            data = response.json()
+            assert 'count' not in data, (
+                'Проверьте, что в курсорном режиме не возвращается `count`'
+            )
+            ids.extend(item['id'] for item in data['results'])
+            url, pages = data['next'], pages + 1
+        return ids, pages
+
+    @pytest.mark.django_db(transaction=True)
+    def test_01_reviews_cursor(self, client, catalog):
+        titles, reviews, _, _ = catalog
+        ids, pages = self.walk(client, f'/api/v1/titles/{titles[0].id}/reviews/?cursor=')
+        assert ids == [review.id for review in reviews], (
+            'Проверьте, что курсорная пагинация отзывов возвращает все отзывы по (pub_date, id)'
+        )
+        assert pages == 2, (
+            'Проверьте, что курсорная пагинация отзывов использует размер страницы `PAGE_SIZE`'
+        )
+
+    @pytest.mark.django_db(transaction=True)
+    def test_02_comments_cursor_without_count(self, client, catalog):
+        titles, reviews, comments, _ = catalog
+        url = f'/api/v1/titles/{titles[0].id}/reviews/{reviews[0].id}/comments/?cursor='
+        next_url = client.get(url).json()['next']
+        with CaptureQueriesContext(connection) as context:
+            data = client.get(next_url).json()
+        assert [item['id'] for item in data['results']] == [comment.id for comment in comments[10:]], (
+            'Проверьте, что курсор комментариев указывает на следующую страницу'
+        )
+        assert not any('COUNT' in query['sql'] for query in context.captured_queries), (
+            'Проверьте, что в курсорном режиме не выполняется запрос `COUNT(*)`'
+        )
+        previous = client.get(data['previous']).json()
+        assert [item['id'] for item in previous['results']] == [comment.id for comment in comments[:10]], (
+            'Проверьте, что ссылка `previous` возвращает предыдущую страницу'
+        )
+
+    @pytest.mark.django_db(transaction=True)
+    def test_03_page_number_by_default(self, client, catalog):
+        titles, _, _, _ = catalog
+        data = client.get(f'/api/v1/titles/{titles[0].id}/reviews/').json()
+        assert data['count'] == ROWS, (
+            'Проверьте, что без параметра `cursor` используется постраничная пагинация'
+        )
+        response = client.get(f'/api/v1/titles/{titles[0].id}/reviews/?cursor=broken')
+        assert response.status_code == 404, (
+            'Проверьте, что при неверном курсоре возвращается статус 404'
+        )
@@ -0,0 +1,117 @@
+import csv
+import json
+import os
+import shutil
+from io import StringIO
+
+import pytest
+from django.core.management import call_command
+
+from .conftest import MANAGE_PATH
+
+DATA_DIR = os.path.join(MANAGE_PATH, 'static', 'data')
+
+
+def csv_rows(filename):
+    with open(os.path.join(DATA_DIR, filename), encoding='utf8', newline='') as source:
+        return list(csv.DictReader(source))
+
+
+class Test11Import:
+
+    @pytest.mark.django_db(transaction=True)
+    def test_01_import_all_files(self, django_user_model):
+        from reviews.models import Categories, Comments, Genres, Review, Title
+        out = StringIO()
+        call_command('import', batch_size=7, stdout=out)
+        for filename, model in (
+            ('users.csv', django_user_model),
+            ('category.csv', Categories),
+            ('genre.csv', Genres),
+            ('titles.csv', Title),
+            ('genre_title.csv', Title.genre.through),
+            ('review.csv', Review),
+            ('comments.csv', Comments),
+        ):
+            assert model.objects.count() == len(csv_rows(filename)), (
+                f'Проверьте, что команда `import` загружает все строки `{filename}`'
+            )
+            assert f'{filename}: ' in out.getvalue(), (
+                f'Проверьте, что команда `import` сообщает скорость загрузки `{filename}`'
+            )
+        review = csv_rows('review.csv')[0]
+        assert Review.objects.get(pk=review['id']).pub_date.isoformat().startswith(review['pub_date'][:19]), (
+            'Проверьте, что команда `import` сохраняет `pub_date` из файла'
+        )
+        scores = [int(row['score']) for row in csv_rows('review.csv') if row['title_id'] == '1']
+        assert Title.objects.get(pk=1).rating == sum(scores) / len(scores), (
+            'Проверьте, что после загрузки отзывов пересчитывается `rating` произведений'
+        )
+
+    def copy_data(self, tmp_path):
+        data_dir = tmp_path / 'data'
+        shutil.copytree(DATA_DIR, data_dir)
+        return data_dir
+
+    def upsert(self, data_dir, tmp_path, *files):
+        out, err = StringIO(), StringIO()
+        call_command(
+            'import', upsert=True, data_dir=str(data_dir), files=list(files) or None,
+            checkpoint=str(tmp_path / 'checkpoint.json'), batch_size=10, stdout=out, stderr=err
+        )
+        return out.getvalue(), err.getvalue()
+
+    @pytest.mark.django_db(transaction=True)
+    def test_02_upsert_is_repeatable(self, tmp_path):
+        from reviews.models import Genres, Review
+        data_dir = self.copy_data(tmp_path)
+        self.upsert(data_dir, tmp_path)
+        out, _ = self.upsert(data_dir, tmp_path)
+        assert 'genre.csv: unchanged, skipped' in out, (
+            'Проверьте, что `import --upsert` пропускает файлы, содержимое которых не изменилось'
+        )
+        with open(data_dir / 'genre.csv', 'a', encoding='utf8') as target:
+            target.write('\n99,Новый жанр,drama\n')
+        self.upsert(data_dir, tmp_path, 'genre.csv')
+        assert Genres.objects.count() == len(csv_rows('genre.csv')), (
+            'Проверьте, что `import --upsert` не создаёт дубликаты по естественному ключу `slug`'
+        )
+        assert Genres.objects.get(slug='drama').name == 'Новый жанр', (
+            'Проверьте, что `import --upsert` обновляет существующие строки'
+        )
+        assert Review.objects.count() == len(csv_rows('review.csv')), (
+            'Проверьте, что повторный `import --upsert` не дублирует отзывы'
+        )
+
+    @pytest.mark.django_db(transaction=True)
+    def test_03_upsert_skips_bad_rows_and_resumes(self, tmp_path):
+        from reviews.models import Categories, Review
+        data_dir = self.copy_data(tmp_path)
+        self.upsert(data_dir, tmp_path, 'users.csv', 'category.csv', 'genre.csv', 'titles.csv')
+        with open(data_dir / 'review.csv', 'a', encoding='utf8') as target:
+            target.write('\n9999,1,Отзыв без автора,123456,5,2020-01-01T00:00:00Z')
+            target.write('\n9998,1,Отзыв с ошибкой,100,десять,2020-01-01T00:00:00Z\n')
+        _, err = self.upsert(data_dir, tmp_path, 'review.csv')
+        assert Review.objects.count() == len(csv_rows('review.csv')), (
+            'Проверьте, что `import --upsert` пропускает некорректные строки и загружает остальные'
+        )
+        assert 'Skipped 2 invalid rows' in err, (
+            'Проверьте, что `import --upsert` сообщает о пропущенных строках'
+        )
+
+        checkpoint = tmp_path / 'checkpoint.json'
+        state = json.loads(checkpoint.read_text())
+        state['category.csv'].update(rows=2, done=False)
+        checkpoint.write_text(json.dumps(state))
+        Categories.objects.filter(slug='music').delete()
+        Categories.objects.filter(slug='movie').update(name='Кино')
+        out, _ = self.upsert(data_dir, tmp_path, 'category.csv')
+        assert 'resuming after record 2' in out, (
+            'Проверьте, что `import --upsert` продолжает прерванную загрузку с контрольной точки'
+        )
+        assert Categories.objects.filter(slug='music').exists(), (
+            'Проверьте, что после возобновления загружаются оставшиеся строки'
+        )
+        assert Categories.objects.get(slug='movie').name == 'Кино', (
+            'Проверьте, что после возобновления не перечитываются уже зафиксированные строки'
+        )
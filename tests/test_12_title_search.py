@@ -0,0 +1,54 @@
+import pytest
+
+from .common import create_titles
+
+
+class Test12TitleSearch:
+
+    @pytest.mark.django_db(transaction=True)
+    def test_01_search_ranked(self, admin_client):
+        titles, _, _ = create_titles(admin_client)
+        response = admin_client.post('/api/v1/titles/', data={
+            'name': 'Драма о драме', 'year': 2001, 'genre': ['drama'], 'category': 'films',
+            'description': 'Драма, драма и ещё раз драма'
+        })
+        assert response.status_code == 201, (
+            'Проверьте, что при POST запросе `/api/v1/titles/` с правильными данными возвращает статус 201'
+        )
+        response = admin_client.get('/api/v1/titles/?q=драма')
+        assert response.status_code == 200, (
+            'Проверьте, что GET запрос `/api/v1/titles/?q=` возвращает статус 200'
+        )
+        names = [title['name'] for title in response.json()['results']]
+        assert names == ['Драма о драме', 'Проект'], (
+            'Проверьте, что поиск `?q=` находит совпадения в названии и описании '
+            'и упорядочивает их по релевантности'
+        )
+        response = admin_client.get('/api/v1/titles/?q=повор')
+        assert [title['id'] for title in response.json()['results']] == [titles[0]['id']], (
+            'Проверьте, что поиск `?q=` находит произведения по началу слова без учёта регистра'
+        )
+
+    @pytest.mark.django_db(transaction=True)
+    def test_02_search_index_in_sync(self, admin_client):
+        titles, _, _ = create_titles(admin_client)
+        admin_client.patch(f'/api/v1/titles/{titles[0]["id"]}/', data={'name': 'Ёлка'})
+        response = admin_client.get('/api/v1/titles/?q=ёлка')
+        assert response.json()['count'] == 1, (
+            'Проверьте, что индекс поиска обновляется при изменении произведения'
+        )
+        admin_client.delete(f'/api/v1/titles/{titles[0]["id"]}/')
+        response = admin_client.get('/api/v1/titles/?q=ёлка')
+        assert response.json()['count'] == 0, (
+            'Проверьте, что индекс поиска обновляется при удалении произведения'
+        )
+
+    @pytest.mark.django_db(transaction=True)
+    def test_03_search_without_fts(self, admin_client, monkeypatch):
+        from reviews import search
+        titles, _, _ = create_titles(admin_client)
+        monkeypatch.setattr(search, 'fts_available', lambda connection: False)
+        response = admin_client.get('/api/v1/titles/?q=пике')
+        assert [title['id'] for title in response.json()['results']] == [titles[0]['id']], (
+            'Проверьте, что без FTS5 поиск `?q=` ищет вхождение в название и описание'
+        )
@@ -0,0 +1,52 @@
+import pytest
+from django.core.management import call_command
+
+from .common import create_titles
+
+
+class Test13CasefoldSearch:
+
+    @pytest.mark.django_db(transaction=True)
+    def test_01_cyrillic_case_insensitive(self, admin_client, admin):
+        create_titles(admin_client)
+        response = admin_client.get('/api/v1/titles/?name=пОВОРОТ')
+        assert len(response.json()['results']) == 1, (
+            'Проверьте, что фильтр `name` для `/api/v1/titles/` ищет по началу названия без учёта регистра кириллицы'
+        )
+        response = admin_client.get('/api/v1/categories/?search=книги')
+        assert [item['slug'] for item in response.json()['results']] == ['books'], (
+            'Проверьте, что поиск `/api/v1/categories/?search=` не зависит от регистра кириллицы'
+        )
+        response = admin_client.get('/api/v1/genres/?search=УЖАСЫ')
+        assert [item['slug'] for item in response.json()['results']] == ['horror'], (
+            'Проверьте, что поиск `/api/v1/genres/?search=` не зависит от регистра кириллицы'
+        )
+        response = admin_client.get('/api/v1/users/?search=testad')
+        assert [item['username'] for item in response.json()['results']] == [admin.username], (
+            'Проверьте, что поиск `/api/v1/users/?search=` ищет по началу имени без учёта регистра'
+        )
+
+    @pytest.mark.django_db
+    def test_02_prefix_uses_index(self):
+        from api.filters import casefold_lookup
+        from reviews.models import Title
+        from django.db import connection
+        queryset = Title.objects.filter(casefold_lookup('^name_casefold', 'пов'))
+        sql, params = queryset.query.sql_with_params()
+        with connection.cursor() as cursor:
+            cursor.execute(f'EXPLAIN QUERY PLAN {sql}', params)
+            plan = ' '.join(str(row) for row in cursor.fetchall())
+        assert 'name_casefold' in plan and 'INDEX' in plan, (
+            'Проверьте, что поиск по префиксу использует индекс casefold-колонки'
+        )
+
+    @pytest.mark.django_db(transaction=True)
+    def test_03_import_fills_casefold(self, django_user_model):
+        from reviews.models import Genres
+        call_command('import', files=['users.csv', 'genre.csv'])
+        assert Genres.objects.get(slug='drama').name_casefold == 'драма', (
+            'Проверьте, что команда `import` заполняет casefold-колонки'
+        )
+        assert django_user_model.objects.filter(username_casefold='bingobongo').exists(), (
+            'Проверьте, что команда `import` заполняет `username_casefold`'
+        )
@@ -0,0 +1,61 @@
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+from .common import create_categories, create_genre
+
+
+class Test14ResponseCache:
+
+    @pytest.mark.django_db(transaction=True)
+    def test_01_categories_cached_until_change(self, client, admin_client):
+        from api.cache import response_cache
+        create_categories(admin_client)
+        response_cache.stats.reset()
+        assert client.get('/api/v1/categories/')['X-Cache'] == 'MISS', (
+            'Проверьте, что первый GET запрос `/api/v1/categories/` не берётся из кэша'
+        )
+        with CaptureQueriesContext(connection) as context:
+            response = client.get('/api/v1/categories/')
+        assert response['X-Cache'] == 'HIT' and response.json()['count'] == 2, (
+            'Проверьте, что повторный GET запрос `/api/v1/categories/` возвращается из кэша'
+        )
+        assert len(context.captured_queries) == 0, (
+            'Проверьте, что ответ из кэша не обращается к базе данных'
+        )
+        assert client.get('/api/v1/categories/?search=книги')['X-Cache'] == 'MISS', (
+            'Проверьте, что ключ кэша учитывает параметры запроса'
+        )
+        admin_client.post('/api/v1/categories/', data={'name': 'Музыка', 'slug': 'music'})
+        response = client.get('/api/v1/categories/')
+        assert response['X-Cache'] == 'MISS' and response.json()['count'] == 3, (
+            'Проверьте, что создание категории сбрасывает кэш списка'
+        )
+        admin_client.delete('/api/v1/categories/music/')
+        assert client.get('/api/v1/categories/').json()['count'] == 2, (
+            'Проверьте, что удаление категории сбрасывает кэш списка'
+        )
+        assert response_cache.stats.as_dict()['hits'] == 1, (
+            'Проверьте, что счётчик попаданий кэша учитывает ответы из кэша'
+        )
+
+    @pytest.mark.django_db(transaction=True)
+    def test_02_genres_versioned_separately(self, client, admin_client):
+        create_genre(admin_client)
+        client.get('/api/v1/genres/')
+        admin_client.post('/api/v1/categories/', data={'name': 'Музыка', 'slug': 'music'})
+        assert client.get('/api/v1/genres/')['X-Cache'] == 'HIT', (
+            'Проверьте, что изменение категорий не сбрасывает кэш жанров'
+        )
+
+    @pytest.mark.django_db
+    def test_03_links_per_origin(self, client, catalog):
+        client.get('/api/v1/genres/')
+        response = client.get('/api/v1/genres/', HTTP_HOST='api.example.com', secure=True)
+        assert response['X-Cache'] == 'MISS', (
+            'Проверьте, что ключ кэша учитывает схему и хост запроса'
+        )
+        assert response.json()['next'].startswith('https://api.example.com/'), (
+            'Проверьте, что ссылки из кэша указывают на адрес запроса'
+        )
+        assert client.get('/api/v1/genres/')['X-Cache'] == 'HIT'
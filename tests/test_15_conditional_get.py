@@ -0,0 +1,119 @@
+import time
+
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+from .common import auth_client, create_comments
+
+
+class Test15ConditionalGet:
+
+    def assert_not_modified(self, client, url, max_queries):
+        response = client.get(url)
+        assert response.status_code == 200 and response.has_header('ETag'), (
+            f'Проверьте, что GET запрос `{url}` возвращает заголовок `ETag`'
+        )
+        assert response.has_header('Last-Modified'), (
+            f'Проверьте, что GET запрос `{url}` возвращает заголовок `Last-Modified`'
+        )
+        etag = response['ETag']
+        with CaptureQueriesContext(connection) as context:
+            response = client.get(url, HTTP_IF_NONE_MATCH=etag)
+        assert response.status_code == 304 and not response.content, (
+            f'Проверьте, что GET запрос `{url}` с совпавшим `If-None-Match` возвращает статус 304'
+        )
+        assert len(context.captured_queries) <= max_queries, (
+            f'Проверьте, что ответ 304 для `{url}` не выбирает и не сериализует данные'
+        )
+        return etag
+
+    @pytest.mark.django_db(transaction=True)
+    def test_01_title_detail(self, client, admin_client, admin):
+        comments, reviews, titles, user, moderator = create_comments(admin_client, admin)
+        url = f'/api/v1/titles/{titles[0]["id"]}/'
+        etag = self.assert_not_modified(client, url, 1)
+        admin_client.patch(f'{url}reviews/{reviews[0]["id"]}/', data={'score': 1})
+        response = client.get(url, HTTP_IF_NONE_MATCH=etag)
+        assert response.status_code == 200, (
+            'Проверьте, что после изменения оценки отзыва `ETag` произведения меняется'
+        )
+        last_modified = response['Last-Modified']
+        response = client.get(url, HTTP_IF_MODIFIED_SINCE=last_modified)
+        assert response.status_code == 304, (
+            'Проверьте, что GET запрос с актуальным `If-Modified-Since` возвращает статус 304'
+        )
+
+    @pytest.mark.django_db(transaction=True)
+    def test_02_reviews_and_comments(self, client, admin_client, admin):
+        comments, reviews, titles, user, moderator = create_comments(admin_client, admin)
+        reviews_url = f'/api/v1/titles/{titles[0]["id"]}/reviews/'
+        comments_url = f'{reviews_url}{reviews[0]["id"]}/comments/'
+        reviews_etag = self.assert_not_modified(client, reviews_url, 1)
+        comments_etag = self.assert_not_modified(client, comments_url, 1)
+        self.assert_not_modified(client, f'{reviews_url}{reviews[0]["id"]}/', 2)
+        self.assert_not_modified(client, f'{comments_url}{comments[0]["id"]}/', 2)
+
+        time.sleep(0.001)
+        admin_client.patch(f'{reviews_url}{reviews[0]["id"]}/', data={'text': 'Новый текст'})
+        assert client.get(reviews_url, HTTP_IF_NONE_MATCH=reviews_etag).status_code == 200, (
+            'Проверьте, что изменение текста отзыва меняет `ETag` списка отзывов'
+        )
+        admin_client.delete(f'{comments_url}{comments[0]["id"]}/')
+        response = client.get(comments_url, HTTP_IF_NONE_MATCH=comments_etag)
+        assert response.status_code == 200 and response.json()['count'] == 2, (
+            'Проверьте, что удаление комментария меняет `ETag` списка комментариев'
+        )
+
+    @pytest.mark.django_db(transaction=True)
+    def test_03_author_renamed(self, client, admin_client, admin):
+        comments, reviews, titles, user, moderator = create_comments(admin_client, admin)
+        reviews_url = f'/api/v1/titles/{titles[0]["id"]}/reviews/'
+        comments_url = f'{reviews_url}{reviews[0]["id"]}/comments/'
+        urls = (
+            reviews_url, f'{reviews_url}{reviews[1]["id"]}/',
+            comments_url, f'{comments_url}{comments[1]["id"]}/',
+        )
+        etags = {url: client.get(url)['ETag'] for url in urls}
+        user_client = auth_client(user)
+        time.sleep(0.001)
+        assert user_client.patch('/api/v1/users/me/', data={'bio': 'О себе'}).status_code == 200
+        assert client.get(reviews_url, HTTP_IF_NONE_MATCH=etags[reviews_url]).status_code == 304, (
+            'Проверьте, что изменение профиля без смены имени не меняет `ETag` отзывов'
+        )
+        response = user_client.patch('/api/v1/users/me/', data={'username': 'renamed'})
+        assert response.status_code == 200
+        for url, etag in etags.items():
+            response = client.get(url, HTTP_IF_NONE_MATCH=etag)
+            assert response.status_code == 200 and 'renamed' in response.content.decode(), (
+                f'Проверьте, что смена имени автора меняет `ETag` для `{url}`'
+            )
+
+    @pytest.mark.django_db
+    def test_04_category_and_genre_renamed(self, client, catalog):
+        from reviews.models import Categories, Genres
+        titles = catalog[0]
+        urls = [f'/api/v1/titles/{title.id}/' for title in titles[:2]]
+        etags = [client.get(url)['ETag'] for url in urls]
+        time.sleep(0.001)
+        category = Categories.objects.get(slug='category-0')
+        category.save()
+        assert client.get(urls[0], HTTP_IF_NONE_MATCH=etags[0]).status_code == 304, (
+            'Проверьте, что сохранение категории без изменений не меняет `ETag`'
+        )
+        category.name = 'Переименована'
+        category.save()
+        response = client.get(urls[0], HTTP_IF_NONE_MATCH=etags[0])
+        assert response.status_code == 200, (
+            'Проверьте, что переименование категории меняет `ETag` её произведений'
+        )
+        assert response.json()['category']['name'] == 'Переименована'
+        assert client.get(urls[1], HTTP_IF_NONE_MATCH=etags[1]).status_code == 304
+        etag = client.get(urls[1])['ETag']
+        time.sleep(0.001)
+        genre = Genres.objects.get(slug='genre-0')
+        genre.slug = 'renamed'
+        genre.save()
+        assert client.get(urls[1], HTTP_IF_NONE_MATCH=etag).status_code == 200, (
+            'Проверьте, что смена слага жанра меняет `ETag` его произведений'
+        )
@@ -0,0 +1,51 @@
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+from .common import auth_client
+
+
+class Test16AuthUserCache:
+
+    def user_queries(self, client, url):
+        with CaptureQueriesContext(connection) as context:
+            response = client.get(url)
+        queries = [query['sql'] for query in context.captured_queries if 'FROM "users_user"' in query['sql']]
+        return response, queries
+
+    @pytest.mark.django_db(transaction=True)
+    def test_01_user_loaded_once(self, admin_client):
+        admin_client.get('/api/v1/categories/')
+        response, queries = self.user_queries(admin_client, '/api/v1/categories/?page=1')
+        assert response.status_code == 200 and not queries, (
+            'Проверьте, что при повторном запросе пользователь берётся из кэша аутентификации'
+        )
+
+    @pytest.mark.django_db(transaction=True)
+    def test_02_role_change_invalidates(self, admin_client, user):
+        client = auth_client(user)
+        assert client.get('/api/v1/users/').status_code == 403, (
+            'Проверьте, что обычный пользователь не имеет доступа к `/api/v1/users/`'
+        )
+        admin_client.patch(f'/api/v1/users/{user.username}/', data={'role': 'admin'})
+        assert client.get('/api/v1/users/').status_code == 200, (
+            'Проверьте, что изменение роли через `/api/v1/users/{username}/` сбрасывает кэш пользователя'
+        )
+        admin_client.delete(f'/api/v1/users/{user.username}/')
+        assert client.get('/api/v1/users/').status_code == 401, (
+            'Проверьте, что удалённый пользователь не проходит аутентификацию из кэша'
+        )
+
+    @pytest.mark.django_db(transaction=True)
+    def test_03_me_with_cached_user(self, user):
+        client = auth_client(user)
+        client.get('/api/v1/users/me/')
+        response = client.patch('/api/v1/users/me/', data={'first_name': 'Имя'})
+        data = response.json()
+        assert data['email'] == user.email and data['bio'] == user.bio and data['first_name'] == 'Имя', (
+            'Проверьте, что `/api/v1/users/me/` возвращает полный профиль при пользователе из кэша'
+        )
+        user.refresh_from_db()
+        assert user.bio == 'user bio' and user.first_name == 'Имя', (
+            'Проверьте, что PATCH `/api/v1/users/me/` не затирает поля пользователя'
+        )
@@ -0,0 +1,65 @@
+import os
+from datetime import timedelta
+from unittest import mock
+
+import pytest
+from django.core.management import call_command
+from django.utils import timezone
+
+
+class Test17EmailOutbox:
+
+    @pytest.mark.django_db(transaction=True)
+    def test_01_signup_enqueues_and_worker_sends(self, client, settings, tmp_path):
+        from users.models import OutboxEmail
+        settings.EMAIL_BACKEND = 'django.core.mail.backends.filebased.EmailBackend'
+        settings.EMAIL_FILE_PATH = str(tmp_path)
+        for number in range(3):
+            response = client.post('/api/v1/auth/signup/', data={
+                'email': f'user{number}@yamdb.fake', 'username': f'user{number}'
+            })
+            assert response.status_code == 200
+        assert OutboxEmail.objects.filter(status=OutboxEmail.PENDING).count() == 3, (
+            'Проверьте, что `/api/v1/auth/signup/` ставит письмо в очередь, а не отправляет его в запросе'
+        )
+        assert not os.listdir(tmp_path), (
+            'Проверьте, что письмо не отправляется во время запроса регистрации'
+        )
+        call_command('send_emails', batch_size=2)
+        assert OutboxEmail.objects.filter(status=OutboxEmail.SENT).count() == 3, (
+            'Проверьте, что команда `send_emails` отправляет все письма из очереди'
+        )
+        content = ''.join(open(tmp_path / name).read() for name in os.listdir(tmp_path))
+        for number in range(3):
+            assert f'user{number}@yamdb.fake' in content, (
+                'Проверьте, что письмо с кодом подтверждения доставляется получателю'
+            )
+        assert content.count('Код подтверждения:') == 3
+
+    @pytest.mark.django_db(transaction=True)
+    def test_02_retry_backoff_and_dead_letter(self, settings):
+        from users.models import OutboxEmail
+        settings.EMAIL_OUTBOX_MAX_ATTEMPTS = 2
+        email = OutboxEmail.objects.create(
+            subject='Тема', body='Текст', from_email='admin@yamdb.fake', recipient='user@yamdb.fake'
+        )
+        with mock.patch('django.core.mail.EmailMessage.send', side_effect=OSError('SMTP down')):
+            call_command('send_emails')
+            email.refresh_from_db()
+            assert email.status == OutboxEmail.PENDING and email.attempts == 1, (
+                'Проверьте, что после ошибки отправки письмо остаётся в очереди для повтора'
+            )
+            assert email.next_attempt_at > timezone.now() + timedelta(seconds=30), (
+                'Проверьте, что повтор откладывается с задержкой'
+            )
+            call_command('send_emails')
+            email.refresh_from_db()
+            assert email.attempts == 1, (
+                'Проверьте, что письмо не отправляется повторно до истечения задержки'
+            )
+            OutboxEmail.objects.update(next_attempt_at=timezone.now())
+            call_command('send_emails')
+        email.refresh_from_db()
+        assert email.status == OutboxEmail.DEAD and 'SMTP down' in email.last_error, (
+            'Проверьте, что после исчерпания попыток письмо переходит в состояние `dead`'
+        )
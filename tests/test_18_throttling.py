@@ -0,0 +1,96 @@
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+from .common import auth_client, create_reviews
+
+
+class Test18Throttling:
+
+    @pytest.mark.django_db(transaction=True)
+    def test_01_signup_throttled(self, client, settings):
+        from users.models import OutboxEmail
+        settings.API_THROTTLE_RATES = {'signup': '2/min'}
+        for number in range(2):
+            response = client.post('/api/v1/auth/signup/', data={
+                'email': f'user{number}@yamdb.fake', 'username': f'user{number}'
+            })
+            assert response.status_code == 200
+        with CaptureQueriesContext(connection) as context:
+            response = client.post('/api/v1/auth/signup/', data={
+                'email': 'user3@yamdb.fake', 'username': 'user3'
+            })
+        assert response.status_code == 429, (
+            'Проверьте, что частые запросы к `/api/v1/auth/signup/` ограничиваются со статусом 429'
+        )
+        assert 25 <= int(response['Retry-After']) <= 30, (
+            'Проверьте, что ответ 429 содержит заголовок `Retry-After`'
+        )
+        assert not context.captured_queries, (
+            'Проверьте, что отклонённый запрос не обращается к базе данных'
+        )
+        assert OutboxEmail.objects.count() == 2
+        response = client.post(
+            '/api/v1/auth/signup/', data={'email': 'user5@yamdb.fake', 'username': 'user5'},
+            HTTP_X_FORWARDED_FOR='203.0.113.7'
+        )
+        assert response.status_code == 429, (
+            'Проверьте, что подменённый `X-Forwarded-For` не сбрасывает ограничение'
+        )
+        response = client.post(
+            '/api/v1/auth/signup/', data={'email': 'user4@yamdb.fake', 'username': 'user4'},
+            REMOTE_ADDR='10.0.0.2'
+        )
+        assert response.status_code == 200, (
+            'Проверьте, что ограничение для анонимных запросов считается по IP-адресу'
+        )
+
+    @pytest.mark.django_db(transaction=True)
+    def test_02_writes_throttled_per_user(self, settings, admin_client, admin):
+        settings.API_THROTTLE_RATES = {'comments': '1/min'}
+        reviews, titles, user, moderator = create_reviews(admin_client, admin)
+        url = f'/api/v1/titles/{titles[0]["id"]}/reviews/{reviews[0]["id"]}/comments/'
+        client = auth_client(user)
+        assert client.post(url, data={'text': 'первый'}).status_code == 201
+        assert client.post(url, data={'text': 'второй'}).status_code == 429, (
+            'Проверьте, что создание комментариев ограничивается для пользователя'
+        )
+        assert client.get(url).status_code == 200, (
+            'Проверьте, что запросы на чтение не ограничиваются'
+        )
+        assert auth_client(moderator).post(url, data={'text': 'другой'}).status_code == 201, (
+            'Проверьте, что ограничение считается отдельно для каждого пользователя'
+        )
+        review_url = f'/api/v1/titles/{titles[1]["id"]}/reviews/'
+        assert client.post(review_url, data={'text': 'отзыв', 'score': 5}).status_code == 201, (
+            'Проверьте, что ограничение считается отдельно для каждого маршрута'
+        )
+
+    def test_03_token_bucket_refills(self):
+        from api.throttling import LocalBucketStore
+        store = LocalBucketStore()
+        assert store.take('key', 2, 60, 0) == 0
+        assert store.take('key', 2, 60, 1) == 0
+        assert store.take('key', 2, 60, 2) > 0, (
+            'Проверьте, что после исчерпания корзины запрос отклоняется'
+        )
+        assert store.take('key', 2, 60, 40) == 0, (
+            'Проверьте, что корзина пополняется со временем'
+        )
+
+    def test_04_full_buckets_evicted(self):
+        from api.throttling import LocalBucketStore
+        store = LocalBucketStore()
+        store.take('hourly', 1, 3600, 0)
+        store.take('live', 1, 60, 0)
+        for number in range(1000):
+            store.take(f'key{number}', 1, 60, 1 + number / 100)
+        assert store.take('live', 1, 60, 30) > 0
+        assert store.take('hourly', 1, 3600, 50) > 0, (
+            'Проверьте, что корзины активных клиентов не удаляются'
+        )
+        store.take('other', 1, 60, 95)
+        assert len(store._buckets) < 1000, (
+            'Проверьте, что наполнившиеся корзины удаляются'
+        )
+        assert store.take('hourly', 1, 3600, 100) > 0
@@ -0,0 +1,46 @@
+import pytest
+
+
+class Test19LoadTest:
+
+    def test_01_percentiles(self):
+        from api.benchmark import percentile, summarize
+        values = [number / 1000 for number in range(1, 101)]
+        assert percentile(values, 50) == 0.05
+        assert percentile(values, 99) == 0.099
+        assert percentile([], 99) == 0.0
+        samples = [(value, value < 0.1, 2) for value in values]
+        summary = summarize(samples, 2.0)
+        assert summary['requests'] == 100 and summary['errors'] == 1
+        assert summary['rps'] == 50.0 and summary['queries_per_request'] == 2
+        assert summary['p95'] == pytest.approx(95.0), (
+            'Проверьте, что латентность в отчёте указывается в миллисекундах'
+        )
+
+    def test_02_compare(self):
+        from api.benchmark import compare
+        baseline = {'scenarios': {'title_list': {'rps': 100.0, 'p50': 10.0, 'queries_per_request': 4}}}
+        current = {'scenarios': {
+            'title_list': {'rps': 150.0, 'p50': 5.0, 'queries_per_request': 2},
+            'token': {'rps': 10.0},
+        }}
+        assert compare(baseline, current) == {
+            'title_list': {'rps': 50.0, 'p50': -50.0, 'queries_per_request': -50.0}
+        }
+
+    @pytest.mark.django_db(transaction=True)
+    def test_03_query_count_header(self, catalog):
+        from django.test import Client
+        from api.management.commands.loadtest import QueryCountingApp
+        from api_yamdb.wsgi import application
+        headers = {}
+
+        def start_response(status, response_headers, exc_info=None):
+            headers.update(response_headers)
+
+        app = QueryCountingApp(application)
+        environ = Client()._base_environ(PATH_INFO='/api/v1/categories/', REQUEST_METHOD='GET')
+        b''.join(app(environ, start_response))
+        assert int(headers[QueryCountingApp.header]) >= 1, (
+            'Проверьте, что нагрузочный тест получает число SQL-запросов в заголовке ответа'
+        )
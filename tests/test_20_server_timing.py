@@ -0,0 +1,66 @@
+import re
+
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+from .common import auth_client
+
+
+def server_timing(response):
+    return {
+        name: (float(duration), description)
+        for name, duration, description in re.findall(
+            r'(\w+);dur=([\d.]+)(?:;desc="([^"]*)")?', response['Server-Timing']
+        )
+    }
+
+
+class Test20ServerTiming:
+
+    @pytest.fixture(autouse=True)
+    def reset_stats(self, settings):
+        from api.timing import route_stats
+        route_stats.reset()
+        settings.API_SERVER_TIMING_HEADER = True
+
+    @pytest.mark.django_db(transaction=True)
+    def test_01_header(self, client, catalog):
+        with CaptureQueriesContext(connection) as context:
+            response = client.get('/api/v1/titles/')
+        metrics = server_timing(response)
+        assert set(metrics) == {'db', 'serialize', 'total'}, (
+            'Проверьте, что ответ содержит заголовок `Server-Timing` со временем SQL, сериализации и запроса'
+        )
+        assert metrics['db'][1] == f'{len(context.captured_queries)} queries', (
+            'Проверьте, что в `Server-Timing` указано число SQL-запросов'
+        )
+        assert 0 < metrics['serialize'][0] < metrics['total'][0]
+        assert metrics['db'][0] < metrics['total'][0]
+
+    @pytest.mark.django_db(transaction=True)
+    def test_02_route_stats(self, client, catalog):
+        from api.timing import route_stats
+        titles, reviews, _, users = catalog
+        client.get('/api/v1/titles/')
+        client.get('/api/v1/titles/')
+        client.get(f'/api/v1/titles/{titles[0].id}/')
+        auth_client(users[-1]).post(
+            f'/api/v1/titles/{titles[-1].id}/reviews/', data={'text': 'текст', 'score': 5}
+        )
+        client.post('/api/v1/auth/token/')
+        stats = route_stats.snapshot()
+        assert {'TitleViewSet.list', 'TitleViewSet.retrieve', 'ReviewViewSet.create', 'get_token.post'} <= set(stats), (
+            'Проверьте, что замеры накапливаются по классу представления и действию'
+        )
+        assert stats['TitleViewSet.list']['count'] == 2
+        assert stats['TitleViewSet.list']['queries'] >= 2
+        assert stats['TitleViewSet.list']['total'] >= stats['TitleViewSet.list']['sql']
+
+    @pytest.mark.django_db(transaction=True)
+    def test_03_header_can_be_disabled(self, client, settings):
+        from api.timing import route_stats
+        settings.API_SERVER_TIMING_HEADER = False
+        response = client.get('/api/v1/genres/')
+        assert 'Server-Timing' not in response
+        assert route_stats.snapshot()['GenreViewSet.list']['count'] == 1
@@ -0,0 +1,87 @@
+import multiprocessing
+import re
+
+import pytest
+
+from .common import auth_client
+
+
+def metric(text, name):
+    match = re.search(rf'^{re.escape(name)} (\S+)$', text, re.MULTILINE)
+    assert match, f'Проверьте, что метрики содержат образец `{name}`'
+    return float(match.group(1))
+
+
+def worker_requests(directory, count):
+    from types import SimpleNamespace
+    from django.conf import settings
+    from api.metrics import request_metrics
+    settings.API_METRICS_DIR = directory
+    response = {'X-Cache': 'HIT'}
+    response = SimpleNamespace(status_code=200, get=response.get)
+    timing = SimpleNamespace(queries=2, sql=0.001, serialize=0.002)
+    for _ in range(count):
+        request_metrics.observe('TitleViewSet.list', 'GET', response, timing, 0.02)
+
+
+class Test21Metrics:
+
+    @pytest.fixture(autouse=True)
+    def metrics_dir(self, settings, tmp_path):
+        settings.API_METRICS_DIR = str(tmp_path)
+        return tmp_path
+
+    @pytest.mark.django_db(transaction=True)
+    def test_01_admin_only(self, client, user):
+        assert client.get('/api/v1/metrics/').status_code == 401, (
+            'Проверьте, что `/api/v1/metrics/` недоступен анонимному пользователю'
+        )
+        assert auth_client(user).get('/api/v1/metrics/').status_code == 403, (
+            'Проверьте, что `/api/v1/metrics/` доступен только администратору'
+        )
+
+    @pytest.mark.django_db(transaction=True)
+    def test_02_prometheus_text(self, admin_client, client):
+        from users.models import OutboxEmail
+        client.get('/api/v1/categories/')
+        client.get('/api/v1/categories/')
+        client.get('/api/v1/titles/999/')
+        OutboxEmail.objects.create(subject='s', body='b', from_email='a@yamdb.fake', recipient='b@yamdb.fake')
+        response = admin_client.get('/api/v1/metrics/')
+        assert response.status_code == 200
+        assert response['Content-Type'].startswith('text/plain; version=0.0.4')
+        text = response.content.decode()
+        assert '# TYPE api_request_duration_seconds histogram' in text
+        assert metric(text, 'api_requests_total{route="CategoryViewSet.list",method="GET",status="200"}') == 2
+        assert metric(text, 'api_requests_total{route="TitleViewSet.retrieve",method="GET",status="404"}') == 1, (
+            'Проверьте, что запросы учитываются по коду ответа'
+        )
+        assert metric(text, 'api_request_duration_seconds_bucket{route="CategoryViewSet.list",le="+Inf"}') == 2
+        assert metric(text, 'api_request_duration_seconds_count{route="CategoryViewSet.list"}') == 2
+        assert metric(text, 'api_db_queries_total{route="TitleViewSet.retrieve"}') >= 1
+        assert metric(text, 'api_response_cache_hit_ratio') == 0.5, (
+            'Проверьте, что метрики содержат долю попаданий в кэш ответов'
+        )
+        assert metric(text, 'api_email_outbox_messages{status="pending"}') == 1, (
+            'Проверьте, что метрики содержат число писем в очереди'
+        )
+        buckets = re.findall(r'api_request_duration_seconds_bucket\{route="CategoryViewSet.list",le="([^"]+)"\}', text)
+        assert buckets[-1] == '+Inf' and buckets[0] == '0.005'
+
+    def test_03_multiprocess(self, metrics_dir):
+        from api.metrics import request_metrics
+        context = multiprocessing.get_context('fork')
+        processes = [context.Process(target=worker_requests, args=(str(metrics_dir), 50)) for _ in range(3)]
+        for process in processes:
+            process.start()
+        for process in processes:
+            process.join()
+        assert len(list(metrics_dir.glob('api_*.db'))) == 3, (
+            'Проверьте, что каждый процесс пишет метрики в собственный файл'
+        )
+        totals = request_metrics.collect()
+        assert totals['api_requests_total{route="TitleViewSet.list",method="GET",status="200"}'] == 150, (
+            'Проверьте, что метрики всех процессов суммируются'
+        )
+        assert totals['api_request_duration_seconds_bucket{route="TitleViewSet.list",le="0.025"}'] == 150
+        assert 'api_request_duration_seconds_bucket{route="TitleViewSet.list",le="0.01"}' not in totals
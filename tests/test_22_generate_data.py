@@ -0,0 +1,58 @@
+import filecmp
+from io import StringIO
+
+import pytest
+from django.core.management import call_command
+from django.db.models import Count
+
+SIZES = {'users': 60, 'categories': 3, 'genres': 5, 'titles': 80, 'reviews': 600, 'comments': 300}
+
+
+class Test22GenerateData:
+
+    @pytest.mark.django_db(transaction=True)
+    def test_01_generate_into_db(self, django_user_model):
+        from reviews.models import Comments, Review, Title
+        call_command('generate_data', batch_size=50, stdout=StringIO(), **SIZES)
+        assert django_user_model.objects.count() == 60
+        assert Title.objects.count() == 80
+        assert Title.genre.through.objects.count() >= 80
+        reviews = Review.objects.count()
+        assert 400 <= reviews <= 600, (
+            'Проверьте, что `generate_data` создаёт заданное число отзывов'
+        )
+        assert 100 <= Comments.objects.count() <= 500
+        counts = sorted(
+            Title.objects.annotate(total=Count('reviews')).values_list('total', flat=True), reverse=True
+        )
+        assert counts[0] >= 5 * counts[len(counts) // 2], (
+            'Проверьте, что отзывы распределены по произведениям по закону Ципфа'
+        )
+        title = Title.objects.order_by('-review_count').first()
+        assert title.review_count == counts[0] and title.rating is not None, (
+            'Проверьте, что `generate_data` пересчитывает рейтинги произведений'
+        )
+        assert title.name_casefold == title.name.casefold()
+        user = django_user_model.objects.first()
+        assert user.username_casefold == user.username and not user.has_usable_password()
+
+    @pytest.mark.django_db(transaction=True)
+    def test_02_csv_deterministic_and_importable(self, tmp_path, django_user_model):
+        from reviews.models import Review
+        for directory in ('first', 'second'):
+            call_command('generate_data', csv_dir=str(tmp_path / directory), stdout=StringIO(), **SIZES)
+        _, mismatch, errors = filecmp.cmpfiles(
+            tmp_path / 'first', tmp_path / 'second',
+            ['users.csv', 'titles.csv', 'genre_title.csv', 'review.csv', 'comments.csv'], shallow=False
+        )
+        assert not mismatch and not errors, (
+            'Проверьте, что `generate_data` с одним seed создаёт одинаковые данные'
+        )
+        call_command('generate_data', csv_dir=str(tmp_path / 'other'), seed=2, stdout=StringIO(), **SIZES)
+        assert not filecmp.cmp(tmp_path / 'first' / 'review.csv', tmp_path / 'other' / 'review.csv', shallow=False)
+        call_command('import', data_dir=str(tmp_path / 'first'), stdout=StringIO())
+        with open(tmp_path / 'first' / 'review.csv', encoding='utf8') as source:
+            assert Review.objects.count() == len(source.readlines()) - 1, (
+                'Проверьте, что CSV-файлы `generate_data` загружаются командой `import`'
+            )
+        assert django_user_model.objects.count() == 60
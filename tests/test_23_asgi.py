@@ -0,0 +1,132 @@
+import asyncio
+import json
+import threading
+
+import pytest
+
+from .test_20_server_timing import server_timing
+
+
+def asgi_request(path, method='GET', query=b'', body=b'', headers=()):
+    from api.asgi import ASGIHandler
+    scope = {
+        'type': 'http', 'method': method, 'path': path, 'query_string': query,
+        'headers': [(b'host', b'testserver'), *headers],
+        'server': ('testserver', 80), 'client': ('127.0.0.1', 5000),
+    }
+    messages = [{'type': 'http.request', 'body': body, 'more_body': False}]
+    sent = []
+
+    async def receive():
+        return messages.pop(0)
+
+    async def send(message):
+        sent.append(message)
+
+    asyncio.run(ASGIHandler()(scope, receive, send))
+    start, body = sent
+    return start['status'], dict(start['headers']), body['body']
+
+
+class Test23ASGI:
+
+    @pytest.mark.django_db(transaction=True)
+    def test_01_same_responses(self, client, catalog):
+        titles, reviews, _, _ = catalog
+        urls = [
+            ('/api/v1/titles/', b''),
+            ('/api/v1/titles/', b'page=2'),
+            ('/api/v1/titles/', b'genre=genre-1'),
+            ('/api/v1/titles/', b'q=%D0%9F%D1%80%D0%BE%D0%B8%D0%B7%D0%B2%D0%B5%D0%B4%D0%B5%D0%BD%D0%B8%D0%B5'),
+            (f'/api/v1/titles/{titles[0].id}/', b''),
+            ('/api/v1/categories/', b''),
+            ('/api/v1/genres/', b'page=2'),
+            (f'/api/v1/titles/{titles[0].id}/reviews/', b''),
+            (f'/api/v1/titles/{titles[0].id}/reviews/', b'cursor='),
+            (f'/api/v1/titles/{titles[0].id}/reviews/{reviews[0].id}/comments/', b'page=last'),
+        ]
+        for path, query in urls:
+            expected = client.get(f'{path}?{query.decode()}')
+            status, _, body = asgi_request(path, query=query)
+            assert status == expected.status_code == 200, (
+                f'Проверьте, что `{path}` доступен через ASGI-приложение'
+            )
+            assert json.loads(body) == expected.json(), (
+                f'Проверьте, что `{path}?{query.decode()}` через ASGI возвращает то же, что через WSGI'
+            )
+
+    @pytest.mark.django_db(transaction=True)
+    def test_02_invalid_pages(self, client, catalog):
+        for query in (b'page=3', b'page=0', b'page=abc'):
+            expected = client.get(f'/api/v1/titles/?{query.decode()}')
+            status, _, body = asgi_request('/api/v1/titles/', query=query)
+            assert status == expected.status_code == 404, (
+                'Проверьте, что несуществующая страница через ASGI возвращает 404'
+            )
+            assert json.loads(body) == expected.json()
+        status, _, _ = asgi_request('/api/v1/titles/0/')
+        assert status == 404
+
+    @pytest.mark.django_db(transaction=True)
+    def test_03_server_timing(self, client, catalog, settings):
+        settings.API_SERVER_TIMING_HEADER = True
+        # Число запросов двух ответов сравнивается, а закэшированное
+        # после первого ответа число объектов убрало бы из второго COUNT.
+        settings.API_COUNT_CACHE_TIMEOUT = 0
+        expected = server_timing(client.get('/api/v1/titles/'))
+        _, headers, _ = asgi_request('/api/v1/titles/')
+        metrics = server_timing({'Server-Timing': headers[b'server-timing'].decode()})
+        assert metrics['db'][1] == expected['db'][1], (
+            'Проверьте, что в `Server-Timing` учитываются запросы из потоков пула'
+        )
+
+    @pytest.mark.django_db(transaction=True)
+    def test_04_writes(self, admin, catalog):
+        from reviews.models import Genres
+        from .common import auth_client
+        token = auth_client(admin)._credentials['HTTP_AUTHORIZATION']
+        status, _, _ = asgi_request(
+            '/api/v1/genres/', method='POST',
+            body=json.dumps({'name': 'Новый', 'slug': 'new'}).encode(),
+            headers=[
+                (b'content-type', b'application/json'),
+                (b'authorization', token.encode()),
+            ],
+        )
+        assert status == 201, (
+            'Проверьте, что запросы на изменение выполняются через ASGI-приложение'
+        )
+        assert Genres.objects.filter(slug='new').exists()
+        status, _, _ = asgi_request('/api/v1/genres/', method='POST')
+        assert status == 401
+
+    @pytest.mark.django_db(transaction=True)
+    def test_05_gather(self):
+        from api.concurrency import gather
+        barrier = threading.Barrier(3)
+
+        def job(value):
+            barrier.wait(timeout=5)
+            return value, threading.get_ident()
+
+        results = gather(*[lambda value=value: job(value) for value in range(3)])
+        assert [value for value, _ in results] == [0, 1, 2], (
+            'Проверьте, что `gather` возвращает результаты по порядку'
+        )
+        assert len({ident for _, ident in results}) == 3, (
+            'Проверьте, что `gather` выполняет функции параллельно'
+        )
+
+    def test_06_lifespan(self):
+        from api.asgi import ASGIHandler
+        messages = [{'type': 'lifespan.startup'}, {'type': 'lifespan.shutdown'}]
+        sent = []
+
+        async def receive():
+            return messages.pop(0)
+
+        async def send(message):
+            sent.append(message['type'])
+
+        asyncio.run(ASGIHandler()({'type': 'lifespan'}, receive, send))
+        assert sent == ['lifespan.startup.complete', 'lifespan.shutdown.complete']
@@ -0,0 +1,125 @@
+import pytest
+from django.core.management import call_command
+from django.db import connections
+from django.test.utils import CaptureQueriesContext
+
+from .common import auth_client
+
+
+@pytest.fixture
+def replica(transactional_db, settings, tmp_path):
+    connections.databases['replica'] = dict(
+        connections.databases['default'], NAME=str(tmp_path / 'replica.sqlite3')
+    )
+    settings.API_DATABASE_REPLICAS = ['replica']
+    yield connections['replica']
+    connections['replica'].close()
+    del connections['replica']
+    del connections.databases['replica']
+
+
+def review_texts(client, title):
+    response = client.get(f'/api/v1/titles/{title.id}/reviews/')
+    assert response.status_code == 200
+    return {review['text'] for review in response.json()['results']}
+
+
+class Test24Replicas:
+
+    def test_01_reads_from_replica(self, client, catalog, replica):
+        titles = catalog[0]
+        call_command('replicate')
+        with CaptureQueriesContext(connections['default']) as primary:
+            with CaptureQueriesContext(replica) as copy:
+                response = client.get('/api/v1/titles/')
+        assert response.status_code == 200
+        assert response.json()['count'] == len(titles)
+        assert copy.captured_queries and not primary.captured_queries, (
+            'Проверьте, что безопасные запросы читают с реплики'
+        )
+
+    def test_02_replication_lag(self, client, catalog, replica):
+        from reviews.models import Title
+        call_command('replicate')
+        Title.objects.create(name='Новое', year=2000, category=catalog[0][0].category)
+        assert client.get('/api/v1/titles/').json()['count'] == len(catalog[0]), (
+            'Проверьте, что чтение идёт с реплики, а не с основной базы'
+        )
+        call_command('replicate')
+        assert client.get('/api/v1/titles/').json()['count'] == len(catalog[0]) + 1
+
+    def test_03_read_your_writes(self, catalog, replica, admin):
+        titles, _, _, users = catalog
+        call_command('replicate')
+        writer, reader = auth_client(admin), auth_client(users[0])
+        with CaptureQueriesContext(replica) as copy:
+            response = writer.post(
+                f'/api/v1/titles/{titles[1].id}/reviews/', data={'text': 'Свежий', 'score': 7}
+            )
+        assert response.status_code == 201
+        assert not copy.captured_queries, (
+            'Проверьте, что запросы на изменение идут в основную базу'
+        )
+        assert 'Свежий' in review_texts(writer, titles[1]), (
+            'Проверьте, что после записи клиент читает с основной базы'
+        )
+        assert 'Свежий' not in review_texts(reader, titles[1])
+        call_command('replicate')
+        assert 'Свежий' in review_texts(reader, titles[1])
+
+    def test_04_sticky_window(self, catalog, replica, admin, settings):
+        titles = catalog[0]
+        settings.API_REPLICA_STICKY_SECONDS = 0
+        call_command('replicate')
+        writer = auth_client(admin)
+        response = writer.post(
+            f'/api/v1/titles/{titles[1].id}/reviews/', data={'text': 'Свежий', 'score': 7}
+        )
+        assert response.status_code == 201
+        assert 'Свежий' not in review_texts(writer, titles[1]), (
+            'Проверьте, что после окна API_REPLICA_STICKY_SECONDS клиент снова читает с реплики'
+        )
+
+    @pytest.mark.django_db(transaction=True)
+    def test_05_without_replicas(self, client, catalog):
+        with CaptureQueriesContext(connections['default']) as primary:
+            client.get('/api/v1/titles/')
+        assert primary.captured_queries, (
+            'Проверьте, что без API_DATABASE_REPLICAS всё читается с основной базы'
+        )
+
+    def test_06_demoted_user(self, catalog, replica, admin):
+        users = catalog[3]
+        users[0].role = 'admin'
+        users[0].save()
+        call_command('replicate')
+        demoted = auth_client(users[0])
+        assert demoted.get('/api/v1/users/').status_code == 200
+        response = auth_client(admin).patch(
+            f'/api/v1/users/{users[0].username}/', data={'role': 'user'}
+        )
+        assert response.status_code == 200
+        assert demoted.get('/api/v1/users/').status_code == 403, (
+            'Проверьте, что пользователь для аутентификации читается '
+            'с основной базы, а не с отстающей реплики'
+        )
+        call_command('replicate')
+        assert demoted.get('/api/v1/users/').status_code == 403
+
+    def test_07_list_cache(self, client, catalog, replica, admin):
+        call_command('replicate')
+        response = auth_client(admin).post(
+            '/api/v1/genres/', data={'name': 'Новый', 'slug': 'fresh'}
+        )
+        assert response.status_code == 201
+        for _ in range(2):
+            response = client.get('/api/v1/genres/')
+            assert response['X-Cache'] == 'MISS', (
+                'Проверьте, что ответ, прочитанный с отстающей реплики, не кэшируется'
+            )
+        call_command('replicate')
+        assert client.get('/api/v1/genres/').json()['count'] == len(catalog[0]) + 1, (
+            'Проверьте, что число объектов с отстающей реплики не кэшируется'
+        )
+        response = client.get('/api/v1/genres/?search=Новый')
+        assert [genre['slug'] for genre in response.json()['results']] == ['fresh']
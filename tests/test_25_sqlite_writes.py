@@ -0,0 +1,142 @@
+import threading
+from concurrent.futures import Future
+from contextvars import copy_context
+
+import pytest
+from django.db import IntegrityError, connection, transaction
+from rest_framework import serializers
+
+
+class Test25SQLiteWrites:
+
+    @pytest.mark.django_db(transaction=True)
+    def test_01_pragmas(self, settings):
+        connection.close()
+        connection.ensure_connection()
+        with connection.cursor() as cursor:
+            cursor.execute('PRAGMA busy_timeout')
+            busy_timeout = cursor.fetchone()[0]
+            cursor.execute('PRAGMA synchronous')
+            synchronous = cursor.fetchone()[0]
+        assert busy_timeout == settings.API_SQLITE_PRAGMAS['busy_timeout'], (
+            'Проверьте, что PRAGMA из API_SQLITE_PRAGMAS применяются к новым соединениям'
+        )
+        assert synchronous == 1
+
+    @pytest.mark.django_db(transaction=True)
+    def test_02_single_writer(self):
+        from api.sqlite import write_queue
+        from reviews.models import Genres
+
+        def create(number):
+            genre = Genres.objects.create(name=f'Жанр {number}', slug=f'genre-{number}')
+            return genre.pk, threading.current_thread().name
+
+        results = []
+        threads = [
+            threading.Thread(target=lambda number=number: results.append(
+                write_queue.run(create, number)
+            ))
+            for number in range(8)
+        ]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        assert {name for _, name in results} == {'api-sqlite-writer'}, (
+            'Проверьте, что записи выполняются в одном пишущем потоке'
+        )
+        assert Genres.objects.count() == 8
+
+    @pytest.mark.django_db(transaction=True)
+    def test_03_failed_write_is_isolated(self):
+        from api.sqlite import write_queue
+        from reviews.models import Genres
+        batch = []
+        for slug in ('first', 'first', 'second'):
+            future = Future()
+            batch.append((
+                copy_context(), Genres.objects.create, (),
+                {'name': slug, 'slug': slug}, future
+            ))
+        write_queue.commit(batch)
+        futures = [job[-1] for job in batch]
+        assert futures[0].result().slug == 'first'
+        assert isinstance(futures[1].exception(), IntegrityError), (
+            'Проверьте, что ошибка записи передаётся вызвавшему потоку'
+        )
+        assert futures[2].result().slug == 'second'
+        assert set(Genres.objects.values_list('slug', flat=True)) == {'first', 'second'}, (
+            'Проверьте, что ошибка одной записи не откатывает остальные записи пачки'
+        )
+
+    @pytest.mark.django_db(transaction=True)
+    def test_04_inline_in_transaction(self):
+        from api.sqlite import write_queue
+        with transaction.atomic():
+            name = write_queue.run(lambda: threading.current_thread().name)
+        assert name == threading.current_thread().name, (
+            'Проверьте, что внутри транзакции запись выполняется в текущем потоке'
+        )
+
+    @pytest.mark.django_db(transaction=True)
+    def test_05_api_writes(self, catalog, admin):
+        from .common import auth_client
+        titles = catalog[0]
+        response = auth_client(admin).post(
+            f'/api/v1/titles/{titles[1].id}/reviews/', data={'text': 'Текст', 'score': 7}
+        )
+        assert response.status_code == 201
+        assert response.json()['author'] == admin.username
+        response = auth_client(admin).patch(
+            f'/api/v1/titles/{titles[1].id}/', data={'name': 'Новое название'}
+        )
+        assert response.status_code == 200
+        assert response.json()['name'] == 'Новое название'
+
+    @pytest.mark.django_db(transaction=True)
+    def test_06_deferred_foreign_key_is_isolated(self, catalog):
+        from api.mixins import queued_save
+        from api.sqlite import write_queue
+        from reviews.models import Genres, Review, Title
+
+        class ScoreSerializer(serializers.ModelSerializer):
+            class Meta:
+                model = Review
+                fields = ('score',)
+
+        titles, reviews, _, users = catalog
+        score_sum = Title.objects.get(pk=titles[0].pk).score_sum
+        score = reviews[0].score % 10 + 1
+        delta = score - reviews[0].score
+        serializer = ScoreSerializer(reviews[0], data={'score': score})
+        serializer.is_valid(raise_exception=True)
+        jobs = (
+            (Genres.objects.create, {'name': 'first', 'slug': 'first'}),
+            (queued_save(serializer), {}),
+            (Review.objects.create, {
+                'title_id': titles[-1].pk + 1000, 'author': users[1],
+                'text': 'Отзыв', 'score': 5,
+            }),
+            (Genres.objects.create, {'name': 'second', 'slug': 'second'}),
+        )
+        batch = [
+            (copy_context(), func, (), kwargs, Future()) for func, kwargs in jobs
+        ]
+        write_queue.commit(batch)
+        futures = [job[-1] for job in batch]
+        assert isinstance(futures[2].exception(), IntegrityError), (
+            'Проверьте, что нарушение внешнего ключа передаётся вызвавшему потоку'
+        )
+        assert futures[0].result().slug == 'first'
+        assert futures[3].result().slug == 'second'
+        assert set(Genres.objects.filter(
+            slug__in=('first', 'second')
+        ).values_list('slug', flat=True)) == {'first', 'second'}, (
+            'Проверьте, что нарушение внешнего ключа одной записью '
+            'не откатывает остальные записи пачки'
+        )
+        assert not Review.objects.filter(text='Отзыв').exists()
+        assert Title.objects.get(pk=titles[0].pk).score_sum == score_sum + delta, (
+            'Проверьте, что повторённая запись не учитывает первую попытку'
+        )
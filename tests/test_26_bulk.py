@@ -0,0 +1,207 @@
+import time
+
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+from .common import auth_client
+
+
+def title_items(catalog, count, prefix='Пакет'):
+    return [
+        {
+            'name': f'{prefix} {number}', 'year': 2001, 'description': 'Описание',
+            'genre': ['genre-1', 'genre-4'], 'category': 'category-2',
+        }
+        for number in range(count)
+    ]
+
+
+def post_titles(client, items, query=''):
+    with CaptureQueriesContext(connection) as context:
+        response = client.post(f'/api/v1/titles/{query}', data=items, format='json')
+    return response, len(context.captured_queries)
+
+
+@pytest.mark.django_db
+class Test26Bulk:
+
+    def test_01_bulk_create_titles(self, catalog, admin):
+        from reviews.models import Title
+        client = auth_client(admin)
+        post_titles(client, title_items(catalog, 1, 'Прогрев'))
+        response, few = post_titles(client, title_items(catalog, 2, 'Мало'))
+        assert response.status_code == 201
+        response, many = post_titles(client, title_items(catalog, 30))
+        assert response.status_code == 201, (
+            'Проверьте, что POST со списком на /api/v1/titles/ создаёт произведения'
+        )
+        assert many == few, (
+            'Проверьте, что число SQL-запросов пакета не зависит от числа элементов'
+        )
+        results = response.json()
+        assert len(results) == 30
+        assert {result['status'] for result in results} == {201}
+        assert results[0]['data']['genre'] == ['genre-1', 'genre-4']
+        title = Title.objects.get(pk=results[0]['data']['id'])
+        assert title.name == 'Пакет 0'
+        assert title.name_casefold == 'пакет 0'
+        assert set(title.genre.values_list('slug', flat=True)) == {'genre-1', 'genre-4'}
+        assert len(set(result['data']['id'] for result in results)) == 30
+
+    def test_02_bulk_create_genres_categories(self, admin):
+        from reviews.models import Categories, Genres
+        client = auth_client(admin)
+        for url, model in (('genres', Genres), ('categories', Categories)):
+            response = client.post(f'/api/v1/{url}/', data=[
+                {'name': 'Первый', 'slug': 'first'},
+                {'name': 'Второй', 'slug': 'second'},
+            ], format='json')
+            assert response.status_code == 201, (
+                f'Проверьте, что POST со списком на /api/v1/{url}/ создаёт объекты'
+            )
+            assert set(model.objects.values_list('slug', flat=True)) == {'first', 'second'}
+
+    def test_03_partial_success(self, catalog, admin):
+        from reviews.models import Title
+        items = title_items(catalog, 3)
+        items[1]['genre'] = ['genre-1', 'unknown']
+        items[2]['year'] = 'год'
+        before = Title.objects.count()
+        response, _ = post_titles(auth_client(admin), items)
+        assert response.status_code == 207, (
+            'Проверьте, что при ошибках части элементов возвращается 207'
+        )
+        results = response.json()
+        assert [result['status'] for result in results] == [201, 400, 400]
+        assert 'genre' in results[1]['errors']
+        assert 'year' in results[2]['errors']
+        assert Title.objects.count() == before + 1, (
+            'Проверьте, что элементы без ошибок сохраняются'
+        )
+
+    def test_04_atomic(self, catalog, admin):
+        from reviews.models import Title
+        items = title_items(catalog, 3)
+        items[2]['category'] = 'unknown'
+        before = Title.objects.count()
+        response, _ = post_titles(auth_client(admin), items, '?atomic=true')
+        assert response.status_code == 400, (
+            'Проверьте, что в атомарном режиме пакет с ошибками отклоняется'
+        )
+        assert [result['status'] for result in response.json()] == [424, 424, 400]
+        assert Title.objects.count() == before, (
+            'Проверьте, что в атомарном режиме ничего не сохраняется'
+        )
+
+    def test_05_unique_slugs(self, catalog, admin):
+        from reviews.models import Genres
+        response = auth_client(admin).post('/api/v1/genres/', data=[
+            {'name': 'Занят', 'slug': 'genre-0'},
+            {'name': 'Новый', 'slug': 'fresh'},
+            {'name': 'Повтор', 'slug': 'fresh'},
+        ], format='json')
+        assert response.status_code == 207
+        results = response.json()
+        assert [result['status'] for result in results] == [400, 201, 400], (
+            'Проверьте, что повтор слага в базе и в пакете — ошибка элемента'
+        )
+        assert 'slug' in results[0]['errors'] and 'slug' in results[2]['errors']
+        assert Genres.objects.get(slug='fresh').name == 'Новый'
+
+    def test_06_bulk_partial_update(self, catalog, admin):
+        from reviews.models import Title
+        titles = catalog[0]
+        response = auth_client(admin).patch('/api/v1/titles/', data=[
+            {'id': titles[0].id, 'name': 'Обновлено', 'genre': ['genre-7']},
+            {'id': titles[1].id, 'year': 1999},
+            {'id': 10 ** 6, 'name': 'Нет такого'},
+            {'name': 'Без id'},
+        ], format='json')
+        assert response.status_code == 207, (
+            'Проверьте, что PATCH со списком на /api/v1/titles/ обновляет произведения'
+        )
+        results = response.json()
+        assert [result['status'] for result in results] == [200, 200, 404, 400]
+        assert results[0]['data']['genre'] == ['genre-7']
+        assert results[1]['data']['genre'] == ['genre-0', 'genre-1', 'genre-2']
+        first = Title.objects.get(pk=titles[0].pk)
+        assert first.name_casefold == 'обновлено'
+        assert list(first.genre.values_list('slug', flat=True)) == ['genre-7']
+        assert Title.objects.get(pk=titles[1].pk).year == 1999
+
+    def test_07_permissions_and_limits(self, catalog, user, admin, settings):
+        items = title_items(catalog, 2)
+        response, _ = post_titles(auth_client(user), items)
+        assert response.status_code == 403, (
+            'Проверьте, что пакетное создание доступно только администратору'
+        )
+        response = auth_client(user).patch('/api/v1/titles/', data=[], format='json')
+        assert response.status_code == 403
+        settings.API_BULK_MAX_ITEMS = 1
+        response, _ = post_titles(auth_client(admin), items)
+        assert response.status_code == 400, (
+            'Проверьте, что размер пакета ограничен API_BULK_MAX_ITEMS'
+        )
+
+    def test_08_single_create(self, catalog, admin):
+        response = auth_client(admin).post(
+            '/api/v1/titles/', data=title_items(catalog, 1)[0], format='json'
+        )
+        assert response.status_code == 201, (
+            'Проверьте, что POST одного объекта работает как прежде'
+        )
+        assert response.json()['genre'] == ['genre-1', 'genre-4']
+
+    def test_09_ids_not_reused(self, catalog, admin):
+        client = auth_client(admin)
+        response, _ = post_titles(client, title_items(catalog, 1, 'Одно')[0])
+        deleted = response.json()['id']
+        assert client.delete(f'/api/v1/titles/{deleted}/').status_code == 204
+        response, _ = post_titles(client, title_items(catalog, 3))
+        ids = [result['data']['id'] for result in response.json()]
+        assert min(ids) > deleted, (
+            'Проверьте, что пакет не выдаёт ключи удалённых произведений'
+        )
+        response, _ = post_titles(client, title_items(catalog, 1, 'Ещё')[0])
+        assert response.json()['id'] > max(ids)
+
+    @pytest.mark.django_db(transaction=True)
+    def test_10_immediate_without_queue(self, catalog, admin, settings):
+        settings.API_SQLITE_WRITE_QUEUE = False
+        response, _ = post_titles(auth_client(admin), title_items(catalog, 2))
+        assert response.status_code == 201
+        with CaptureQueriesContext(connection) as context:
+            post_titles(auth_client(admin), title_items(catalog, 2, 'Другой'))
+        sql = [query['sql'] for query in context.captured_queries]
+        assert 'BEGIN IMMEDIATE' in sql, (
+            'Проверьте, что ключи пакета выдаются в транзакции с BEGIN IMMEDIATE'
+        )
+        assert sql.index('BEGIN IMMEDIATE') < min(
+            index for index, query in enumerate(sql) if 'sqlite_sequence' in query
+        )
+
+    def test_11_rename_changes_title_etag(self, catalog, admin, client):
+        titles = catalog[0]
+        urls = [f'/api/v1/titles/{title.id}/' for title in titles[:3]]
+        etags = [client.get(url)['ETag'] for url in urls]
+        time.sleep(0.001)
+        admin_client = auth_client(admin)
+        response = admin_client.patch('/api/v1/categories/', data=[
+            {'slug': 'category-1', 'name': 'Переименована'},
+        ], format='json')
+        assert response.status_code == 200
+        changed = [client.get(url, HTTP_IF_NONE_MATCH=etag).status_code for url, etag in zip(urls, etags)]
+        assert changed == [304, 200, 304], (
+            'Проверьте, что переименование категории пакетом меняет `ETag` её произведений'
+        )
+        etag = client.get(urls[0])['ETag']
+        time.sleep(0.001)
+        admin_client.patch('/api/v1/genres/', data=[
+            {'slug': 'genre-0', 'name': 'Переименован'},
+        ], format='json')
+        response = client.get(urls[0], HTTP_IF_NONE_MATCH=etag)
+        assert response.status_code == 200, (
+            'Проверьте, что переименование жанра пакетом меняет `ETag` его произведений'
+        )
+        assert 'Переименован' in {genre['name'] for genre in response.json()['genre']}
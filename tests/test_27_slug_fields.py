@@ -0,0 +1,71 @@
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+from .common import auth_client
+
+
+def lookups(context, table):
+    return [
+        query['sql'] for query in context.captured_queries
+        if f'FROM "{table}"' in query['sql'] and f'"{table}"."slug" IN (' in query['sql']
+    ]
+
+
+def create_title(client, genres, category='category-0'):
+    with CaptureQueriesContext(connection) as context:
+        response = client.post('/api/v1/titles/', data={
+            'name': 'Новое', 'year': 2001, 'description': 'Описание',
+            'genre': genres, 'category': category,
+        }, format='json')
+    return response, context
+
+
+@pytest.mark.django_db
+class Test27SlugFields:
+
+    def test_01_single_genre_query(self, catalog, admin):
+        genres = [f'genre-{number}' for number in (9, 3, 5, 7, 1)]
+        response, context = create_title(auth_client(admin), genres)
+        assert response.status_code == 201
+        assert sorted(response.json()['genre']) == sorted(genres)
+        assert len(lookups(context, 'reviews_genres')) == 1, (
+            'Проверьте, что слаги жанров ищутся одним запросом slug__in'
+        )
+        assert len(lookups(context, 'reviews_categories')) == 1
+
+    def test_02_all_unknown_slugs(self, catalog, admin):
+        response, _ = create_title(
+            auth_client(admin), ['genre-1', 'missing', 'genre-2', 'absent', 'missing']
+        )
+        assert response.status_code == 400
+        errors = response.json()['genre']
+        assert len(errors) == 2, (
+            'Проверьте, что все неизвестные слаги перечислены в одной ошибке'
+        )
+        assert 'missing' in errors[0] and 'absent' in errors[1]
+        response, _ = create_title(auth_client(admin), 'genre-1')
+        assert response.status_code == 400
+
+    def test_03_slug_cache(self, catalog, admin, settings):
+        from reviews.models import Genres, Title
+        settings.API_SLUG_CACHE = True
+        client = auth_client(admin)
+        create_title(client, ['genre-1', 'genre-2'])
+        response, context = create_title(client, ['genre-1', 'genre-2'])
+        assert response.status_code == 201
+        assert not lookups(context, 'reviews_genres'), (
+            'Проверьте, что при API_SLUG_CACHE известные слаги не ищутся в базе'
+        )
+        assert not lookups(context, 'reviews_categories')
+        title = Title.objects.get(pk=response.json()['id'])
+        assert list(title.genre.values_list('slug', flat=True)) == ['genre-1', 'genre-2']
+        genre = Genres.objects.get(slug='genre-1')
+        genre.slug = 'renamed'
+        genre.save()
+        response, _ = create_title(client, ['genre-1'])
+        assert response.status_code == 400, (
+            'Проверьте, что кэш слагов сбрасывается при изменении жанров'
+        )
+        response, _ = create_title(client, ['renamed'])
+        assert response.status_code == 201
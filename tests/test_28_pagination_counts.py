@@ -0,0 +1,79 @@
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+from .common import auth_client
+
+
+def get(client, url):
+    with CaptureQueriesContext(connection) as context:
+        response = client.get(url)
+    assert response.status_code == 200
+    counts = [
+        query['sql'] for query in context.captured_queries
+        if query['sql'].startswith('SELECT COUNT(')
+    ]
+    return response.json(), counts
+
+
+@pytest.mark.django_db
+class Test28PaginationCounts:
+
+    def test_01_cached_count(self, client, catalog, admin):
+        url = '/api/v1/titles/?genre=genre-1'
+        data, counts = get(client, url)
+        assert data['count'] == len(catalog[0]) and counts
+        data, counts = get(client, url)
+        assert data['count'] == len(catalog[0])
+        assert not counts, (
+            'Проверьте, что число объектов страницы берётся из кэша'
+        )
+        response = auth_client(admin).post('/api/v1/titles/', data={
+            'name': 'Новое', 'year': 2001, 'description': 'Описание',
+            'genre': ['genre-1'], 'category': 'category-0',
+        }, format='json')
+        assert response.status_code == 201
+        data, counts = get(client, url)
+        assert data['count'] == len(catalog[0]) + 1, (
+            'Проверьте, что кэш числа объектов сбрасывается при изменении модели'
+        )
+
+    def test_02_review_counter(self, client, catalog):
+        titles, reviews = catalog[:2]
+        data, counts = get(client, f'/api/v1/titles/{titles[0].id}/reviews/')
+        assert data['count'] == len(reviews)
+        assert not counts, (
+            'Проверьте, что число отзывов берётся из счётчика произведения'
+        )
+
+    def test_03_without_count(self, client, catalog):
+        data, counts = get(client, '/api/v1/titles/?count=false')
+        assert 'count' not in data and not counts, (
+            'Проверьте, что с `?count=false` число объектов не считается'
+        )
+        assert len(data['results']) == 10 and data['previous'] is None
+        assert 'page=2' in data['next']
+        data, _ = get(client, '/api/v1/titles/?count=false&page=2')
+        assert len(data['results']) == len(catalog[0]) - 10
+        assert data['next'] is None and data['previous'] is not None
+        for page in (3, 0, 'abc'):
+            response = client.get(f'/api/v1/titles/?count=false&page={page}')
+            assert response.status_code == 404
+
+    def test_04_estimated_count(self, client, catalog, settings):
+        with connection.cursor() as cursor:
+            cursor.execute('ANALYZE')
+        settings.API_COUNT_ESTIMATE_THRESHOLD = 10
+        data, counts = get(client, '/api/v1/titles/')
+        assert data['count'] == len(catalog[0]) and data['count_estimated'], (
+            'Проверьте, что для больших таблиц отдаётся оценка числа объектов'
+        )
+        assert not counts
+        data, counts = get(client, '/api/v1/titles/?genre=genre-1')
+        assert 'count' not in data and not counts, (
+            'Проверьте, что для выборки с условиями по большой таблице COUNT(*) не выполняется'
+        )
+        assert data['next'] is not None
+        settings.API_COUNT_ESTIMATE_THRESHOLD = 100
+        data, _ = get(client, '/api/v1/genres/')
+        assert 'count_estimated' not in data
@@ -0,0 +1,72 @@
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+from .common import auth_client
+
+
+def get(client, url):
+    with CaptureQueriesContext(connection) as context:
+        response = client.get(url)
+    assert response.status_code == 200
+    return response.json(), [query['sql'] for query in context.captured_queries]
+
+
+@pytest.mark.django_db
+class Test29SparseFields:
+
+    def test_01_fields(self, client, catalog):
+        data, queries = get(client, '/api/v1/titles/?fields=id,name,rating')
+        assert set(data['results'][0]) == {'id', 'name', 'rating'}, (
+            'Проверьте, что `?fields=` оставляет в ответе только перечисленные поля'
+        )
+        assert not any('"description"' in sql for sql in queries), (
+            'Проверьте, что `?fields=` сужает выборку колонок'
+        )
+        assert not any('reviews_genres' in sql or 'reviews_categories' in sql for sql in queries), (
+            'Проверьте, что связи вне `?fields=` не запрашиваются'
+        )
+
+    def test_02_expand(self, client, catalog):
+        data, queries = get(client, '/api/v1/titles/?fields=id,genre,category')
+        title = data['results'][0]
+        assert title['genre'] == ['genre-0', 'genre-1', 'genre-2'], (
+            'Проверьте, что связанные объекты без `?expand=` сворачиваются до слагов'
+        )
+        assert title['category'] == 'category-0'
+        data, _ = get(client, '/api/v1/titles/?fields=id,genre,category&expand=genre')
+        title = data['results'][0]
+        assert title['genre'][0] == {'name': 'Жанр 0', 'slug': 'genre-0'}
+        assert title['category'] == 'category-0'
+        full, _ = get(client, '/api/v1/titles/')
+        assert full['results'][0]['genre'][0] == {'name': 'Жанр 0', 'slug': 'genre-0'}
+        assert set(full['results'][0]) == {
+            'id', 'name', 'year', 'rating', 'description', 'genre', 'category'
+        }
+
+    def test_03_reviews(self, client, catalog):
+        title = catalog[0][0]
+        data, queries = get(client, f'/api/v1/titles/{title.id}/reviews/?fields=id,score')
+        assert set(data['results'][0]) == {'id', 'score'}
+        reviews = [sql for sql in queries if 'FROM "reviews_review"' in sql]
+        assert len(reviews) == 1, (
+            'Проверьте, что узкая выборка отзывов не дочитывает поля по строкам'
+        )
+        assert '"text"' not in reviews[0] and 'users_user' not in reviews[0]
+        data, queries = get(client, f'/api/v1/titles/{title.id}/reviews/?fields=author&cursor=')
+        assert data['results'][0] == {'author': 'reader0'}
+        assert len([sql for sql in queries if 'FROM "reviews_review"' in sql]) == 1
+
+    def test_04_errors_and_writes(self, client, catalog, admin):
+        response = client.get('/api/v1/titles/?fields=id,unknown&expand=name')
+        assert response.status_code == 400, (
+            'Проверьте, что неизвестные поля в `?fields=` и `?expand=` дают 400'
+        )
+        assert set(response.json()) == {'fields', 'expand'}
+        response = auth_client(admin).post('/api/v1/genres/?fields=slug', data={
+            'name': 'Новый', 'slug': 'fresh'
+        })
+        assert response.status_code == 201
+        assert response.json() == {'name': 'Новый', 'slug': 'fresh'}, (
+            'Проверьте, что `?fields=` не влияет на ответы изменяющих запросов'
+        )
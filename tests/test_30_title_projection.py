@@ -0,0 +1,65 @@
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+QUERIES = (
+    '', '?page=2', '?genre=genre-1', '?category=category-3', '?year=2000',
+    '?name=Произведение 1', '?q=Произведение', '?search=произведение 5',
+    '?page=9', '?year=1900',
+)
+
+
+@pytest.fixture
+def titles(catalog):
+    from reviews.models import Categories, Genres, Title
+    titles = catalog[0]
+    titles[1].category = None
+    titles[1].save()
+    titles[2].genre.set([])
+    extra = Genres.objects.create(name='Жанр 1', slug='genre-twin')
+    titles[3].genre.add(extra)
+    Title.objects.create(
+        name='Без жанров', year=1999, description='',
+        category=Categories.objects.first()
+    )
+    return titles
+
+
+def get(client, query):
+    with CaptureQueriesContext(connection) as context:
+        response = client.get(f'/api/v1/titles/{query}')
+    return response, context.captured_queries
+
+
+@pytest.mark.django_db
+class Test30TitleProjection:
+
+    def test_01_identical_output(self, client, titles, settings):
+        for query in QUERIES:
+            settings.API_TITLE_LIST_PROJECTION = False
+            expected, _ = get(client, query)
+            settings.API_TITLE_LIST_PROJECTION = True
+            response, _ = get(client, query)
+            assert response.status_code == expected.status_code
+            assert response.content == expected.content, (
+                f'Проверьте, что проекция списка произведений для `{query}` '
+                f'выводит те же байты, что и сериализатор'
+            )
+
+    def test_02_queries(self, client, titles, settings):
+        settings.API_TITLE_LIST_PROJECTION = True
+        response, queries = get(client, '?count=false')
+        assert response.status_code == 200
+        assert len(queries) == 2, (
+            'Проверьте, что проекция читает страницу и жанры двумя запросами'
+        )
+        assert 'description' in queries[0]['sql']
+
+    def test_03_fallbacks(self, client, titles, settings):
+        settings.API_TITLE_LIST_PROJECTION = True
+        response, _ = get(client, '?fields=id,genre')
+        results = response.json()['results']
+        assert {title['id']: title['genre'] for title in results}[titles[0].id] == [
+            'genre-0', 'genre-1', 'genre-2'
+        ], 'Проверьте, что с `?fields=` список выводится сериализатором'
+        assert all(set(title) == {'id', 'genre'} for title in results)
@@ -0,0 +1,109 @@
+import pytest
+from django.core.cache import cache
+from rest_framework import serializers
+from rest_framework.renderers import JSONRenderer
+
+from .common import auth_client
+
+
+def render(serializer_class, instances, compiled, settings):
+    settings.API_COMPILED_SERIALIZERS = compiled
+    return JSONRenderer().render(serializer_class(instances, many=True).data)
+
+
+@pytest.fixture
+def instances(catalog, admin):
+    from reviews.models import Comments, Review, Title
+    titles, reviews, comments, users = catalog
+    titles[1].category = None
+    titles[1].save()
+    titles[2].genre.set([])
+    users[0].first_name, users[0].bio, users[0].role = 'Имя', 'О себе', 'moderator'
+    users[0].save()
+    return {
+        'UserSerializer': [admin] + users,
+        'CategorySerializer': [title.category for title in titles[2:]],
+        'GenreSerializer': list(titles[0].genre.all()),
+        'TitlesReadSerializer': list(
+            Title.objects.select_related('category').prefetch_related('genre')
+        ),
+        'ReviewSerializer': list(Review.objects.select_related('author')),
+        'CommentSerializer': list(Comments.objects.select_related('author')),
+    }
+
+
+@pytest.mark.django_db
+class Test31CompiledSerializers:
+
+    def test_01_parity(self, instances, settings):
+        from api import serializers as api_serializers
+        from api.compiled import compiled_serializers
+        assert len(compiled_serializers.functions) == len(instances)
+        for name, objects in instances.items():
+            serializer_class = getattr(api_serializers, name)
+            represent = compiled_serializers.get(serializer_class)
+            assert represent is not None and not represent.fallback_fields, (
+                f'Проверьте, что {name} компилируется без полей DRF'
+            )
+            expected = render(serializer_class, objects, False, settings)
+            assert render(serializer_class, objects, True, settings) == expected, (
+                f'Проверьте, что скомпилированный {name} выводит то же, что DRF'
+            )
+
+    def test_02_fallback(self, instances, settings):
+        from api.compiled import compile_fields
+        from reviews.models import Review
+
+        class WithFallback(serializers.ModelSerializer):
+            title_name = serializers.CharField(source='title.name')
+            upper = serializers.SerializerMethodField()
+            secret = serializers.CharField(write_only=True)
+
+            class Meta:
+                model = Review
+                fields = ('id', 'title_name', 'upper', 'score', 'secret')
+
+            def get_upper(self, review):
+                return review.text.upper()
+
+        class Custom(WithFallback):
+            def to_representation(self, instance):
+                return {'id': instance.id}
+
+        serializer = WithFallback()
+        represent = compile_fields(serializer)
+        assert represent.fallback_fields == ('title_name', 'upper'), (
+            'Проверьте, что неподдерживаемые поля выводятся через DRF'
+        )
+        for review in instances['ReviewSerializer']:
+            assert represent(review, serializer.fields) == (
+                serializer.to_representation(review)
+            )
+        assert compile_fields(Custom()) is None, (
+            'Проверьте, что сериализатор со своим to_representation не компилируется'
+        )
+
+    def test_03_endpoints(self, client, instances, admin, settings):
+        from reviews.models import Review
+        review = Review.objects.first()
+        admin_client = auth_client(admin)
+        urls = (
+            '/api/v1/users/', '/api/v1/users/me/', '/api/v1/categories/',
+            '/api/v1/genres/', '/api/v1/titles/',
+            f'/api/v1/titles/{review.title_id}/',
+            f'/api/v1/titles/{review.title_id}/reviews/',
+            f'/api/v1/titles/{review.title_id}/reviews/{review.id}/comments/',
+            '/api/v1/titles/?fields=id,genre',
+        )
+        for url in urls:
+            settings.API_COMPILED_SERIALIZERS = False
+            expected = admin_client.get(url)
+            # Иначе списки категорий и жанров второй раз берутся из кэша.
+            cache.clear()
+            settings.API_COMPILED_SERIALIZERS = True
+            response = admin_client.get(url)
+            assert response.get('X-Cache') != 'HIT'
+            assert response.status_code == expected.status_code == 200
+            assert response.content == expected.content, (
+                f'Проверьте, что ответ {url} не зависит от API_COMPILED_SERIALIZERS'
+            )